@@ -1,48 +1,42 @@
 import serial
+import sys
 import time
 from datetime import datetime
-import re
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.csv_sink import GroupCommitCsvWriter
+from shared.serial_ingest import ChunkedLineReader, make_parser
 
 ser = serial.Serial('/dev/cu.usbmodem11101', 115200)
 filename = "dht11_data.csv"
 
-# Write CSV header if file is empty
-with open(filename, "a") as file:
-    if file.tell() == 0:  # File is empty
-        file.write("Timestamp,Date,Time,Humidity (%),Temperature (°C)\n")
-        file.flush()
+reader = ChunkedLineReader(ser)
+# Look for lines with the format: "OK         | 56.0         | 17.0"
+parser = make_parser("dht_table")
 
-with open(filename, "a") as file:
+# Appends to the existing file (header only if it is empty); rows are committed
+# to disk in groups of 64 or every 2 s instead of flushing every line
+with GroupCommitCsvWriter(filename, ["Timestamp", "Date", "Time", "Humidity (%)", "Temperature (°C)"],
+                          flush_rows=64, flush_ms=2000, append=True) as file:
     while True:
         try:
-            line = ser.readline().decode('utf-8').strip()
-            # Look for lines with the format: "OK         | 56.0         | 17.0"
-            if '|' in line and 'OK' in line:
-                # Extract humidity and temperature values
-                parts = line.split('|')
-                if len(parts) >= 3:
-                    humidity = parts[1].strip()
-                    temperature = parts[2].strip()
-                    # Extract numeric values
-                    humidity_match = re.search(r'(\d+\.?\d*)', humidity)
-                    temp_match = re.search(r'(\d+\.?\d*)', temperature)
-                    
-                    if humidity_match and temp_match:
-                        humidity_val = humidity_match.group(1)
-                        temp_val = temp_match.group(1)
-                        
-                        # Create readable timestamp
-                        now = datetime.now()
-                        timestamp = now.strftime("%Y%m%d%H%M%S")
-                        date_str = now.strftime("%Y-%m-%d")
-                        time_str = now.strftime("%H:%M:%S")
-                        
-                        # Write to CSV
-                        file.write(f"{timestamp},{date_str},{time_str},{humidity_val},{temp_val}\n")
-                        file.flush()  # Force write to disk :))
-                        
-                        # Print formatted output
-                        print(f"[{time_str}] Humidity: {humidity_val}% | Temperature: {temp_val}°C")
+            rows = parser.parse(reader.read_lines())
+            if not len(rows):
+                continue
+
+            # Create readable timestamp
+            now = datetime.now()
+            timestamp = now.strftime("%Y%m%d%H%M%S")
+            date_str = now.strftime("%Y-%m-%d")
+            time_str = now.strftime("%H:%M:%S")
+
+            for humidity_val, temp_val in rows.tolist():
+                # Write to CSV
+                file.writerow([timestamp, date_str, time_str, humidity_val, temp_val])
+                # Print formatted output
+                print(f"[{time_str}] Humidity: {humidity_val}% | Temperature: {temp_val}°C")
         except KeyboardInterrupt:
             print("\nData collection stopped.")
+            print(parser.summary())
             break
@@ -1,12 +1,26 @@
-import matplotlib.pyplot as plt
+import argparse
 import csv
+import sys
+import time
 from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.fastplot import Plotter, add_plot_args
+
+ap = argparse.ArgumentParser(description="Plot the DHT11 humidity/temperature log")
+ap.add_argument("csv", nargs="?", default="dht11_data.csv")
+ap.add_argument("--out", default="dht11_graph.png")
+add_plot_args(ap, dpi=300)
+args = ap.parse_args()
 
 timestamps = []
 humidity = []
 temperature = []
 
-with open('dht11_data.csv', 'r') as file:
+with open(args.csv, 'r') as file:
     reader = csv.reader(file)
     next(reader)  # Skip header row
     for row in reader:
@@ -22,36 +36,32 @@ with open('dht11_data.csv', 'r') as file:
         except ValueError:
             continue  # Skip any bad data lines
 
-# Create the plot
-plt.figure(figsize=(12, 8))
-
-# Create subplots for better visualization
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
-
-# Plot humidity
-ax1.plot(timestamps, humidity, label='Humidity (%)', color='blue', marker='o', markersize=4)
-ax1.set_ylabel('Humidity (%)')
-ax1.set_title('DHT11 Humidity over Time')
-ax1.grid(True, alpha=0.3)
-ax1.legend()
+timestamps = np.array(timestamps, dtype="datetime64[s]")
 
-# Plot temperature
-ax2.plot(timestamps, temperature, label='Temperature (°C)', color='red', marker='x', markersize=4)
-ax2.set_ylabel('Temperature (°C)')
-ax2.set_xlabel('Time')
-ax2.set_title('DHT11 Temperature over Time')
-ax2.grid(True, alpha=0.3)
-ax2.legend()
+# Agg backend, one figure; long logs are min/max-decimated to the pixel width (markers then dropped)
+t0 = time.perf_counter()
+plotter = Plotter(args.dpi, args.max_points)
+with plotter.figure(args.out, figsize=(12, 8), nrows=2, sharex=True) as (fig, (ax1, ax2)):
+    # Plot humidity
+    plotter.line(ax1, timestamps, humidity, label='Humidity (%)', color='blue', marker='o', markersize=4)
+    ax1.set_ylabel('Humidity (%)')
+    ax1.set_title('DHT11 Humidity over Time')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
 
-# Format x-axis
-plt.xticks(rotation=45)
+    # Plot temperature
+    plotter.line(ax2, timestamps, temperature, label='Temperature (°C)', color='red', marker='x', markersize=4)
+    ax2.set_ylabel('Temperature (°C)')
+    ax2.set_xlabel('Time')
+    ax2.set_title('DHT11 Temperature over Time')
+    ax2.grid(True, alpha=0.3)
+    ax2.legend()
 
-# Adjust layout
-plt.tight_layout()
+    # Format x-axis
+    ax2.tick_params(axis="x", labelrotation=45)
 
-# Save to file
-plt.savefig("dht11_graph.png", dpi=300, bbox_inches='tight')
-print("Graph saved as dht11_graph.png")
+    # Adjust layout
+    fig.tight_layout()
 
-# Show the plot
-plt.show()
+plotter.report(time.perf_counter() - t0)
+print(f"Graph saved as {args.out}")
@@ -1,97 +1,130 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
 import sys
-
-if len(sys.argv) < 3:
-    print("Usage: python analysis_week3.py week3_temperature.csv week3_humidity.csv")
-    sys.exit(1)
-
-temp_file, hum_file = sys.argv[1], sys.argv[2]
-
-# Load both CSVs
-df_temp = pd.read_csv(temp_file)
-df_hum = pd.read_csv(hum_file)
-
-# Rename columns for clarity
-df_temp = df_temp.rename(columns={"time": "timestamp", "value": "temperature_c"})
-df_hum = df_hum.rename(columns={"time": "timestamp", "value": "humidity"})
-
-# Convert timestamps to datetime
-df_temp["timestamp"] = pd.to_datetime(df_temp["timestamp"])
-df_hum["timestamp"] = pd.to_datetime(df_hum["timestamp"])
-
-# Merge on timestamp (inner join to get only matching timestamps)
-df = pd.merge(df_temp, df_hum, on="timestamp", how="inner")
-
-# Sort by timestamp
-df = df.sort_values("timestamp")
-
-# Save merged CSV
-df.to_csv("week3_dht_data.csv", index=False)
-
-print(f"Merged data shape: {df.shape}")
-print(f"Time range: {df['timestamp'].min()} to {df['timestamp'].max()}")
-
-# Plot temperature
-plt.figure(figsize=(12, 6))
-plt.plot(df["timestamp"], df["temperature_c"], label="Temperature (°C)", linewidth=2)
-plt.xticks(rotation=45)
-plt.ylabel("Temperature (°C)")
-plt.xlabel("Time")
-plt.title("Temperature over Time")
-plt.grid(True, alpha=0.3)
-plt.legend()
-plt.tight_layout()
-plt.savefig("week3_temp.png", dpi=300, bbox_inches='tight')
-plt.close()
-
-# Plot humidity
-plt.figure(figsize=(12, 6))
-plt.plot(df["timestamp"], df["humidity"], color="orange", label="Humidity (%)", linewidth=2)
-plt.xticks(rotation=45)
-plt.ylabel("Humidity (%)")
-plt.xlabel("Time")
-plt.title("Humidity over Time")
-plt.grid(True, alpha=0.3)
-plt.legend()
-plt.tight_layout()
-plt.savefig("week3_hum.png", dpi=300, bbox_inches='tight')
-plt.close()
-
-# Combined plot
-fig, ax1 = plt.subplots(figsize=(14, 8))
-
-# Temperature on left y-axis
-color1 = 'tab:blue'
-ax1.set_xlabel('Time')
-ax1.set_ylabel('Temperature (°C)', color=color1)
-ax1.plot(df["timestamp"], df["temperature_c"], color=color1, linewidth=2, label="Temperature (°C)")
-ax1.tick_params(axis='y', labelcolor=color1)
-ax1.grid(True, alpha=0.3)
-
-# Humidity on right y-axis
-ax2 = ax1.twinx()
-color2 = 'tab:orange'
-ax2.set_ylabel('Humidity (%)', color=color2)
-ax2.plot(df["timestamp"], df["humidity"], color=color2, linewidth=2, label="Humidity (%)")
-ax2.tick_params(axis='y', labelcolor=color2)
-
-# Rotate x-axis labels
-plt.xticks(rotation=45)
-
-# Add legends
-lines1, labels1 = ax1.get_legend_handles_labels()
-lines2, labels2 = ax2.get_legend_handles_labels()
-ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-
-plt.title("Temperature and Humidity Over Time")
-plt.tight_layout()
-plt.savefig("week3_combined.png", dpi=300, bbox_inches='tight')
-plt.close()
-
-print("Done: Saved week3_dht_data.csv and 3 plots")
-print("Files created:")
-print("- week3_dht_data.csv (merged data)")
-print("- week3_temp.png (temperature plot)")
-print("- week3_hum.png (humidity plot)")
-print("- week3_combined.png (combined plot)")
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.fastplot import MinMaxReducer, Plotter, add_plot_args
+from shared.session_store import iter_frames
+from shared.stream_join import asof_join, write_chunks
+
+OUT = "week3_dht_data.parquet"
+
+def plot_temperature(plotter, path, ts, temp, points=None):
+    with plotter.figure(path, figsize=(12, 6)) as (fig, ax):
+        plotter.line(ax, ts, temp, points=points, label="Temperature (°C)", linewidth=2)
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_ylabel("Temperature (°C)")
+        ax.set_xlabel("Time")
+        ax.set_title("Temperature over Time")
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        fig.tight_layout()
+
+def plot_humidity(plotter, path, ts, hum, points=None):
+    with plotter.figure(path, figsize=(12, 6)) as (fig, ax):
+        plotter.line(ax, ts, hum, points=points, color="orange", label="Humidity (%)", linewidth=2)
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_ylabel("Humidity (%)")
+        ax.set_xlabel("Time")
+        ax.set_title("Humidity over Time")
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        fig.tight_layout()
+
+def plot_combined(plotter, path, ts, temp, ts_h, hum, points=None):
+    with plotter.figure(path, figsize=(14, 8)) as (fig, ax1):
+        # Temperature on left y-axis
+        color1 = 'tab:blue'
+        ax1.set_xlabel('Time')
+        ax1.set_ylabel('Temperature (°C)', color=color1)
+        plotter.line(ax1, ts, temp, points=points, color=color1, linewidth=2, label="Temperature (°C)")
+        ax1.tick_params(axis='y', labelcolor=color1)
+        ax1.grid(True, alpha=0.3)
+
+        # Humidity on right y-axis
+        ax2 = ax1.twinx()
+        color2 = 'tab:orange'
+        ax2.set_ylabel('Humidity (%)', color=color2)
+        plotter.line(ax2, ts_h, hum, points=points, color=color2, linewidth=2, label="Humidity (%)")
+        ax2.tick_params(axis='y', labelcolor=color2)
+
+        # Rotate x-axis labels
+        ax1.tick_params(axis="x", labelrotation=45)
+
+        # Add legends
+        lines1, labels1 = ax1.get_legend_handles_labels()
+        lines2, labels2 = ax2.get_legend_handles_labels()
+        ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+
+        ax1.set_title("Temperature and Humidity Over Time")
+        fig.tight_layout()
+
+def main():
+    ap = argparse.ArgumentParser(description="Week 3 temperature/humidity analysis")
+    ap.add_argument("temp_file", help="e.g. week3_temperature.csv")
+    ap.add_argument("hum_file", help="e.g. week3_humidity.csv")
+    ap.add_argument("--tolerance", default="5s",
+                    help="Pair each temperature reading with the nearest humidity reading this close (pandas Timedelta)")
+    ap.add_argument("--chunk", type=int, default=1_000_000, help="Rows per chunk; memory stays bounded for year-long exports")
+    add_plot_args(ap, dpi=300)
+    args = ap.parse_args()
+
+    # Time-aligned join, streamed chunk by chunk (CSV, or the Parquet copy made by `shared/session_store.py migrate`).
+    # An exact-timestamp inner join silently dropped any reading the other sensor didn't take at the same instant.
+    span = []
+
+    def track_span(chunks):
+        for chunk in chunks:
+            span[:] = [span[0] if span else chunk["timestamp"].iat[0], chunk["timestamp"].iat[-1]]
+            yield chunk
+    rows = write_chunks(track_span(asof_join([("temperature_c", args.temp_file), ("humidity", args.hum_file)],
+                                             tolerance=args.tolerance, chunk_rows=args.chunk)), OUT)
+    if not rows:
+        sys.exit("No rows to plot")
+
+    # Reduce to the output resolution while scanning the result back in batches, so memory stays
+    # bounded here too and workers get small arrays (the 14-inch figure is the widest)
+    t0 = time.perf_counter()
+    bins = args.max_points // 2 if args.max_points is not None else 14 * args.dpi
+    t_lo, t_hi = (s.to_datetime64() for s in span)
+    temp_r = MinMaxReducer(t_lo, t_hi, bins) if bins > 0 else None
+    hum_r = MinMaxReducer(t_lo, t_hi, bins) if bins > 0 else None
+    raw = {"timestamp": [], "temperature_c": [], "humidity": []}   # --max-points 0: every sample
+    missing = 0
+    for chunk in iter_frames(OUT, columns=list(raw), batch_rows=args.chunk):
+        missing += int(chunk["humidity"].isna().sum())
+        if temp_r is None:
+            for c in raw:
+                raw[c].append(chunk[c].to_numpy())
+            continue
+        ts = chunk["timestamp"].to_numpy()
+        temp_r.add(ts, chunk["temperature_c"].to_numpy())
+        hum_r.add(ts, chunk["humidity"].to_numpy())
+    print(f"Merged data: {rows} rows ({missing} temperature readings with no humidity within {args.tolerance})")
+    print(f"Time range: {span[0]} to {span[1]}")
+    if temp_r is None:
+        ts_t = ts_h = np.concatenate(raw["timestamp"])
+        temp, hum = np.concatenate(raw["temperature_c"]), np.concatenate(raw["humidity"])
+    else:
+        ts_t, temp = temp_r.result()
+        ts_h, hum = hum_r.result()
+
+    plotter = Plotter(args.dpi, args.max_points, args.plot_workers)
+    plotter.submit(plot_temperature, "week3_temp.png", ts_t, temp, rows)
+    plotter.submit(plot_humidity, "week3_hum.png", ts_h, hum, rows)
+    plotter.submit(plot_combined, "week3_combined.png", ts_t, temp, ts_h, hum, rows)
+    plotter.close()
+    plotter.report(time.perf_counter() - t0)
+
+    print("Done: Saved week3_dht_data.parquet and 3 plots")
+    print("Files created:")
+    print("- week3_dht_data.parquet (merged data)")
+    print("- week3_temp.png (temperature plot)")
+    print("- week3_hum.png (humidity plot)")
+    print("- week3_combined.png (combined plot)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: one POST per sample (push_firebase) vs the batched BatchUploader.
+
+Runs a local stand-in for the Firebase REST API so no network or account is
+needed. `--latency-ms` adds a fixed delay per request to mimic a real RTT.
+
+    python bench_uploader.py --samples 2000 --latency-ms 20
+"""
+import argparse
+import time
+
+from firebase_gyro_pipeline import push_firebase
+from firebase_uploader import BatchUploader
+from mock_firebase import count_children, start_server
+
+def sample(i):
+    return {"ts": f"2025-09-07T01:25:52.{i % 1000:03d}+00:00", "gx": 0.1 * i, "gy": -0.3, "gz": 0.18}
+
+def bench_sync(db_url, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        push_firebase(db_url, "bench/sync", sample(i))
+    return n / (time.perf_counter() - t0)
+
+def bench_batched(db_url, n, batch_size, batch_ms):
+    up = BatchUploader(db_url, "bench/batched", batch_size=batch_size, batch_ms=batch_ms).start()
+    t0 = time.perf_counter()
+    for i in range(n):
+        up.submit(sample(i))
+    submit_rate = n / (time.perf_counter() - t0)
+    up.close()
+    total_rate = n / (time.perf_counter() - t0)
+    assert count_children("bench/batched") == n, "mock server is missing samples"
+    return submit_rate, total_rate, up.stats
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark Firebase upload throughput against a local stand-in")
+    ap.add_argument("--samples", type=int, default=2000)
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="Simulated server round-trip time")
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--batch-ms", type=int, default=250)
+    args = ap.parse_args()
+
+    srv, db_url = start_server(latency_ms=args.latency_ms)
+    try:
+        # The per-sample path is RTT-bound; keep its run short so the bench finishes
+        n_sync = min(args.samples, 500)
+        sync_rate = bench_sync(db_url, n_sync)
+        submit_rate, total_rate, stats = bench_batched(db_url, args.samples, args.batch_size, args.batch_ms)
+    finally:
+        srv.shutdown()
+
+    print(f"Simulated RTT: {args.latency_ms:.1f} ms")
+    print(f"before  push_firebase (1 POST/sample): {sync_rate:10.1f} samples/s  (n={n_sync})")
+    print(f"after   BatchUploader end-to-end:      {total_rate:10.1f} samples/s  (n={args.samples})")
+    print(f"        reader-side submit():           {submit_rate:10.1f} samples/s")
+    print(f"        speedup: {total_rate / sync_rate:.1f}x | {stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Paged, streaming export of a Firebase session for the Week 5 gyro pipeline.
+
+Instead of downloading the whole node in one GET, the session is walked in key
+order with `orderBy="$key"`, `startAt` and `limitToFirst`. Each page is cleaned
+and appended straight to the output file, so memory stays constant no matter
+how long the session is. The last exported key is kept in a small JSON file
+next to the output, which lets `--since` fetch only what is new.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+from firebase_uploader import make_session
+
+COLUMNS = ["ts", "gx", "gy", "gz"]
+
+def clean_page(df):
+    """Coerce dtypes and drop invalid rows. Returns (df, n_removed)."""
+    for col in ["gx", "gy", "gz"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["ts"] = pd.to_datetime(df["ts"], errors="coerce", format="ISO8601", utc=True)
+    before = len(df)
+    df = df.dropna(subset=COLUMNS).copy()
+    return df, before - len(df)
+
+def get_json(session, url, params, stats=None, max_retries=5, backoff_s=0.5):
+    """GET with exponential backoff on connection errors and 5xx/429 answers."""
+    delay = backoff_s
+    for attempt in range(max_retries + 1):
+        try:
+            r = session.get(url, params=params, timeout=30)
+            if r.status_code < 500 and r.status_code != 429:
+                r.raise_for_status()
+                if stats is not None:
+                    stats["bytes"] = stats.get("bytes", 0) + len(r.content)
+                    stats["requests"] = stats.get("requests", 0) + 1
+                return r.json()
+            err = f"HTTP {r.status_code}"
+        except requests.ConnectionError as e:
+            err = e
+        except requests.Timeout as e:
+            err = e
+        if attempt == max_retries:
+            raise RuntimeError(f"GET {url} failed after {max_retries} retries: {err}")
+        if stats is not None:
+            stats["retries"] = stats.get("retries", 0) + 1
+        time.sleep(delay)
+        delay = min(delay * 2, 30.0)
+
+def list_children(session, db_url, path, auth=None, stats=None):
+    """Names of the direct children of `path`, via a shallow query."""
+    url = f"{db_url.rstrip('/')}/{path.strip('/')}.json"
+    params = {"shallow": "true"}
+    if auth:
+        params["auth"] = auth
+    tree = get_json(session, url, params, stats)
+    return sorted(tree) if isinstance(tree, dict) else []
+
+def iter_firebase_pages(session, db_url, path, auth=None, page_size=5000, start_after=None, stats=None):
+    """Yield pages of (key, value) pairs in key order, each at most `page_size` long."""
+    url = f"{db_url.rstrip('/')}/{path.strip('/')}.json"
+    last = start_after
+    while True:
+        params = {"orderBy": '"$key"', "limitToFirst": page_size + (1 if last else 0)}
+        if last:
+            # startAt is inclusive, so ask for one extra and drop the key we already have
+            params["startAt"] = json.dumps(last)
+        if auth:
+            params["auth"] = auth
+        tree = get_json(session, url, params, stats) or {}
+        items = sorted((k, v) for k, v in tree.items() if k != last)
+        if not items:
+            return
+        yield items
+        last = items[-1][0]
+        if len(items) < page_size:
+            return
+
+def page_to_frame(items):
+    rows = [{c: v.get(c) for c in COLUMNS} for _, v in items if isinstance(v, dict)]
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+class CsvPageWriter:
+    def __init__(self, path, append=False):
+        self.path = Path(path)
+        self.header = not (append and self.path.exists() and self.path.stat().st_size > 0)
+        self.mode = "a" if append else "w"
+
+    def write(self, df):
+        df.to_csv(self.path, mode=self.mode, header=self.header, index=False)
+        self.mode, self.header = "a", False
+
+    def close(self):
+        pass
+
+class ParquetPageWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa, self._pq = pa, pq
+        self.path = Path(path)
+        self.schema = pa.schema([
+            ("ts", pa.timestamp("ms", tz="UTC")),
+            ("gx", pa.float32()), ("gy", pa.float32()), ("gz", pa.float32()),
+        ])
+        self.writer = None
+
+    def write(self, df):
+        table = self._pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(str(self.path), self.schema, compression="zstd")
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def state_path(out):
+    return Path(str(out) + ".state.json")
+
+def load_last_key(out):
+    p = state_path(out)
+    if p.exists():
+        return json.loads(p.read_text(encoding="utf-8")).get("last_key")
+    return None
+
+def save_last_key(out, key):
+    state_path(out).write_text(json.dumps({"last_key": key}), encoding="utf-8")
+
+def export_session(db_url, path, out, auth=None, page_size=5000, since=False, fmt=None, session=None, stats=None):
+    """Stream `path` into `out` page by page. Returns a stats dict."""
+    out = Path(out)
+    fmt = fmt or ("parquet" if out.suffix == ".parquet" else "csv")
+    stats = stats if stats is not None else {}
+    stats.update({"rows": 0, "removed": 0, "pages": 0, "bytes": 0, "requests": 0,
+                  "retries": 0, "last_key": None})
+    start_after = load_last_key(out) if since else None
+    target = out
+    if fmt == "parquet":
+        if start_after:
+            # Parquet files can't be appended to; write the new keys as a sibling part
+            target = out.with_name(f"{out.stem}_since_{start_after}{out.suffix}")
+        writer = ParquetPageWriter(target)
+    else:
+        writer = CsvPageWriter(out, append=bool(start_after))
+    own_session = session is None
+    session = session or make_session()
+    try:
+        for items in iter_firebase_pages(session, db_url, path, auth, page_size, start_after, stats):
+            df, removed = clean_page(page_to_frame(items))
+            if len(df):
+                writer.write(df)
+            stats["rows"] += len(df)
+            stats["removed"] += removed
+            stats["pages"] += 1
+            stats["last_key"] = items[-1][0]
+            if fmt == "csv":
+                save_last_key(out, stats["last_key"])   # each CSV page is on disk once written
+    finally:
+        writer.close()
+        if own_session:
+            session.close()
+    if fmt == "parquet" and stats["last_key"]:
+        # Only a closed Parquet file (with its footer) can be read back; a crash before
+        # this point leaves the checkpoint where it was, so --since fetches these rows again
+        save_last_key(out, stats["last_key"])
+    stats["out"] = str(target)
+    return stats
+
+def export_many(db_url, path, out_dir, auth=None, page_size=5000, since=False, fmt="csv",
+                workers=4, sessions=None, on_done=None):
+    """Export every child session of `path` to `out_dir/<session>.<fmt>` in parallel.
+
+    All workers share one connection pool. Returns {session: stats}; a failed
+    session has an "error" entry instead of stopping the others. `on_done` is
+    called as each session finishes, from the caller's thread.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    session = make_session(pool_size=workers)
+    results = {}
+    try:
+        names = sessions or list_children(session, db_url, path, auth)
+        lock = threading.Lock()
+
+        def run(name):
+            stats = {}
+            t0 = time.perf_counter()
+            try:
+                export_session(db_url, f"{path.strip('/')}/{name}", out_dir / f"{name}.{fmt}",
+                               auth=auth, page_size=page_size, since=since, fmt=fmt,
+                               session=session, stats=stats)
+            except Exception as e:
+                stats["error"] = str(e)
+            stats["seconds"] = time.perf_counter() - t0
+            stats["rows_per_s"] = stats.get("rows", 0) / max(stats["seconds"], 1e-9)
+            with lock:
+                results[name] = stats
+            return name, stats
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run, n) for n in names]
+            for fut in as_completed(futures):
+                name, stats = fut.result()
+                if on_done:
+                    on_done(name, stats, len(results), len(names))
+    finally:
+        session.close()
+    return results
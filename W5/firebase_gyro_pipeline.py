@@ -1,17 +1,21 @@
 import argparse
-import csv
-import json
+import sys
 import time
-from datetime import datetime, timezone
 from pathlib import Path
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 import requests
 import serial
 
-def now_iso():
-    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.binary_frames import BinaryFrameReader
+from shared.fastplot import Plotter, add_plot_args, decimate
+from shared.serial_ingest import ChunkedLineReader, RowClock, iso_utc, make_parser
+from shared.session_store import load_frame
+
+from firebase_export import clean_page, export_many, export_session
+from firebase_spool import SampleSpool, SpoolDrainer
+from firebase_uploader import BatchUploader
 
 def push_firebase(db_url, path, payload, auth=None):
     url = f"{db_url.rstrip('/')}/{path.strip('/')}.json"
@@ -22,144 +26,185 @@ def push_firebase(db_url, path, payload, auth=None):
     r.raise_for_status()
     return r.json()
 
-def get_all_firebase(db_url, path, auth=None):
-    url = f"{db_url.rstrip('/')}/{path.strip('/')}.json"
-    params = {"print": "pretty"}
-    if auth:
-        params["auth"] = auth
-    r = requests.get(url, params=params, timeout=15)
-    r.raise_for_status()
-    return r.json()
-
 def mode_listen(args):
     ser = serial.Serial(args.port, args.baud, timeout=1)
     print(f"[listen] Connected to {args.port} @ {args.baud} baud")
     print(f"[listen] Pushing samples to: {args.db_url}/{args.path}")
+    uploader = make_uploader(args)
+    if args.binary:
+        # Sketch built with BINARY_FRAMES 1: fixed 22-byte frames with seq + CRC
+        parser = BinaryFrameReader(ser)
+    else:
+        reader = ChunkedLineReader(ser)
+        # Expected format from Arduino: ",gx,gy,gz" (parts[0] is an empty timestamp field)
+        parser = make_parser("gyro")
+    clock = RowClock(args.period_ms)
+    count = 0
     try:
-        while True:
-            line = ser.readline().decode(errors="ignore").strip()
-            if not line:
-                continue
-            if line.startswith("#"):
-                print(line)
+        done = False
+        while not done:
+            device_ms = None
+            if args.binary:
+                frames = parser.read_frames()
+                # float32 on the wire; round like the ASCII sketch (6 decimals)
+                rows = np.column_stack((frames["x"], frames["y"], frames["z"])).round(6)
+                device_ms = frames["t_ms"]
+            else:
+                rows = parser.parse(reader.read_lines())
+                for line in parser.comments:
+                    print(line.decode(errors="ignore"))
+            if not len(rows):
                 continue
 
-            # Expected format from Arduino: ",gx,gy,gz"
-            parts = line.split(",")
-            if len(parts) != 4:
-                try:
-                    gx, gy, gz = map(float, parts[-3:])
-                except Exception:
-                    print(f"[warn] Unexpected line: {line}")
-                    continue
-            else:
-                # parts[0] is empty timestamp field from Arduino
-                try:
-                    gx, gy, gz = float(parts[1]), float(parts[2]), float(parts[3])
-                except Exception:
-                    print(f"[warn] Parse fail: {line}")
-                    continue
-
-            ts = now_iso()
-            sample = {"ts": ts, "gx": gx, "gy": gy, "gz": gz}
-            try:
-                push_firebase(args.db_url, args.path, sample, auth=args.auth)
-                print(f"[ok] {sample}")
-            except Exception as e:
-                print(f"[error] Firebase push failed: {e}")
-            if args.max_samples and args.max_samples > 0:
-                args.max_samples -= 1
-                if args.max_samples <= 0:
-                    print("[listen] Reached max_samples, exiting.")
-                    break
+            # One time per row: the newest gets the read time, earlier ones are spaced by the
+            # frames' t_ms (binary) or one sample period apart (ASCII lines carry no time)
+            stamps = iso_utc(clock.stamp(len(rows), device_ms))
+            for ts, (gx, gy, gz) in zip(stamps, rows.tolist()):
+                sample = {"ts": ts, "gx": gx, "gy": gy, "gz": gz}
+                # Never blocks on the network: the uploader thread does that I/O
+                if not uploader.submit(sample):
+                    print(f"[warn] Upload queue full, dropped {sample}")
+                count += 1
+                if count % 100 == 0:
+                    st = uploader.stats
+                    print(f"[ok] read={count} sent={st['sent']} pending={uploader.pending()} "
+                          f"retries={st['retries']} dropped={st['dropped']} failed={st['failed']}")
+                if args.max_samples and args.max_samples > 0:
+                    args.max_samples -= 1
+                    if args.max_samples <= 0:
+                        print("[listen] Reached max_samples, exiting.")
+                        done = True
+                        break
 
     finally:
         ser.close()
+        print(f"[listen] Flushing {uploader.pending()} queued samples...")
+        uploader.close()
+        print(f"[listen] Done: {uploader.stats}")
+        print(parser.summary())
+        if args.spool:
+            print(f"[listen] {uploader.pending()} samples left in {args.spool} (sent on next run)")
+
+def make_uploader(args):
+    if not args.spool:
+        return BatchUploader(
+            args.db_url, args.path, auth=args.auth,
+            batch_size=args.batch_size, batch_ms=args.batch_ms, queue_size=args.queue_size,
+        ).start()
+    spool = SampleSpool(args.spool, max_rows=args.spool_max_rows)
+    backlog = len(spool)
+    if backlog:
+        print(f"[spool] Resuming: {backlog} unsent samples in {args.spool}")
+    return SpoolDrainer(
+        spool, args.db_url, args.path, auth=args.auth,
+        batch_size=args.batch_size, batch_ms=args.batch_ms,
+    ).start()
 
-def save_csv(samples, csv_path):
-    # samples is list of dicts with keys ts, gx, gy, gz
-    fieldnames = ["ts", "gx", "gy", "gz"]
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for s in samples:
-            writer.writerow(s)
-
-def flatten_firebase_tree(tree):
-    """Firebase returns a dict keyed by push ids -> sample dicts.
-    Return as a list sorted by ts."""
-    if not tree:
-        return []
-    rows = []
-    for _, v in tree.items():
-        if not isinstance(v, dict):
-            continue
-        ts = v.get("ts")
-        gx = v.get("gx")
-        gy = v.get("gy")
-        gz = v.get("gz")
-        rows.append({"ts": ts, "gx": gx, "gy": gy, "gz": gz})
-    rows.sort(key=lambda r: (r["ts"] or ""))
-    return rows
+def mode_drain(args):
+    spool = SampleSpool(args.spool, max_rows=0)
+    backlog = len(spool)
+    print(f"[drain] {backlog} samples in {args.spool} -> {args.db_url}/{args.path}")
+    if not backlog:
+        return
+    drainer = SpoolDrainer(spool, args.db_url, args.path, auth=args.auth,
+                           batch_size=args.batch_size).start()
+    try:
+        while drainer.pending() > 0 and drainer._thread.is_alive():
+            time.sleep(1.0)
+            print(f"[drain] sent={drainer.stats['sent']} retries={drainer.stats['retries']} "
+                  f"left={len(spool)}")
+    except KeyboardInterrupt:
+        pass
+    drainer.close()
+    print(f"[drain] Done: {drainer.stats}")
 
 def clean_dataframe(df):
     # Drop rows with any NaN or non-convertible values, enforce dtypes
-    for col in ["gx", "gy", "gz"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    df["ts"] = pd.to_datetime(df["ts"], errors="coerce")
-    before = len(df)
-    df = df.dropna(subset=["ts", "gx", "gy", "gz"]).copy()
-    after = len(df)
-    print(f"[clean] Removed {before - after} invalid rows")
+    df, removed = clean_page(df)
+    print(f"[clean] Removed {removed} invalid rows")
     return df
 
 def mode_export(args):
-    print(f"[export] Downloading from {args.db_url}/{args.path}")
-    tree = get_all_firebase(args.db_url, args.path, auth=args.auth)
-    rows = flatten_firebase_tree(tree)
-    if not rows:
-        print("[export] No data found.")
+    print(f"[export] Downloading from {args.db_url}/{args.path} in pages of {args.page_size}")
+    t0 = time.time()
+    stats = export_session(args.db_url, args.path, args.out, auth=args.auth,
+                           page_size=args.page_size, since=args.since, fmt=args.format)
+    if stats["pages"] == 0:
+        print("[export] No new data found." if args.since else "[export] No data found.")
         return
-    df = pd.DataFrame(rows)
-    df = clean_dataframe(df)
-    csv_path = Path(args.out)
-    df.to_csv(csv_path, index=False)
-    print(f"[export] Saved CSV -> {csv_path.resolve()}")
+    dt = max(time.time() - t0, 1e-9)
+    print(f"[clean] Removed {stats['removed']} invalid rows")
+    print(f"[export] {stats['rows']} rows in {stats['pages']} pages, "
+          f"{stats['bytes'] / 1e6:.1f} MB, {stats['rows'] / dt:.0f} rows/s")
+    print(f"[export] Saved -> {Path(stats['out']).resolve()} (last key {stats['last_key']})")
 
-def plot_series(df, out_prefix):
-    # Ensure datetime index
-    df = df.sort_values("ts").set_index("ts")
+def mode_export_many(args):
+    print(f"[export-many] Listing sessions under {args.db_url}/{args.path}")
+    t0 = time.time()
+
+    def progress(name, st, done, total):
+        if "error" in st:
+            print(f"[export-many] {done}/{total} {name}: FAILED ({st['error']})")
+            return
+        print(f"[export-many] {done}/{total} {name}: {st.get('rows', 0)} rows, "
+              f"{st.get('bytes', 0) / 1e6:.2f} MB, {st['rows_per_s']:.0f} rows/s, "
+              f"retries={st.get('retries', 0)} -> {st.get('out')}")
+
+    results = export_many(args.db_url, args.path, args.out_dir, auth=args.auth,
+                          page_size=args.page_size, since=args.since, fmt=args.format,
+                          workers=args.workers, on_done=progress)
+    if not results:
+        print("[export-many] No sessions found.")
+        return
+    dt = max(time.time() - t0, 1e-9)
+    rows = sum(st.get("rows", 0) for st in results.values())
+    mb = sum(st.get("bytes", 0) for st in results.values()) / 1e6
+    failed = [n for n, st in results.items() if "error" in st]
+    print(f"[export-many] {len(results)} sessions, {rows} rows, {mb:.1f} MB in {dt:.1f}s "
+          f"({rows / dt:.0f} rows/s, {mb / dt:.1f} MB/s), failed={len(failed)}")
 
+def _plot_gyro(plotter, png, ts, series, title, points=None):
+    # pandas' default figure size, as the old df.plot() calls used
+    with plotter.figure(png, figsize=(6.4, 4.8)) as (fig, ax):
+        for axis, values in series.items():
+            plotter.line(ax, ts[axis], values, points=points, label=axis)
+        if len(series) > 1:
+            ax.legend()
+        ax.set_title(title)
+        ax.set_xlabel("Time (UTC)")
+        ax.set_ylabel("deg/s")
+        fig.autofmt_xdate()
+        fig.tight_layout()
+
+def plot_series(df, out_prefix, max_points=None, workers=1, dpi=150):
+    t0 = time.time()
+    df = df.sort_values("ts")
+    ts = df["ts"]
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_convert(None)
+    ts = ts.to_numpy()
+    # Cut each axis down to the output resolution once; the four plots (and workers) share the result
+    bins = max_points // 2 if max_points is not None else int(6.4 * dpi)
+    cut = {axis: decimate(ts, df[axis].to_numpy(), bins) for axis in ["gx", "gy", "gz"]}
+    times = {axis: t for axis, (t, _) in cut.items()}
+    values = {axis: v for axis, (_, v) in cut.items()}
+
+    plotter = Plotter(dpi, max_points, workers)
     # Plot individual axes
     for axis in ["gx", "gy", "gz"]:
-        plt.figure()
-        df[axis].plot()
-        plt.title(f"Gyroscope {axis} over time")
-        plt.xlabel("Time (UTC)")
-        plt.ylabel("deg/s")
-        png = f"{out_prefix}_{axis}.png"
-        plt.tight_layout()
-        plt.savefig(png, dpi=150)
-        plt.close()
-        print(f"[plot] Saved {png}")
-
+        plotter.submit(_plot_gyro, f"{out_prefix}_{axis}.png", times, {axis: values[axis]},
+                       f"Gyroscope {axis} over time", len(df))
     # Combined
-    plt.figure()
-    df[["gx", "gy", "gz"]].plot()
-    plt.title("Gyroscope gx, gy, gz over time")
-    plt.xlabel("Time (UTC)")
-    plt.ylabel("deg/s")
-    png = f"{out_prefix}_combined.png"
-    plt.tight_layout()
-    plt.savefig(png, dpi=150)
-    plt.close()
-    print(f"[plot] Saved {png}")
+    plotter.submit(_plot_gyro, f"{out_prefix}_combined.png", times, values, "Gyroscope gx, gy, gz over time",
+                   len(df))
+    plotter.close()
+    plotter.report(time.time() - t0)
 
 def mode_plot(args):
-    df = pd.read_csv(args.csv, parse_dates=["ts"])
+    df = load_frame(args.csv, time_col="ts")
     df = clean_dataframe(df)
     out_prefix = Path(args.csv).with_suffix("")
-    plot_series(df, str(out_prefix))
+    plot_series(df, str(out_prefix), args.max_points, args.plot_workers, args.dpi)
 
 def build_parser():
     p = argparse.ArgumentParser(description="SIT225 Week 5 Firebase Gyro Pipeline")
@@ -172,17 +217,52 @@ def build_parser():
     p_listen.add_argument("--path", default="sessions/session1", help="DB path to push under")
     p_listen.add_argument("--auth", default=None, help="Database secret or ID token (optional)")
     p_listen.add_argument("--max-samples", type=int, default=0, help="Stop after N samples (0 = unlimited)")
+    p_listen.add_argument("--binary", action="store_true", help="Board sends binary frames (BINARY_FRAMES 1)")
+    p_listen.add_argument("--period-ms", type=float, default=20.0,
+                          help="Sketch's SAMPLE_PERIOD_MS, used to space rows that arrive in the same read")
+    p_listen.add_argument("--batch-size", type=int, default=200, help="Max samples per Firebase PATCH")
+    p_listen.add_argument("--batch-ms", type=int, default=250, help="Max age of a batch before it is sent (ms)")
+    p_listen.add_argument("--queue-size", type=int, default=50_000, help="Samples buffered in memory before dropping (--spool '' only)")
+    p_listen.add_argument("--spool", default="gyro_spool.sqlite3",
+                          help="SQLite spool written before upload; '' keeps samples in memory only")
+    p_listen.add_argument("--spool-max-rows", type=int, default=5_000_000,
+                          help="Oldest unsent samples are discarded beyond this many (0 = unbounded)")
     p_listen.set_defaults(func=mode_listen)
 
+    p_drain = sub.add_parser("drain", help="Upload samples left in the spool without reading Serial")
+    p_drain.add_argument("--db-url", required=True)
+    p_drain.add_argument("--path", default="sessions/session1")
+    p_drain.add_argument("--auth", default=None)
+    p_drain.add_argument("--spool", default="gyro_spool.sqlite3")
+    p_drain.add_argument("--batch-size", type=int, default=200)
+    p_drain.set_defaults(func=mode_drain)
+
     p_export = sub.add_parser("export", help="Download all samples from Firebase and save to CSV")
     p_export.add_argument("--db-url", required=True)
     p_export.add_argument("--path", default="sessions/session1")
     p_export.add_argument("--auth", default=None)
-    p_export.add_argument("--out", default="gyro_data.csv")
+    p_export.add_argument("--out", default="gyro_data.csv", help="Output file (.csv or .parquet)")
+    p_export.add_argument("--format", choices=["csv", "parquet"], default=None,
+                          help="Output format (default: from --out extension)")
+    p_export.add_argument("--page-size", type=int, default=5000, help="Samples fetched per request")
+    p_export.add_argument("--since", action="store_true",
+                          help="Only fetch keys newer than the last export to --out (appends)")
     p_export.set_defaults(func=mode_export)
 
-    p_plot = sub.add_parser("plot", help="Plot CSV into 4 PNG graphs")
-    p_plot.add_argument("--csv", required=True)
+    p_many = sub.add_parser("export-many", help="Export every session under --path in parallel")
+    p_many.add_argument("--db-url", required=True)
+    p_many.add_argument("--path", default="sessions", help="Parent node whose children are sessions")
+    p_many.add_argument("--auth", default=None)
+    p_many.add_argument("--out-dir", default="exports", help="One file per session is written here")
+    p_many.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    p_many.add_argument("--page-size", type=int, default=5000)
+    p_many.add_argument("--workers", type=int, default=4, help="Sessions fetched at the same time")
+    p_many.add_argument("--since", action="store_true", help="Only fetch keys newer than each session's last export")
+    p_many.set_defaults(func=mode_export_many)
+
+    p_plot = sub.add_parser("plot", help="Plot a CSV or Parquet export into 4 PNG graphs")
+    p_plot.add_argument("--csv", required=True, help="Export to plot (.csv, .parquet, or a CSV with a migrated .parquet next to it)")
+    add_plot_args(p_plot, dpi=150)
     p_plot.set_defaults(func=mode_plot)
 
     return p
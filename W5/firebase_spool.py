@@ -0,0 +1,165 @@
+"""
+Durable on-disk spool for the Week 5 gyro pipeline.
+
+Samples are written to a SQLite database (WAL mode) before anything touches
+the network. A drainer thread replays them to Firebase in insertion order and
+deletes them only after the PATCH succeeds. Each row carries the push key it
+was given when spooled, so replaying a batch after a crash or timeout simply
+rewrites the same children instead of creating duplicates.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from firebase_uploader import make_push_id, make_session, patch_firebase
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    key     TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL
+)
+"""
+
+class SampleSpool:
+    """Append-only queue of samples stored in SQLite.
+
+    Every thread gets its own connection; WAL lets the serial reader append
+    while the drainer reads and deletes. `max_rows` bounds disk use: when the
+    spool is full the oldest unsent rows are discarded and counted.
+    """
+
+    def __init__(self, path, max_rows=5_000_000):
+        self.path = str(path)
+        self.max_rows = max_rows
+        self.trimmed = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+        conn.commit()
+        self._approx_rows = conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, sample, key=None):
+        key = key or make_push_id()
+        conn = self._conn()
+        conn.execute("INSERT OR IGNORE INTO spool (key, payload) VALUES (?, ?)",
+                     (key, json.dumps(sample, separators=(",", ":"))))
+        conn.commit()
+        self._approx_rows += 1
+        if self.max_rows and self._approx_rows > self.max_rows:
+            self._trim()
+        return key
+
+    def _trim(self):
+        # Trim in chunks of 1% so we don't run a DELETE on every insert
+        conn = self._conn()
+        excess = conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0] - self.max_rows
+        if excess > 0:
+            excess += max(1, self.max_rows // 100)
+            conn.execute("DELETE FROM spool WHERE seq IN (SELECT seq FROM spool ORDER BY seq LIMIT ?)", (excess,))
+            conn.commit()
+            self.trimmed += excess
+            print(f"[warn] Spool full, discarded {excess} oldest unsent samples")
+        self._approx_rows = conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def peek(self, limit):
+        """Oldest `limit` rows as (last_seq, {key: sample}), or (None, {})."""
+        rows = self._conn().execute(
+            "SELECT seq, key, payload FROM spool ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        if not rows:
+            return None, {}
+        return rows[-1][0], {key: json.loads(payload) for _, key, payload in rows}
+
+    def ack(self, last_seq):
+        """Delete every row up to and including `last_seq`."""
+        conn = self._conn()
+        cur = conn.execute("DELETE FROM spool WHERE seq <= ?", (last_seq,))
+        conn.commit()
+        self._approx_rows = max(0, self._approx_rows - cur.rowcount)
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class SpoolDrainer:
+    """Replays a SampleSpool to Firebase. Same interface as BatchUploader."""
+
+    def __init__(self, spool, db_url, path, auth=None, batch_size=200, batch_ms=250,
+                 backoff_s=0.5, max_backoff_s=60.0, session=None):
+        self.spool = spool
+        self.db_url = db_url
+        self.path = path
+        self.auth = auth
+        self.batch_size = max(1, batch_size)
+        self.batch_s = max(0.01, batch_ms / 1000.0)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.session = session or make_session()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="spool-drainer", daemon=True)
+        self.stats = {"queued": 0, "sent": 0, "batches": 0, "retries": 0,
+                      "dropped": 0, "failed": 0}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, sample, key=None):
+        self.spool.append(sample, key)
+        self.stats["queued"] += 1
+        self.stats["dropped"] = self.spool.trimmed
+        return True
+
+    def pending(self):
+        return self.spool._approx_rows
+
+    def close(self, timeout=30.0):
+        """Try to drain for up to `timeout` seconds; anything left stays on disk."""
+        self._stop.set()
+        self._thread.join(timeout)
+        self.session.close()
+
+    def _run(self):
+        delay = self.backoff_s
+        while True:
+            last_seq, batch = self.spool.peek(self.batch_size)
+            if not batch:
+                if self._stop.is_set():
+                    break
+                time.sleep(self.batch_s)
+                continue
+            if len(batch) < self.batch_size and not self._stop.is_set():
+                # Give a partial batch a moment to fill up
+                time.sleep(self.batch_s)
+                last_seq, batch = self.spool.peek(self.batch_size)
+            try:
+                patch_firebase(self.session, self.db_url, self.path, batch, auth=self.auth)
+            except Exception as e:
+                # Keep the rows; a retry rewrites the same keys so it is safe to repeat
+                if self._stop.is_set():
+                    print(f"[warn] Firebase unreachable ({e}); {self.pending()} samples kept in spool")
+                    break
+                self.stats["retries"] += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff_s)
+                continue
+            self.spool.ack(last_seq)
+            self.stats["sent"] += len(batch)
+            self.stats["batches"] += 1
+            delay = self.backoff_s
+        self.spool.close()
@@ -0,0 +1,163 @@
+"""
+Background Firebase uploader for the Week 5 gyro pipeline.
+
+The serial reader only calls `submit(sample)`, which never touches the network.
+A worker thread drains a bounded queue, groups samples into one multi-path
+PATCH per batch (flushed by size or age) and sends it over a keep-alive
+requests.Session, retrying with exponential backoff.
+"""
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+_push_lock = threading.Lock()
+_last_push_ms = 0
+_last_rand = [0] * 12
+
+def make_push_id(now_ms=None):
+    """Generate a Firebase-style push id (8 time chars + 12 random chars).
+
+    Ids sort lexically in creation order, same as the ones Firebase makes for
+    POST, so exports keep their ordering when we write with PATCH instead.
+    """
+    global _last_push_ms
+    with _push_lock:
+        now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        if now_ms <= _last_push_ms:
+            # Same (or earlier) millisecond: bump the random part so ids stay increasing
+            now_ms = _last_push_ms
+            i = 11
+            while i >= 0 and _last_rand[i] == 63:
+                _last_rand[i] = 0
+                i -= 1
+            if i >= 0:
+                _last_rand[i] += 1
+        else:
+            for i, b in enumerate(os.urandom(12)):
+                _last_rand[i] = b % 64
+        _last_push_ms = now_ms
+
+        time_chars = []
+        t = now_ms
+        for _ in range(8):
+            time_chars.append(PUSH_CHARS[t % 64])
+            t //= 64
+        return "".join(reversed(time_chars)) + "".join(PUSH_CHARS[r] for r in _last_rand)
+
+def make_session(pool_size=4):
+    """A requests.Session that keeps connections alive between batches."""
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+def patch_firebase(session, db_url, path, updates, auth=None, timeout=10):
+    """Write many children of `path` in a single multi-path PATCH."""
+    url = f"{db_url.rstrip('/')}/{path.strip('/')}.json"
+    params = {"print": "silent"}
+    if auth:
+        params["auth"] = auth
+    r = session.patch(url, params=params, json=updates, timeout=timeout)
+    r.raise_for_status()
+
+class BatchUploader:
+    """Bounded queue + worker thread that uploads samples in PATCH batches."""
+
+    def __init__(self, db_url, path, auth=None, batch_size=200, batch_ms=250,
+                 queue_size=50_000, max_retries=5, backoff_s=0.5, session=None):
+        self.db_url = db_url
+        self.path = path
+        self.auth = auth
+        self.batch_size = max(1, batch_size)
+        self.batch_s = max(0.0, batch_ms / 1000.0)
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.session = session or make_session()
+        self.on_sent = None       # optional callback(list_of_keys) after a batch lands
+        self.on_failed = None     # optional callback(dict_of_updates) after retries run out
+
+        self._q = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="firebase-uploader", daemon=True)
+
+        self.stats = {"queued": 0, "sent": 0, "batches": 0, "retries": 0,
+                      "dropped": 0, "failed": 0}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, sample, key=None):
+        """Queue one sample without blocking. Returns False if it was dropped."""
+        try:
+            self._q.put_nowait((key or make_push_id(), sample))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def pending(self):
+        return self._q.qsize()
+
+    def close(self, timeout=30.0):
+        """Flush whatever is still queued, then stop the worker."""
+        self._stop.set()
+        self._thread.join(timeout)
+        self.session.close()
+
+    def _collect(self):
+        """Block for the first item, then gather more until size or age limit."""
+        batch = {}
+        try:
+            key, sample = self._q.get(timeout=0.1)
+        except queue.Empty:
+            return batch
+        batch[key] = sample
+        deadline = time.monotonic() + self.batch_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    key, sample = self._q.get_nowait()
+                else:
+                    key, sample = self._q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch[key] = sample
+        return batch
+
+    def _send(self, batch):
+        delay = self.backoff_s
+        for attempt in range(self.max_retries + 1):
+            try:
+                patch_firebase(self.session, self.db_url, self.path, batch, auth=self.auth)
+                self.stats["sent"] += len(batch)
+                self.stats["batches"] += 1
+                if self.on_sent:
+                    self.on_sent(list(batch))
+                return True
+            except Exception as e:
+                if attempt == self.max_retries or (self._stop.is_set() and attempt >= 1):
+                    print(f"[error] Firebase batch of {len(batch)} failed: {e}")
+                    break
+                self.stats["retries"] += 1
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+        self.stats["failed"] += len(batch)
+        if self.on_failed:
+            self.on_failed(batch)
+        return False
+
+    def _run(self):
+        while not (self._stop.is_set() and self._q.empty()):
+            batch = self._collect()
+            if batch:
+                self._send(batch)
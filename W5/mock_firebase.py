@@ -0,0 +1,154 @@
+"""
+Local stand-in for the Firebase Realtime Database REST API.
+
+Supports the parts the pipeline uses: POST (push), PATCH (multi-path update),
+GET with `shallow=true`, and GET with `orderBy="$key"` / `startAt` /
+`limitToFirst`. Data lives in memory. Handy for benchmarks and for trying the
+pipeline without a Firebase project:
+
+    python mock_firebase.py --sessions 8 --samples 20000 --port 9000
+    python firebase_gyro_pipeline.py export-many --db-url http://127.0.0.1:9000 --path sessions
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from firebase_uploader import make_push_id
+
+class MockFirebase(BaseHTTPRequestHandler):
+    tree = {}
+    latency_s = 0.0
+    fail_every = 0        # if > 0, every Nth request answers 503
+    requests_seen = 0
+    lock = threading.Lock()
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real service
+
+    def _node(self, create=False):
+        parts = [p for p in urlparse(self.path).path[:-len(".json")].split("/") if p]
+        node = MockFirebase.tree
+        for p in parts:
+            if p not in node:
+                if not create:
+                    return None
+                node[p] = {}
+            node = node[p]
+        return node
+
+    def _reply(self, obj, status=200):
+        body = json.dumps(obj, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _begin(self):
+        time.sleep(self.latency_s)
+        with MockFirebase.lock:
+            MockFirebase.requests_seen += 1
+            n = MockFirebase.requests_seen
+        if self.fail_every and n % self.fail_every == 0:
+            self._reply({"error": "Service Unavailable"}, status=503)
+            return False
+        return True
+
+    def _body(self):
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+
+    def do_GET(self):
+        if not self._begin():
+            return
+        q = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        with MockFirebase.lock:
+            node = self._node()
+            if not isinstance(node, dict):
+                self._reply(node)
+                return
+            if q.get("shallow") == "true":
+                self._reply({k: True for k in node})
+                return
+            keys = sorted(node)
+            if "startAt" in q:
+                start = json.loads(q["startAt"])
+                keys = [k for k in keys if k >= start]
+            if "limitToFirst" in q:
+                keys = keys[:int(q["limitToFirst"])]
+            out = {k: node[k] for k in keys}
+        self._reply(out or None)
+
+    def do_POST(self):
+        if not self._begin():
+            return
+        data = self._body()
+        key = make_push_id()
+        with MockFirebase.lock:
+            self._node(create=True)[key] = data
+        self._reply({"name": key})
+
+    def do_PATCH(self):
+        if not self._begin():
+            return
+        data = self._body()
+        with MockFirebase.lock:
+            self._node(create=True).update(data)
+        self._reply(None)
+
+    def log_message(self, *a):
+        pass
+
+def start_server(tree=None, latency_ms=0.0, port=0, fail_every=0):
+    """Serve in a background thread. Returns (server, base_url)."""
+    MockFirebase.tree = tree if tree is not None else {}
+    MockFirebase.latency_s = latency_ms / 1000.0
+    MockFirebase.fail_every = fail_every
+    MockFirebase.requests_seen = 0
+    srv = ThreadingHTTPServer(("127.0.0.1", port), MockFirebase)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+def count_children(path):
+    node = MockFirebase.tree
+    for p in [p for p in path.split("/") if p]:
+        node = node.get(p, {})
+    return len(node)
+
+def make_sessions(n_sessions, n_samples, seed=0):
+    """Build a {"sessions": {"sessionN": {push_id: sample}}} tree of fake gyro data."""
+    rng = random.Random(seed)
+    t0 = 1757208352833   # 2025-09-07T01:25:52.833Z, same as gyro_data_final.csv
+    sessions = {}
+    for s in range(1, n_sessions + 1):
+        samples = {}
+        for i in range(n_samples):
+            ms = t0 + s * 86_400_000 + i * 20
+            ts = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ms / 1000)) + f".{ms % 1000:03d}+00:00"
+            samples[make_push_id(ms)] = {"ts": ts, "gx": round(rng.gauss(0, 1.4), 6),
+                                         "gy": round(rng.gauss(-0.3, 0.05), 6),
+                                         "gz": round(rng.gauss(-0.18, 0.05), 6)}
+        sessions[f"session{s}"] = samples
+    return {"sessions": sessions}
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a local mock of the Firebase REST API")
+    ap.add_argument("--port", type=int, default=9000)
+    ap.add_argument("--sessions", type=int, default=4, help="Fake sessions under /sessions")
+    ap.add_argument("--samples", type=int, default=10_000, help="Samples per fake session")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--fail-every", type=int, default=0, help="Answer 503 to every Nth request")
+    args = ap.parse_args()
+
+    srv, url = start_server(make_sessions(args.sessions, args.samples), args.latency_ms,
+                            args.port, args.fail_every)
+    print(f"[mock] Serving {args.sessions} x {args.samples} samples at {url}/sessions (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        srv.shutdown()
+
+if __name__ == "__main__":
+    main()
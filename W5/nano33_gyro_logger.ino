@@ -3,6 +3,45 @@
 // Target sampling period in milliseconds (e.g., 20 ms -> ~50 Hz)
 const unsigned long SAMPLE_PERIOD_MS = 20; 
 
+// 0 = ASCII lines ",gx,gy,gz"; 1 = 22-byte binary frames (see shared/binary_frames.py).
+// With 1, run the Python side with --binary.
+#define BINARY_FRAMES 0
+
+#if BINARY_FRAMES
+// CRC-16/CCITT-FALSE: poly 0x1021, init 0xFFFF (matches binascii.crc_hqx(data, 0xFFFF))
+uint16_t crc16(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+// Little-endian on the SAMD21, same layout as FRAME_DTYPE on the Python side
+struct __attribute__((packed)) GyroFrame {
+  uint16_t sync;   // 0xA55A
+  uint16_t seq;
+  uint32_t t_ms;
+  float x, y, z;
+  uint16_t crc;    // over seq..z
+};
+
+uint16_t frameSeq = 0;
+
+void sendFrame(unsigned long t, float gx, float gy, float gz) {
+  GyroFrame f;
+  f.sync = 0xA55A;
+  f.seq = frameSeq++;
+  f.t_ms = t;
+  f.x = gx; f.y = gy; f.z = gz;
+  f.crc = crc16((const uint8_t *)&f.seq, sizeof(GyroFrame) - 4);
+  Serial.write((const uint8_t *)&f, sizeof(GyroFrame));
+}
+#endif
+
 void setup() {
   Serial.begin(115200);
   while (!Serial) { ; } // Wait for Serial
@@ -29,9 +68,13 @@ void loop() {
   float gx, gy, gz;
   if (IMU.gyroscopeAvailable()) {
     IMU.readGyroscope(gx, gy, gz);
+#if BINARY_FRAMES
+    sendFrame(now, gx, gy, gz);
+#else
     Serial.print(",");
     Serial.print(gx, 6); Serial.print(",");
     Serial.print(gy, 6); Serial.print(",");
     Serial.println(gz, 6);
+#endif
   }
 }
@@ -0,0 +1,265 @@
+"""
+Multi-resolution aggregate pyramid over the W6 column store.
+
+For each level (1 s, 10 s, 1 min, 10 min by default) and each of x/y/z we keep,
+per time bucket: count, sum, sum of squares, min and max. Any time range can
+then be summarised by combining a handful of buckets. Coarse buckets cover the
+interior, finer ones the edges, and raw rows only cover the partial second at
+each end. So `compute_summary` costs the same for a one-minute page as for a
+whole day, and a zoomed-out graph is drawn from at most `max_points` buckets.
+
+The pyramid is built once per cache generation and saved next to the mapped
+columns (`<cache>/<gen>/pyramid.npz`). When the store grows (`ColumnStore.append`)
+`sync()` folds in only the new rows. Queries assume rows are in time order.
+The build checks this, and an unsorted store simply reports `usable = False`
+so callers fall back to raw rows.
+"""
+import os
+import threading
+
+import numpy as np
+
+from column_store import TIME_COL, VALUE_COLS
+
+LEVELS_S = (1, 10, 60, 600)
+STATS = ("count", "sum", "sumsq", "min", "max")
+NS = 1_000_000_000
+
+def _group(ids, parts):
+    """Combine rows/buckets that share an id. `parts` maps var -> dict of STATS arrays."""
+    if len(ids) and np.any(ids[1:] < ids[:-1]):
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        parts = {v: {k: a[order] for k, a in p.items()} for v, p in parts.items()}
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.empty(0, np.int64)
+    out = {}
+    for v, p in parts.items():
+        out[v] = {
+            "count": np.add.reduceat(p["count"], starts) if len(starts) else p["count"][:0],
+            "sum": np.add.reduceat(p["sum"], starts) if len(starts) else p["sum"][:0],
+            "sumsq": np.add.reduceat(p["sumsq"], starts) if len(starts) else p["sumsq"][:0],
+            "min": np.minimum.reduceat(p["min"], starts) if len(starts) else p["min"][:0],
+            "max": np.maximum.reduceat(p["max"], starts) if len(starts) else p["max"][:0],
+        }
+    return ids[starts], out
+
+def _row_parts(cols, start, stop):
+    parts = {}
+    for v in VALUE_COLS:
+        y = np.asarray(cols[v][start:stop], dtype=np.float64)
+        parts[v] = {"count": np.ones(len(y), np.int64), "sum": y, "sumsq": y * y, "min": y, "max": y}
+    return parts
+
+class Level:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.res = seconds * NS
+        self.ids = np.empty(0, np.int64)
+        self.stats = {v: {"count": np.empty(0, np.int64), **{k: np.empty(0) for k in STATS[1:]}}
+                      for v in VALUE_COLS}
+
+    def add(self, ids, parts):
+        """Merge already-grouped buckets (ids sorted) into this level."""
+        if not len(ids):
+            return
+        if len(self.ids) and ids[0] <= self.ids[-1]:
+            # Re-group only the tail that overlaps the new buckets (normally just the last one)
+            cut = int(np.searchsorted(self.ids, ids[0]))
+            ids = np.concatenate([self.ids[cut:], ids])
+            parts = {v: {k: np.concatenate([self.stats[v][k][cut:], parts[v][k]]) for k in STATS}
+                     for v in VALUE_COLS}
+            ids, parts = _group(ids, parts)
+        else:
+            cut = len(self.ids)
+        self.ids = np.concatenate([self.ids[:cut], ids])
+        for v in VALUE_COLS:
+            for k in STATS:
+                self.stats[v][k] = np.concatenate([self.stats[v][k][:cut], parts[v][k]])
+
+    def window(self, lo_id, hi_id):
+        """Index range of buckets with lo_id <= id < hi_id."""
+        return int(np.searchsorted(self.ids, lo_id)), int(np.searchsorted(self.ids, hi_id))
+
+class AggregatePyramid:
+    def __init__(self, store, levels=LEVELS_S):
+        self.store = store
+        self.level_s = tuple(sorted(levels))
+        self._lock = threading.RLock()  # the dashboard prefetches pages from a worker thread
+        self._reset()
+        self._load()
+        self.sync()
+
+    def _reset(self):
+        self.levels = [Level(s) for s in self.level_s]
+        self.rows = 0
+        self.usable = True
+        self.gen = self.store.meta.get("gen") if self.store.meta else None
+
+    def _path(self):
+        if self.store.cache_dir is None or not self.gen:
+            return None
+        return self.store.cache_dir / self.gen / "pyramid.npz"
+
+    def _load(self):
+        path = self._path()
+        if path is None or not path.exists():
+            return
+        try:
+            with np.load(path) as z:
+                if tuple(z["levels"]) != self.level_s:
+                    return
+                for i, lvl in enumerate(self.levels):
+                    lvl.ids = z[f"L{i}_ids"]
+                    for v in VALUE_COLS:
+                        for k in STATS:
+                            lvl.stats[v][k] = z[f"L{i}_{v}_{k}"]
+                self.rows = int(z["rows"])
+                self.usable = bool(z["usable"])
+        except (OSError, KeyError, ValueError):
+            self._reset()
+
+    def _save(self):
+        path = self._path()
+        if path is None:
+            return
+        arrays = {"levels": np.array(self.level_s), "rows": np.array(self.rows), "usable": np.array(self.usable)}
+        for i, lvl in enumerate(self.levels):
+            arrays[f"L{i}_ids"] = lvl.ids
+            for v in VALUE_COLS:
+                for k in STATS:
+                    arrays[f"L{i}_{v}_{k}"] = lvl.stats[v][k]
+        tmp = path.with_name(f"pyramid.{os.getpid()}.tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def sync(self):
+        """Fold rows appended since the last sync into every level. Returns rows added."""
+        with self._lock:
+            return self._sync()
+
+    def _sync(self):
+        gen = self.store.meta.get("gen") if self.store.meta else None
+        if gen != self.gen or self.store.rows < self.rows:
+            self._reset()
+            self._load()
+        start, stop = self.rows, self.store.rows
+        if stop <= start:
+            return 0
+        t = self.store.cols[TIME_COL]
+        new_t = np.asarray(t[start:stop])
+        if (start and new_t[0] < t[start - 1]) or np.any(new_t[1:] < new_t[:-1]):
+            self.usable = False
+        if self.usable:
+            # Finest level from raw rows, each coarser level from the one below it
+            ids, parts = _group(new_t // self.levels[0].res, _row_parts(self.store.cols, start, stop))
+            for i, lvl in enumerate(self.levels):
+                if i:
+                    ids, parts = _group(ids * self.levels[i - 1].res // lvl.res, parts)
+                lvl.add(ids, parts)
+        self.rows = stop
+        self._save()
+        return stop - start
+
+    # ---- queries ----
+
+    def _cover(self, lo, hi, li, acc):
+        """Add buckets covering [lo, hi) ns (aligned to the finest level) into acc."""
+        if hi <= lo:
+            return
+        lvl = self.levels[li]
+        a = -(-lo // lvl.res)
+        b = hi // lvl.res
+        if li and a >= b:
+            self._cover(lo, hi, li - 1, acc)
+            return
+        i, j = lvl.window(a, b)
+        for v in VALUE_COLS:
+            s = lvl.stats[v]
+            acc[v].append((s["count"][i:j].sum(), s["sum"][i:j].sum(), s["sumsq"][i:j].sum(),
+                           s["min"][i:j].min(initial=np.inf), s["max"][i:j].max(initial=-np.inf)))
+        if li:
+            self._cover(lo, a * lvl.res, li - 1, acc)
+            self._cover(b * lvl.res, hi, li - 1, acc)
+
+    def summary_rows(self, start, stop):
+        """count/mean/std/min/max of x, y, z over rows [start, stop), touching O(1) data."""
+        with self._lock:
+            return self._summary_rows(start, stop)
+
+    def _summary_rows(self, start, stop):
+        self.sync()
+        stop = min(stop, self.rows)
+        acc = {v: [] for v in VALUE_COLS}
+        if stop > start:
+            t = self.store.cols[TIME_COL]
+            res = self.levels[0].res
+            lo = (int(t[start]) // res + 1) * res     # first whole bucket strictly after row `start`
+            hi = int(t[stop - 1]) // res * res        # ...and before row `stop - 1`
+            if not self.usable or hi <= lo:
+                edges = [(start, stop)]
+            else:
+                a, b = int(np.searchsorted(t, lo)), int(np.searchsorted(t, hi))
+                self._cover(lo, hi, len(self.levels) - 1, acc)
+                edges = [(start, a), (b, stop)]
+            for r0, r1 in edges:
+                for v in VALUE_COLS:
+                    y = np.asarray(self.store.cols[v][r0:r1], dtype=np.float64)
+                    if len(y):
+                        acc[v].append((len(y), y.sum(), (y * y).sum(), y.min(), y.max()))
+        out = {}
+        for v, parts in acc.items():
+            n = sum(p[0] for p in parts)
+            if not n:
+                out[v] = (0, np.nan, np.nan, np.nan, np.nan)
+                continue
+            s = sum(p[1] for p in parts)
+            ss = sum(p[2] for p in parts)
+            mean = s / n
+            var = max(ss - s * mean, 0.0) / (n - 1) if n > 1 else np.nan
+            out[v] = (int(n), mean, np.sqrt(var), min(p[3] for p in parts), max(p[4] for p in parts))
+        return out
+
+    def envelope(self, t0, t1, max_points):
+        """Bucket times and per-var (mean, min, max) over [t0, t1) ns from the finest
+        level that needs at most `max_points` buckets. None if raw rows are needed."""
+        with self._lock:
+            return self._envelope(t0, t1, max_points)
+
+    def _envelope(self, t0, t1, max_points):
+        self.sync()
+        if not self.usable:
+            return None
+        for lvl in self.levels:
+            if (t1 - t0) / lvl.res <= max_points:
+                if lvl is self.levels[0] and (t1 - t0) / NS * self._rate() <= max_points:
+                    return None  # few enough raw rows to draw them directly
+                i, j = lvl.window(t0 // lvl.res, -(-t1 // lvl.res))
+                times = (lvl.ids[i:j] * lvl.res).astype("datetime64[ns]")
+                series = {}
+                for v in VALUE_COLS:
+                    s = lvl.stats[v]
+                    series[v] = (s["sum"][i:j] / s["count"][i:j], s["min"][i:j], s["max"][i:j])
+                return lvl.seconds, times, series
+        # Longer than max_points coarsest buckets: merge runs of `step` buckets
+        lvl = self.levels[-1]
+        i, j = lvl.window(t0 // lvl.res, -(-t1 // lvl.res))
+        step = max(1, -(-(j - i) // max_points))
+        starts = np.arange(0, j - i, step)
+        if not len(starts):
+            return lvl.seconds * step, np.empty(0, "datetime64[ns]"), {v: (np.empty(0),) * 3 for v in VALUE_COLS}
+        times = (lvl.ids[i:j][starts] * lvl.res).astype("datetime64[ns]")
+        series = {}
+        for v in VALUE_COLS:
+            s = lvl.stats[v]
+            n = np.add.reduceat(s["count"][i:j], starts)
+            series[v] = (np.add.reduceat(s["sum"][i:j], starts) / n,
+                         np.minimum.reduceat(s["min"][i:j], starts),
+                         np.maximum.reduceat(s["max"][i:j], starts))
+        return lvl.seconds * step, times, series
+
+    def _rate(self):
+        """Average rows per second, from the finest level."""
+        lvl = self.levels[0]
+        if not len(lvl.ids):
+            return 0.0
+        return self.rows / max(1, len(lvl.ids))
@@ -1,22 +1,40 @@
 import os
 import math
+import sys
+import numpy as np
 import pandas as pd
+from functools import lru_cache
+from pathlib import Path
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 from dash import Dash, dcc, html, Input, Output, State, dash_table, ctx, no_update
+from flask import jsonify, request
 import plotly.graph_objs as go
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.session_store import resolve
+from aggregates import AggregatePyramid
+from column_store import ColumnStore
+from downsample import decimate
+from figure_cache import cache_from_env
+from upload_ingest import UploadJob, describe, latest_status, receive, start_ingest
+
 # ---------- CONFIG ----------
 DEFAULT_CSV = os.environ.get("GYRO_CSV", "gyro_data.csv")
-DATE_COLS = ["time"]
-REQUIRED_COLS = ["time", "x", "y", "z"]
+# Line/scatter traces are decimated to about one point per pixel of graph width
+PLOT_WIDTH_PX = int(os.environ.get("GYRO_PLOT_WIDTH", "1600"))
+DOWNSAMPLE = os.environ.get("GYRO_DOWNSAMPLE", "minmax")   # minmax | lttb | none
+UPLOAD_DIR = os.environ.get("GYRO_UPLOAD_DIR", str(Path(DEFAULT_CSV).resolve().with_name(".w6_uploads")))
 
 app = Dash(__name__)
 app.title = "SIT225 Week 6 – Gyro Dashboard"
 server = app.server
 
-def load_csv(path: str) -> pd.DataFrame:
-    if not os.path.exists(path):
+def load_csv(path: str) -> ColumnStore:
+    # gyro_data.csv is read from gyro_data.parquet once it has been migrated.
+    # The first load converts it into a memory-mapped column cache that every
+    # worker shares; later starts only stat the source and map the cache.
+    if not resolve(path).exists():
         n = 1200
         t0 = pd.Timestamp.utcnow().floor("s")
         times = pd.date_range(t0, periods=n, freq="100L")  # 10 Hz
@@ -25,28 +43,19 @@ def load_csv(path: str) -> pd.DataFrame:
         y = np.cos(np.linspace(0, 20, n)) * 50 + np.random.normal(0, 2, n)
         z = np.sin(np.linspace(0, 40, n)) * 20 + np.random.normal(0, 1.5, n)
         df_demo = pd.DataFrame({"time": times, "x": x, "y": y, "z": z})
-        return df_demo
+        return ColumnStore.from_frame(df_demo)
 
-    try:
-        df = pd.read_csv(path)
-    except Exception:
-        df = pd.read_csv(path, parse_dates=DATE_COLS, infer_datetime_format=True)
-
-    # Normalize column names
-    df.columns = [c.strip().lower() for c in df.columns]
-    # Try to coerce time into datetime if not already
-    if "time" in df.columns:
-        try:
-            df["time"] = pd.to_datetime(df["time"], errors="coerce")
-        except Exception:
-            pass
-    # keep only required columns if present
-    keep = [c for c in REQUIRED_COLS if c in df.columns]
-    df = df[keep]
-    df = df.dropna().reset_index(drop=True)
-    return df
-
-df = load_csv(DEFAULT_CSV)
+    return ColumnStore(path)
+
+store = load_csv(DEFAULT_CSV)
+# 1 s / 10 s / 1 min / 10 min buckets over x/y/z, kept in sync as rows are appended
+pyramid = AggregatePyramid(store)
+# Finished page outputs (GYRO_CACHE=memory | disk:DIR | memcached:HOST:PORT)
+figure_cache = cache_from_env()
+
+def dataset_version():
+    # Same key in every worker: both change on each rebuild/append, whichever process did it
+    return (store.meta or {}).get("generation"), store.version
 
 def compute_summary(df_slice: pd.DataFrame) -> pd.DataFrame:
     # Return basic stats for x, y, z on the visible slice
@@ -68,6 +77,60 @@ def compute_summary(df_slice: pd.DataFrame) -> pd.DataFrame:
             out[col] = [None]*len(stats)
     return pd.DataFrame(out)
 
+def summary_from_pyramid(start: int, stop: int) -> pd.DataFrame:
+    """Same table as compute_summary, answered from pre-aggregated buckets."""
+    if not pyramid.usable:
+        return compute_summary(store.slice(start, stop))
+    agg = pyramid.summary_rows(start, stop)
+    out = {"stat": ["count", "mean", "std", "min", "max"]}
+    for col in ["x", "y", "z"]:
+        n, mean, std, lo, hi = agg[col]
+        out[col] = [n, mean, std, lo, hi] if n else [0, None, None, None, None]
+    return pd.DataFrame(out)
+
+def zoom_range(relayout) -> Optional[Tuple[int, int]]:
+    """(t0, t1) in ns from a graph's relayoutData, or None when not zoomed."""
+    if not relayout or relayout.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout:
+        lo, hi = relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    elif "xaxis.range" in relayout:
+        lo, hi = relayout["xaxis.range"]
+    else:
+        return None
+    try:
+        return pd.Timestamp(lo).value, pd.Timestamp(hi).value
+    except (TypeError, ValueError):
+        return None
+
+def make_zoom_fig(chart_type: str, vars_selected: List[str], t0: int, t1: int):
+    """Line/scatter figure for any time range: pyramid buckets when zoomed out, raw rows when zoomed in."""
+    fig = go.Figure()
+    mode = "lines" if chart_type == "line" else "markers"
+    env = pyramid.envelope(t0, t1, PLOT_WIDTH_PX)
+    if env is None:
+        times = store.cols["time"]
+        r0, r1 = int(np.searchsorted(times, t0)), int(np.searchsorted(times, t1, side="right"))
+        page = store.slice(r0, r1)
+        t = page["time"].to_numpy()
+        for v in vars_selected:
+            idx = decimate(t.view("int64"), page[v].to_numpy(), PLOT_WIDTH_PX, DOWNSAMPLE)
+            fig.add_trace(go.Scatter(x=t[idx], y=page[v].to_numpy()[idx], mode=mode, name=v))
+        title = f"raw samples ({r1 - r0})"
+    else:
+        bucket_s, t, series = env
+        for v in vars_selected:
+            mean, lo, hi = series[v]
+            fig.add_trace(go.Scatter(x=t, y=hi, mode="lines", line={"width": 0}, showlegend=False,
+                                     hoverinfo="skip", legendgroup=v))
+            fig.add_trace(go.Scatter(x=t, y=lo, mode="lines", line={"width": 0}, fill="tonexty",
+                                     opacity=0.3, name=f"{v} min/max", legendgroup=v))
+            fig.add_trace(go.Scatter(x=t, y=mean, mode=mode, name=v, legendgroup=v))
+        title = f"{bucket_s} s buckets ({len(t)})"
+    fig.update_layout(title=title, xaxis_title="time", yaxis_title="value", hovermode="x unified",
+                      xaxis={"range": [pd.Timestamp(t0), pd.Timestamp(t1)]})
+    return fig
+
 GRAPH_TYPES = [
     {"label": "Line", "value": "line"},
     {"label": "Scatter (vs time)", "value": "scatter"},
@@ -82,10 +145,10 @@ VAR_OPTIONS = [{"label": "x", "value": "x"},
 
 app.layout = html.Div([
     html.H2("SIT225 Week 6 – Plotly Dash: Gyroscope (x, y, z)"),
-    html.Div(f"Loaded CSV: {DEFAULT_CSV} | Total samples: {len(df)}"),
+    html.Div(f"Loaded CSV: {DEFAULT_CSV} | Total samples: {len(store)}"),
     dcc.Store(id="current-page", data=0),
     dcc.Store(id="page-size", data=500),
-    dcc.Store(id="cached-csv-size", data=len(df)),
+    dcc.Store(id="cached-csv-size", data=len(store)),
 
     html.Hr(),
     html.Div([
@@ -141,25 +204,46 @@ app.layout = html.Div([
         style_header={"fontWeight": "bold"}
     ),
     html.Div(id="page-info", style={"marginTop": "8px", "fontStyle": "italic"}),
+    html.Div(id="upload-started", style={"marginTop": "8px"}),
+    html.Div(id="upload-progress", style={"fontStyle": "italic"}),
+    dcc.Interval(id="upload-poll", interval=1000, n_intervals=0),
 ])
 
-def get_slice(df: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
-    total = len(df)
+def get_slice(store: ColumnStore, page: int, page_size: int) -> pd.DataFrame:
+    # Zero-copy view over the mapped columns
     start = max(0, page * page_size)
-    end = min(total, start + page_size)
-    return df.iloc[start:end].reset_index(drop=True)
+    return store.slice(start, start + page_size)
+
+@lru_cache(maxsize=256)
+def decimated_page(version: int, start: int, stop: int, var: str, n_out: int, method: str):
+    """(time, values) of one variable over rows [start, stop), reduced to ~n_out points."""
+    page = store.slice(start, stop)
+    t = page["time"].to_numpy()
+    y = page[var].to_numpy()
+    idx = decimate(t.view("int64"), y, n_out, method)
+    return t[idx], y[idx]
 
-def make_fig(chart_type: str, df_slice: pd.DataFrame, vars_selected: List[str]) -> go.Figure:
+def make_fig(chart_type: str, df_slice: pd.DataFrame, vars_selected: List[str],
+             page: Optional[Tuple[int, int]] = None) -> go.Figure:
     fig = go.Figure()
     if df_slice.empty or not vars_selected:
         fig.update_layout(title="No data to display")
         return fig
 
     if chart_type in ("line", "scatter"):
+        mode = "lines" if chart_type == "line" else "markers"
+        shown = 0
         for v in vars_selected:
-            mode = "lines" if chart_type == "line" else "markers"
-            fig.add_trace(go.Scatter(x=df_slice["time"], y=df_slice[v], mode=mode, name=v))
-        fig.update_layout(xaxis_title="time", yaxis_title="value")
+            if page is not None:
+                t, y = decimated_page(store.version, page[0], page[1], v, PLOT_WIDTH_PX, DOWNSAMPLE)
+            else:
+                idx = decimate(df_slice["time"].to_numpy().view("int64"), df_slice[v].to_numpy(),
+                               PLOT_WIDTH_PX, DOWNSAMPLE)
+                t, y = df_slice["time"].to_numpy()[idx], df_slice[v].to_numpy()[idx]
+            shown = max(shown, len(y))
+            fig.add_trace(go.Scatter(x=t, y=y, mode=mode, name=v))
+        title = f"{shown} of {len(df_slice)} points ({DOWNSAMPLE})" if shown < len(df_slice) else None
+        fig.update_layout(xaxis_title="time", yaxis_title="value", title=title)
     elif chart_type == "hist":
         for v in vars_selected:
             fig.add_trace(go.Histogram(x=df_slice[v], name=v, opacity=0.75))
@@ -176,6 +260,14 @@ def make_fig(chart_type: str, df_slice: pd.DataFrame, vars_selected: List[str])
     fig.update_layout(hovermode="x unified")
     return fig
 
+def render_page(page: int, page_size: int, chart_type: str, vars_key: Tuple[str, ...]):
+    """(figure dict, summary records, rows shown) for one page; cached by update_graph."""
+    df_slice = get_slice(store, page, page_size)
+    start = page * page_size
+    fig = make_fig(chart_type, df_slice, list(vars_key), page=(start, start + len(df_slice)))
+    summary = summary_from_pyramid(start, start + len(df_slice)).round(3).to_dict("records")
+    return fig.to_dict(), summary, len(df_slice)
+
 # ---------- Callbacks ----------
 
 @app.callback(
@@ -190,11 +282,14 @@ def make_fig(chart_type: str, df_slice: pd.DataFrame, vars_selected: List[str])
     Input("prev-btn", "n_clicks"),
     Input("next-btn", "n_clicks"),
     Input("goto-page", "value"),
+    Input("main-graph", "relayoutData"),
+    Input("cached-csv-size", "data"),
     State("current-page", "data"),
     State("page-size", "data"),
 )
-def update_graph(chart_type, vars_selected, samples_value, n_prev, n_next, goto_page, cur_page, cur_size):
-    global df
+def update_graph(chart_type, vars_selected, samples_value, n_prev, n_next, goto_page, relayout, n_rows,
+                 cur_page, cur_size):
+    store.refresh()  # stat check: picks up a rebuilt or appended cache
     trigger = ctx.triggered_id
     page = cur_page or 0
     page_size = cur_size or 500
@@ -209,44 +304,99 @@ def update_graph(chart_type, vars_selected, samples_value, n_prev, n_next, goto_
     elif trigger == "goto-page" and isinstance(goto_page, int) and goto_page >= 0:
         page = goto_page
 
-    max_page = max(0, math.ceil(len(df) / page_size) - 1)
+    max_page = max(0, math.ceil(len(store) / page_size) - 1)
     page = min(page, max_page)
 
-    df_slice = get_slice(df, page, page_size)
-    fig = make_fig(chart_type or "line", df_slice, vars_selected or ["x", "y", "z"])
-    summary = compute_summary(df_slice).round(3).to_dict("records")
-    info = f"Page {page} / {max_page} | showing {len(df_slice)} of {len(df)} samples (page size = {page_size})"
+    # Zoom/pan on a line or scatter chart: answer the visible time range from the pyramid
+    zoom = zoom_range(relayout) if trigger == "main-graph" else None
+    if zoom and (chart_type or "line") in ("line", "scatter") and len(store):
+        t0, t1 = zoom
+        times = store.cols["time"]
+        r0, r1 = int(np.searchsorted(times, t0)), int(np.searchsorted(times, t1, side="right"))
+        fig = make_zoom_fig(chart_type or "line", vars_selected or ["x", "y", "z"], t0, t1)
+        summary = summary_from_pyramid(r0, r1).round(3).to_dict("records")
+        info = (f"Zoom {pd.Timestamp(t0)} – {pd.Timestamp(t1)} | {r1 - r0} of {len(store)} samples "
+                f"(double-click the graph to return to page {page})")
+        return fig, summary, page, page_size, info
+    if trigger == "main-graph" and not (relayout or {}).get("xaxis.autorange"):
+        return no_update, no_update, no_update, no_update, no_update
+
+    chart_type = chart_type or "line"
+    vars_key = tuple(vars_selected or ["x", "y", "z"])
+    version = dataset_version()
+    fig, summary, shown = figure_cache.get_or_compute(
+        (version, page, page_size, chart_type, vars_key),
+        lambda: render_page(page, page_size, chart_type, vars_key))
+    # Prev/Next are the likely next clicks: build them in the background
+    figure_cache.prefetch(
+        ((version, p, page_size, chart_type, vars_key),
+         lambda p=p: render_page(p, page_size, chart_type, vars_key))
+        for p in (page + 1, page - 1) if 0 <= p <= max_page)
+    info = f"Page {page} / {max_page} | showing {shown} of {len(store)} samples (page size = {page_size})"
     return fig, summary, page, page_size, info
 
-@app.callback(
-    Output("cached-csv-size", "data"),
+# ---------- Upload ----------
+# The browser posts the raw file to /upload (no base64 round trip through a
+# callback); the server streams it to disk and appends it to the column store
+# on a background thread while the page polls for progress.
+
+app.clientside_callback(
+    """
+    function(contents, filename) {
+        if (!contents) { return window.dash_clientside.no_update; }
+        fetch(contents)
+            .then(function(r) { return r.blob(); })
+            .then(function(blob) {
+                return fetch("/upload?filename=" + encodeURIComponent(filename || "upload.csv"),
+                             {method: "POST", body: blob});
+            });
+        return "Sending " + filename + " ...";
+    }
+    """,
+    Output("upload-started", "children"),
     Input("upload-data", "contents"),
-    State("upload-data", "filename")
+    State("upload-data", "filename"),
 )
-def upload_csv(contents, filename):
-    global df
-    if contents is None:
-        return len(df)
-    import base64, io
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    try:
-        new_df = pd.read_csv(io.StringIO(decoded.decode("utf-8")))
-    except Exception:
-        new_df = pd.read_csv(io.BytesIO(decoded))
-    new_df.columns = [c.strip().lower() for c in new_df.columns]
-    if "time" in new_df.columns:
-        try:
-            new_df["time"] = pd.to_datetime(new_df["time"], errors="coerce")
-        except Exception:
-            pass
-    df = new_df.dropna().reset_index(drop=True)
-    # Persist
+
+def on_rows_appended(rows):
+    decimated_page.cache_clear()
+
+@server.route("/upload", methods=["POST", "PUT"])
+def upload_stream():
+    job = UploadJob(UPLOAD_DIR, request.args.get("filename", "upload.csv"))
     try:
-        df.to_csv(DEFAULT_CSV, index=False)
-    except Exception:
-        pass
-    return len(df)
+        receive(job, request.stream, request.content_length)
+    except Exception as e:
+        job.update(state="error", error=str(e))
+        return jsonify(job.status), 500
+    if store.source is not None:
+        start_ingest(job, store, on_chunk=on_rows_appended)
+        return jsonify(job.status), 202
+
+    # Replacing the demo data: rows go to DEFAULT_CSV (created by the first chunk).
+    # The new store is published only once it holds that chunk, so callbacks never see it empty.
+    target = ColumnStore(DEFAULT_CSV)
+
+    def on_chunk(rows):
+        global store, pyramid
+        if store is not target:
+            new_pyramid = AggregatePyramid(target)
+            store, pyramid = target, new_pyramid
+        on_rows_appended(rows)
+
+    start_ingest(job, target, on_chunk=on_chunk)
+    return jsonify(job.status), 202
+
+@app.callback(
+    Output("upload-progress", "children"),
+    Output("cached-csv-size", "data"),
+    Input("upload-poll", "n_intervals"),
+    State("cached-csv-size", "data"),
+)
+def upload_progress(n, known_rows):
+    store.refresh()  # rows appended by another worker's upload
+    rows = len(store)
+    return describe(latest_status(UPLOAD_DIR)), (rows if rows != known_rows else no_update)
 
 if __name__ == "__main__":
     app.run_server(debug=True)
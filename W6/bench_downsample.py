@@ -0,0 +1,59 @@
+"""
+Benchmark: raw vs decimated line traces in the W6 dashboard.
+
+For several page sizes it times building the x/y/z figure and serialising it
+to JSON (what the Dash callback sends to the browser), and reports the
+payload size and whether the page's global min/max survived decimation.
+
+    python W6/bench_downsample.py --sizes 10000 100000 1000000 --width 1600
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from downsample import decimate
+
+def make_page(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = pd.Timestamp("2025-09-28T08:00:00") + pd.to_timedelta(np.arange(n) * 10, unit="ms")
+    base = np.sin(np.linspace(0, 60, n))[:, None] * [50, 40, 20]
+    xyz = base + rng.normal(0, 2, (n, 3))
+    # a few narrow spikes, the kind of thing decimation must not hide
+    spikes = rng.choice(n, 5, replace=False)
+    xyz[spikes, 0] += 400
+    return pd.DataFrame({"time": t, "x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2]})
+
+def figure_json(page, width, method):
+    t = page["time"].to_numpy()
+    fig = go.Figure()
+    for v in ("x", "y", "z"):
+        y = page[v].to_numpy()
+        idx = decimate(t.view("int64"), y, width, method)
+        fig.add_trace(go.Scatter(x=t[idx], y=y[idx], mode="lines", name=v))
+    return fig.to_json(), fig
+
+def main():
+    ap = argparse.ArgumentParser(description="Payload size and latency of decimated traces")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--width", type=int, default=1600, help="Target points per trace")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'page rows':>10} {'method':>7} {'payload KB':>11} {'latency ms':>11} {'peaks kept':>11}")
+    for n in args.sizes:
+        page = make_page(n)
+        for method in ("none", "minmax", "lttb"):
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                payload, fig = figure_json(page, args.width, method)
+                best = min(best, time.perf_counter() - t0)
+            kept = all(np.isclose(max(tr.y), page[tr.name].max()) and np.isclose(min(tr.y), page[tr.name].min())
+                       for tr in fig.data)
+            print(f"{n:>10} {method:>7} {len(payload) / 1024:>11.0f} {1000 * best:>11.1f} {str(kept):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Memory-mapped column cache for the W6 dashboard.
+
+app.py used to pd.read_csv the whole session into a global DataFrame at
+import time, and every gunicorn worker held its own copy. `ColumnStore`
+converts the source (CSV or Parquet, via shared.session_store) once into
+raw little-endian column files and memory-maps them read-only, so all
+workers share the same page-cache pages and a page of the dashboard is a
+zero-copy view:
+
+    <dir>/.gyro_data.csv.cache/
+        current.json          which generation is live, its row count, source stat, version
+        g<n>/time.i8          int64 ns since epoch (UTC if the source had a tz)
+        g<n>/x.f8 y.f8 z.f8   float64
+
+`refresh()` is a cheap stat check: if the source's size/mtime no longer match
+the ones recorded in current.json the cache is rebuilt into a new generation
+directory and current.json is atomically replaced. Other workers notice the
+new current.json on their next refresh and remap.
+
+`append` writes new rows to the source first (a CSV append, or a new part in
+a Parquet dataset), so they survive restarts and later rebuilds. It then adds
+them to the live generation in place and records the new source stat, which
+bumps `version` without a rebuild. The columns are always in time order. Rows
+that start before the cached data ends, or a cache that no longer matches
+the source, trigger a (sorted) rebuild from the source instead.
+"""
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.session_store import load_frame, resolve, write_session
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are not serialised across processes
+    fcntl = None
+
+TIME_COL = "time"
+VALUE_COLS = ("x", "y", "z")
+DTYPES = {TIME_COL: np.dtype("<i8"), **{c: np.dtype("<f8") for c in VALUE_COLS}}
+SUFFIX = {TIME_COL: ".i8", **{c: ".f8" for c in VALUE_COLS}}
+
+def normalize(df):
+    """Lower-case names, parsed UTC-naive time, float x/y/z, no NaN rows."""
+    df = df.copy()
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    keep = [c for c in (TIME_COL,) + VALUE_COLS if c in df.columns]
+    df = df[keep]
+    if TIME_COL in df.columns:
+        t = df[TIME_COL]
+        if not pd.api.types.is_datetime64_any_dtype(t):
+            t = pd.to_datetime(t, errors="coerce", format="ISO8601")
+        if getattr(t.dt, "tz", None) is not None:
+            t = t.dt.tz_convert("UTC").dt.tz_localize(None)
+        df[TIME_COL] = t.astype("datetime64[ns]")
+    for c in VALUE_COLS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    return df.dropna().reset_index(drop=True)
+
+class _Lock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.f = open(self.path, "a+")
+        if fcntl:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+class ColumnStore:
+    def __init__(self, source, cache_dir=None):
+        self.source = Path(source)
+        self.cache_dir = Path(cache_dir) if cache_dir else \
+            self.source.with_name(f".{self.source.name}.cache")
+        self.meta = None
+        self.cols = {c: np.empty(0, DTYPES[c]) for c in DTYPES}   # until there is data to map
+        self._meta_stat = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @classmethod
+    def from_frame(cls, df):
+        """In-memory store (no cache files), e.g. for the demo data when there is no CSV."""
+        self = cls.__new__(cls)
+        self.source = None
+        self.cache_dir = None
+        self._meta_stat = None
+        self._lock = threading.Lock()
+        df = normalize(df)
+        self.cols = {c: df[c].to_numpy() for c in (TIME_COL,) + VALUE_COLS}
+        self.cols[TIME_COL] = self.cols[TIME_COL].view("<i8")
+        self.meta = {"rows": len(df), "version": 0, "gen": None}
+        return self
+
+    # ---- state ----
+
+    @property
+    def rows(self):
+        return self.meta["rows"] if self.meta else 0
+
+    @property
+    def version(self):
+        return self.meta["version"] if self.meta else 0
+
+    def __len__(self):
+        return self.rows
+
+    def _source_stat(self):
+        src = resolve(self.source)
+        if not src.exists():
+            return None
+        st = src.stat() if src.is_file() else max((p.stat() for p in src.rglob("*.parquet")),
+                                                   key=lambda s: s.st_mtime_ns)
+        return {"path": str(src), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def _read_meta(self):
+        try:
+            return json.loads((self.cache_dir / "current.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        tmp = self.cache_dir / f"current.json.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.cache_dir / "current.json")
+
+    def _map(self, meta):
+        gen = self.cache_dir / meta["gen"]
+        n = meta["rows"]
+        self.cols = {c: (np.memmap(gen / (c + SUFFIX[c]), dtype=DTYPES[c], mode="r", shape=(n,))
+                         if n else np.empty(0, DTYPES[c])) for c in DTYPES}
+        self.meta = meta
+
+    def refresh(self):
+        """Stat check; rebuild or remap if the source or cache changed. Returns True if it did."""
+        if self.source is None:
+            return False
+        with self._lock:
+            try:
+                st = (self.cache_dir / "current.json").stat()
+                meta_stat = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                meta_stat = None
+            src = self._source_stat()
+            if meta_stat is not None and meta_stat == self._meta_stat and \
+                    (src is None or src == self.meta.get("source")):
+                return False
+            meta = self._read_meta()
+            if src is not None and (meta is None or meta.get("source") != src):
+                meta = self._rebuild(src)
+            if meta is None:
+                return False
+            self._map(meta)
+            st = (self.cache_dir / "current.json").stat()
+            self._meta_stat = (st.st_mtime_ns, st.st_size)
+            return True
+
+    def _rebuild(self, src):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with _Lock(self.cache_dir / ".lock"):
+            meta = self._read_meta()
+            if meta is not None and meta.get("source") == src:
+                return meta  # another worker built it while we waited
+            return self._build(src, meta)
+
+    def _build(self, src, old):
+        """Convert the source into a new generation and make it current (caller holds the file lock)."""
+        old = old or {}
+        gen = f"g{old.get('generation', 0) + 1}"
+        tmp = self.cache_dir / f"{gen}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        df = normalize(load_frame(src["path"])).sort_values(TIME_COL, kind="stable")
+        self._write_columns(tmp, df, "wb")
+        os.replace(tmp, self.cache_dir / gen)
+        meta = {"gen": gen, "generation": old.get("generation", 0) + 1, "rows": len(df),
+                "version": old.get("version", 0) + 1, "source": src}
+        self._write_meta(meta)
+        for p in self.cache_dir.glob("g*"):
+            if p.name != gen and p.is_dir():
+                shutil.rmtree(p, ignore_errors=True)
+        return meta
+
+    @staticmethod
+    def _write_columns(gen_dir, df, mode):
+        for c in DTYPES:
+            arr = df[c].to_numpy()
+            if c == TIME_COL:
+                arr = arr.astype("datetime64[ns]").view("<i8")
+            with open(gen_dir / (c + SUFFIX[c]), mode) as f:
+                f.write(np.ascontiguousarray(arr, dtype=DTYPES[c]).tobytes())
+
+    def _persist(self, df):
+        """Add normalized rows to the source: a CSV append, or a new part of a Parquet dataset."""
+        src = resolve(self.source)
+        if src.suffix.lower() == ".parquet":
+            if src.is_file():   # a single Parquet file can't be appended to
+                pd.concat([normalize(load_frame(src)), df]).to_parquet(src, index=False)
+            else:
+                write_session(df, src, time_col=TIME_COL, float32=False, append=True)
+            return
+        header, aware = None, True   # new files get UTC offsets, as serial_logger.py writes them
+        if src.exists() and src.stat().st_size:
+            head = pd.read_csv(src, nrows=1, dtype=str)
+            header = list(head.columns)
+            time_name = next((c for c in header if str(c).strip().lower() == TIME_COL), None)
+            if time_name is not None and len(head):
+                # Match the existing rows: pandas won't parse a column mixing naive and tz-aware times
+                aware = re.search(r"(Z|[+-]\d\d:?\d\d)$", str(head[time_name].iat[0]).strip()) is not None
+            with open(src, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                missing_newline = f.read(1) != b"\n"
+            if missing_newline:
+                with open(src, "ab") as f:
+                    f.write(b"\n")
+        out = df.copy()
+        out[TIME_COL] = out[TIME_COL].dt.strftime("%Y-%m-%dT%H:%M:%S.%f" + ("+00:00" if aware else ""))
+        if header is not None:
+            out = out.rename(columns={str(c).strip().lower(): c for c in header}).reindex(columns=header)
+        out.to_csv(src, mode="a", header=header is None, index=False)
+
+    def _last_time(self, meta):
+        if not meta["rows"]:
+            return None
+        path = self.cache_dir / meta["gen"] / (TIME_COL + SUFFIX[TIME_COL])
+        return int(np.fromfile(path, DTYPES[TIME_COL], count=1, offset=(meta["rows"] - 1) * 8)[0])
+
+    def append(self, df):
+        """Append rows to the source and the live generation. Returns rows added."""
+        df = normalize(df).sort_values(TIME_COL, kind="stable").reset_index(drop=True)
+        if not len(df):
+            return 0
+        first = int(df[TIME_COL].iat[0].value)
+        if self.source is None:
+            for c in DTYPES:
+                add = df[c].to_numpy().astype("datetime64[ns]").view("<i8") if c == TIME_COL else df[c].to_numpy()
+                self.cols[c] = np.concatenate([self.cols[c], add])
+            t = self.cols[TIME_COL]
+            if self.meta["rows"] and first < t[self.meta["rows"] - 1]:
+                order = np.argsort(t, kind="stable")
+                self.cols = {c: a[order] for c, a in self.cols.items()}
+            self.meta["rows"] += len(df)
+            self.meta["version"] += 1
+            return len(df)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with _Lock(self.cache_dir / ".lock"):
+            before = self._source_stat()
+            meta = self._read_meta()
+            self._persist(df)
+            src = self._source_stat()
+            last = self._last_time(meta) if meta is not None else None
+            if meta is None or meta.get("source") != before or (last is not None and first < last):
+                # Stale cache, or rows that belong before its end: rebuild, sorted, from the source
+                self._build(src, meta)
+            else:
+                gen_dir = self.cache_dir / meta["gen"]
+                for c in DTYPES:
+                    # Drop anything past the committed row count (a crashed append) before adding
+                    with open(gen_dir / (c + SUFFIX[c]), "ab") as f:
+                        f.truncate(meta["rows"] * DTYPES[c].itemsize)
+                self._write_columns(gen_dir, df, "ab")
+                self._write_meta(dict(meta, rows=meta["rows"] + len(df), version=meta["version"] + 1, source=src))
+        self.refresh()
+        return len(df)
+
+    # ---- reading ----
+
+    def times(self, start=0, stop=None):
+        return self.cols[TIME_COL][start:stop].view("datetime64[ns]")
+
+    def slice(self, start, stop):
+        """Rows [start, stop) as a DataFrame over the mapped columns (no copy)."""
+        start = max(0, start)
+        stop = min(self.rows, stop)
+        data = {TIME_COL: self.times(start, stop)}
+        data.update({c: self.cols[c][start:stop] for c in VALUE_COLS})
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,91 @@
+"""
+Server-side decimation for the W6 line/scatter charts.
+
+A graph can only show about one point per horizontal pixel, so sending a
+100k-sample page to the browser just inflates the JSON and stalls Plotly.
+Two vectorised reducers pick which samples to keep:
+
+- `minmax_indices`: split the series into n_out/2 equal buckets and keep the
+  min and the max of each (in time order). Every peak and trough survives,
+  which is what matters for gyro spikes.
+- `lttb_indices`: Largest-Triangle-Three-Buckets. Keeps the point in each bucket
+  that forms the largest triangle with the previously kept point and the next
+  bucket's mean. Visually closer to the raw line, but a bucket's second
+  extreme can be lost. Min-max preselection (4 candidates per bucket) keeps the
+  per-bucket loop short, so this costs O(n) numpy work plus O(n_out) Python.
+
+    idx = decimate(t_ns, y, n_out=2000, method="minmax")
+    fig.add_trace(go.Scatter(x=t[idx], y=y[idx]))
+"""
+import numpy as np
+
+METHODS = ("minmax", "lttb", "none")
+
+def _bucket_edges(n, buckets):
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max of each of n_out // 2 equal-width buckets, sorted."""
+    y = np.asarray(y)
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    per = n // buckets
+    body = buckets * per
+    # Equal-size buckets over the first `body` samples; the short tail becomes its own bucket
+    blocks = y[:body].reshape(buckets, per)
+    base = np.arange(buckets) * per
+    lo = base + np.nanargmin(blocks, axis=1)
+    hi = base + np.nanargmax(blocks, axis=1)
+    idx = [lo, hi]
+    if body < n:
+        tail = y[body:]
+        idx.append(np.array([body + np.nanargmin(tail), body + np.nanargmax(tail)]))
+    return np.unique(np.concatenate(idx))
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets over (x, y); always keeps the first and last point."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    # Candidate reduction: min/max of 2 * n_out sub-buckets keeps all extremes
+    cand = minmax_indices(y, 4 * n_out) if n > 8 * n_out else np.arange(n)
+    cx, cy = x[cand], y[cand]
+    m = len(cand)
+    edges = _bucket_edges(m - 2, n_out - 2) + 1
+    # Mean of each bucket, computed once (vectorised) for the "next bucket" term
+    csum_x = np.concatenate([[0.0], np.cumsum(cx)])
+    csum_y = np.concatenate([[0.0], np.cumsum(cy)])
+    counts = np.maximum(edges[1:] - edges[:-1], 1)
+    mean_x = (csum_x[edges[1:]] - csum_x[edges[:-1]]) / counts
+    mean_y = (csum_y[edges[1:]] - csum_y[edges[:-1]]) / counts
+    mean_x = np.append(mean_x, cx[-1])
+    mean_y = np.append(mean_y, cy[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, m - 1
+    a = 0
+    for i in range(n_out - 2):
+        s, e = edges[i], edges[i + 1]
+        if e <= s:
+            out[i + 1] = s
+            continue
+        bx, by = cx[s:e], cy[s:e]
+        area = np.abs((cx[a] - mean_x[i + 1]) * (by - cy[a]) - (cx[a] - bx) * (mean_y[i + 1] - cy[a]))
+        a = s + int(np.argmax(area))
+        out[i + 1] = a
+    return cand[np.unique(out)]
+
+def decimate(x, y, n_out, method="minmax"):
+    """Indices to keep so that at most ~n_out points are drawn for (x, y)."""
+    n = len(y)
+    if method == "none" or not n_out or n <= n_out:
+        return np.arange(n)
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    raise ValueError(f"unknown decimation method {method!r} (choose from {', '.join(METHODS)})")
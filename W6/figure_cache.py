@@ -0,0 +1,249 @@
+"""
+Memoised callback outputs for the W6 dashboard.
+
+Every Prev/Next click used to rebuild the slice, the figure and the summary
+table, even for a page the user had just looked at. `FigureCache` stores the
+finished outputs under (dataset version, page, page size, chart type, vars).
+The dataset version changes whenever the data does (upload, rebuild, append),
+so stale entries are never served. They just age out.
+
+Backends (chosen with GYRO_CACHE):
+  memory                 per-process LRU bounded by GYRO_CACHE_MB (default)
+  disk:/path/to/dir      pickles in a directory shared by all gunicorn workers,
+                         LRU by file mtime, bounded by GYRO_CACHE_MB
+  memcached:host:port    any memcached-compatible server (needs pymemcache)
+
+Shared backends sit behind a small per-process memory LRU, so a worker's own
+repeat hits don't pay for unpickling. `prefetch()` computes pages in a
+background thread so that the next Prev/Next is usually a hit.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+def approx_size(obj):
+    """Rough in-memory size in bytes of a figure dict / records list."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + 100
+    if isinstance(obj, dict):
+        return 64 + sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return 56 + sum(approx_size(v) for v in obj)
+    if isinstance(obj, (str, bytes)):
+        return 49 + len(obj)
+    return 32
+
+class MemoryLRU:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.items.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.items.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key, value, size=None):
+        size = approx_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.items[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, s) = self.items.popitem(last=False)
+                self.bytes -= s
+                self.stats["evictions"] += 1
+
+    def __contains__(self, key):
+        return key in self.items
+
+class DiskCache:
+    """Pickles in a shared directory; LRU by mtime, trimmed to max_bytes."""
+
+    def __init__(self, directory, max_bytes, trim_every=32):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.trim_every = trim_every
+        self._writes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key):
+        return self.dir / (hashlib.sha1(repr(key).encode()).hexdigest() + ".pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.stats["misses"] += 1
+            return None
+        if stored_key != key:
+            self.stats["misses"] += 1
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, key, value, size=None):
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._writes += 1
+        if self._writes % self.trim_every == 0:
+            self.trim()
+
+    def trim(self):
+        files = []
+        for p in self.dir.glob("*.pkl"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        total = sum(s for _, s, _ in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+                self.stats["evictions"] += 1
+            except OSError:
+                pass
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+class MemcacheBackend:
+    """memcached-compatible server via pymemcache; entries over the item limit are skipped."""
+
+    def __init__(self, server, expire_s=3600, max_item=1_000_000):
+        try:
+            from pymemcache.client.base import Client
+        except ImportError:
+            raise SystemExit("GYRO_CACHE=memcached needs pymemcache: pip install pymemcache")
+        host, _, port = server.partition(":")
+        self.client = Client((host, int(port or 11211)), connect_timeout=1, timeout=1)
+        self.expire_s = expire_s
+        self.max_item = max_item
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(key):
+        return "w6:" + hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception:
+            raw = None
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+        stored_key, value = pickle.loads(raw)
+        if stored_key != key:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, key, value, size=None):
+        raw = pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        if len(raw) <= self.max_item:
+            try:
+                self.client.set(self._key(key), raw, expire=self.expire_s)
+            except Exception:
+                pass
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+class FigureCache:
+    def __init__(self, shared=None, local_bytes=64 << 20):
+        self.local = MemoryLRU(local_bytes)
+        self.shared = shared
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="w6-prefetch")
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self.stats = {"computed": 0, "prefetched": 0, "compute_s": 0.0}
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            t0 = time.perf_counter()
+            value = compute()
+            self.stats["computed"] += 1
+            self.stats["compute_s"] += time.perf_counter() - t0
+            self.set(key, value)
+        return value
+
+    def prefetch(self, jobs):
+        """jobs: iterable of (key, compute). Computes missing ones in the background."""
+        for key, compute in jobs:
+            with self._lock:
+                if key in self._inflight or key in self.local:
+                    continue
+                self._inflight.add(key)
+            self.pool.submit(self._prefetch_one, key, compute)
+
+    def _prefetch_one(self, key, compute):
+        try:
+            if self.get(key) is None:
+                self.set(key, compute())
+                self.stats["prefetched"] += 1
+        except Exception as e:
+            print(f"[cache] prefetch failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+def cache_from_env():
+    spec = os.environ.get("GYRO_CACHE", "memory")
+    max_bytes = int(float(os.environ.get("GYRO_CACHE_MB", "256")) * (1 << 20))
+    kind, _, arg = spec.partition(":")
+    if kind == "memory":
+        return FigureCache(None, local_bytes=max_bytes)
+    if kind == "disk":
+        return FigureCache(DiskCache(arg or ".w6_cache", max_bytes))
+    if kind == "memcached":
+        return FigureCache(MemcacheBackend(arg or "127.0.0.1:11211"))
+    raise SystemExit(f"Unknown GYRO_CACHE {spec!r} (memory | disk:DIR | memcached:HOST:PORT)")
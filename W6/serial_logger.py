@@ -1,13 +1,20 @@
 import argparse, csv, sys, time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
 import serial
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.binary_frames import BinaryFrameReader
+from shared.serial_ingest import ChunkedLineReader, make_parser
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--port", required=True)
     p.add_argument("--baud", type=int, default=115200)
     p.add_argument("--outfile", default="gyro_data.csv")
     p.add_argument("--minutes", type=float, default=12.0, help="how long to log")
+    p.add_argument("--binary", action="store_true", help="board sends binary frames (see shared/binary_frames.py)")
     args = p.parse_args()
 
     ser = serial.Serial(args.port, args.baud, timeout=1)
@@ -21,26 +28,33 @@ def main():
         w = csv.writer(f)
         w.writerow(["time", "x", "y", "z"])
         print(f"Logging to {args.outfile} for {args.minutes} minutes...")
+        if args.binary:
+            parser = BinaryFrameReader(ser)
+        else:
+            reader = ChunkedLineReader(ser)
+            parser = make_parser("xyz_ms")   # "ms_since_start,x,y,z"
         while time.time() < end:
-            line = ser.readline().decode(errors="ignore").strip()
-            if not line or line.startswith("time"):
-                continue
-            parts = line.split(",")
-            if len(parts) != 4:
-                continue
-            try:
-                # Convert ms_since_start to an ISO time relative to now
-                ms_since = float(parts[0])
-                timestamp = datetime.now(timezone.utc)
-                x = float(parts[1]); y = float(parts[2]); z = float(parts[3])
-            except Exception:
+            if args.binary:
+                frames = parser.read_frames()
+                # float32 on the wire; round like the ASCII sketch (6 decimals)
+                rows = np.column_stack((frames["t_ms"], frames["x"], frames["y"], frames["z"])).round(6)
+            else:
+                rows = parser.parse(reader.read_lines())
+            if not len(rows):
                 continue
-            w.writerow([timestamp.isoformat(), x, y, z])
-            # Optional: print tiny heartbeat
-            if int(ms_since) % 1000 < 10:
-                sys.stdout.write("."); sys.stdout.flush()
+            # Lines that arrived in the same read are spaced by the board's own ms counter,
+            # counting back from now for the newest one
+            now = datetime.now(timezone.utc)
+            newest = rows[-1, 0]
+            for ms_since, x, y, z in rows.tolist():
+                timestamp = (now - timedelta(milliseconds=max(0.0, newest - ms_since))).isoformat()
+                w.writerow([timestamp, x, y, z])
+                # Optional: print tiny heartbeat
+                if int(ms_since) % 1000 < 10:
+                    sys.stdout.write("."); sys.stdout.flush()
 
     print("\nDone.")
+    print(parser.summary())
 
 if __name__ == "__main__":
     main()
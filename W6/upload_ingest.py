@@ -0,0 +1,135 @@
+"""
+Streaming CSV upload ingestion for the W6 dashboard.
+
+The old upload callback received the whole file as a base64 string, decoded
+it to bytes and then to str, and parsed it (twice if the first attempt
+failed). It then rewrote the full CSV, all inside one Dash callback. Peak
+memory was several times the file size, and the worker was stuck for the
+duration.
+
+Now the browser POSTs the raw file to /upload (app.py registers the route; curl works too):
+
+    curl --data-binary @big_session.csv "http://127.0.0.1:8050/upload?filename=big_session.csv"
+
+`receive()` copies the request body to disk in fixed-size chunks. `ingest_csv()`
+then runs on a background thread. It parses the file with
+`pd.read_csv(chunksize=...)` using typed float64 columns and ISO-8601
+timestamps, and appends each chunk to the ColumnStore, which writes it to the
+session file (gyro_data.csv, or its Parquet dataset) and then to the
+memory-mapped cache, keeping rows in time order. Progress
+is written to `<upload_dir>/<job>.json` so that any worker can report it.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from column_store import TIME_COL, VALUE_COLS
+
+CHUNK_BYTES = 1 << 20
+CHUNK_ROWS = 200_000
+
+class UploadJob:
+    def __init__(self, upload_dir, filename):
+        self.dir = Path(upload_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.path = self.dir / f"{self.id}.csv"
+        self.status = {"job": self.id, "filename": filename, "state": "receiving", "bytes_total": 0,
+                       "bytes_done": 0, "rows": 0, "error": None, "started": time.time()}
+        self._write_status()
+
+    def _write_status(self):
+        tmp = self.dir / f"{self.id}.json.tmp"
+        tmp.write_text(json.dumps(self.status))
+        os.replace(tmp, self.dir / f"{self.id}.json")
+
+    def update(self, **kw):
+        self.status.update(kw)
+        self._write_status()
+
+def receive(job, stream, content_length=None, chunk_bytes=CHUNK_BYTES):
+    """Copy a request body to job.path without holding it in memory."""
+    done = 0
+    last = time.monotonic()
+    job.update(bytes_total=content_length or 0)
+    with open(job.path, "wb") as f:
+        while True:
+            chunk = stream.read(chunk_bytes)
+            if not chunk:
+                break
+            f.write(chunk)
+            done += len(chunk)
+            if time.monotonic() - last >= 0.5:
+                job.update(bytes_done=done)
+                last = time.monotonic()
+    job.update(state="parsing", bytes_total=done, bytes_done=0)
+    return done
+
+def _lower(name):
+    return str(name).strip().lower()
+
+def ingest_csv(job, store, chunk_rows=CHUNK_ROWS, on_chunk=None):
+    """Parse job.path chunk by chunk and append each chunk to `store`. Returns rows added."""
+    rows = 0
+    try:
+        with open(job.path, "rb") as f:
+            header = pd.read_csv(f, nrows=0).columns
+            f.seek(0)
+            wanted = {c for c in header if _lower(c) in (TIME_COL,) + VALUE_COLS}
+            dtypes = {c: "float64" for c in wanted if _lower(c) in VALUE_COLS}
+            for chunk in pd.read_csv(f, chunksize=chunk_rows, usecols=sorted(wanted), dtype=dtypes,
+                                     on_bad_lines="skip", encoding_errors="replace"):
+                chunk.columns = [_lower(c) for c in chunk.columns]
+                if TIME_COL in chunk.columns:
+                    chunk[TIME_COL] = pd.to_datetime(chunk[TIME_COL], errors="coerce", format="ISO8601")
+                rows += store.append(chunk)
+                if on_chunk:
+                    on_chunk(rows)
+                job.update(bytes_done=f.tell(), rows=rows)
+        job.update(state="done", bytes_done=job.status["bytes_total"], rows=rows, finished=time.time())
+    except Exception as e:
+        job.update(state="error", error=str(e), rows=rows)
+    finally:
+        try:
+            job.path.unlink()
+        except OSError:
+            pass
+    return rows
+
+def start_ingest(job, store, on_chunk=None, chunk_rows=CHUNK_ROWS):
+    t = threading.Thread(target=ingest_csv, args=(job, store, chunk_rows, on_chunk),
+                         name=f"ingest-{job.id}", daemon=True)
+    t.start()
+    return t
+
+def latest_status(upload_dir):
+    """Status dict of the most recent upload job, or None."""
+    files = sorted(Path(upload_dir).glob("*.json"), key=lambda p: p.stat().st_mtime) \
+        if Path(upload_dir).exists() else []
+    for p in reversed(files):
+        try:
+            return json.loads(p.read_text())
+        except (OSError, ValueError):
+            continue
+    return None
+
+def describe(status):
+    if not status:
+        return ""
+    name = status.get("filename") or status["job"]
+    total = status.get("bytes_total") or 0
+    done = status.get("bytes_done") or 0
+    pct = f" {100 * done / total:.0f}%" if total else ""
+    if status["state"] == "receiving":
+        return f"Uploading {name}:{pct} ({done / 1e6:.1f} MB)"
+    if status["state"] == "parsing":
+        return f"Importing {name}:{pct}, {status['rows']:,} rows so far"
+    if status["state"] == "done":
+        secs = status.get("finished", time.time()) - status["started"]
+        return f"Imported {name}: {status['rows']:,} rows appended in {secs:.1f}s"
+    return f"Upload of {name} failed: {status.get('error')}"
@@ -1,5 +1,6 @@
-import argparse, csv, sys, time
+import argparse, sys, time
 from datetime import datetime
+from pathlib import Path
 
 try:
     import serial
@@ -7,38 +8,43 @@ except ImportError:
     print("pyserial is required. Install with: pip install pyserial")
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.csv_sink import add_sink_args, sink_from_args
+from shared.serial_ingest import ChunkedLineReader, make_parser
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--port", required=True, help="Serial port path, e.g. COM5 or /dev/ttyUSB0")
     ap.add_argument("--baud", type=int, default=115200, help="Baud rate (default: 115200)")
     ap.add_argument("--out", default="sensor_data.csv", help="Output CSV filename")
+    add_sink_args(ap)
     args = ap.parse_args()
 
     ser = serial.Serial(args.port, args.baud, timeout=2)
     print(f"Reading from {args.port} at {args.baud} baud. Writing to {args.out}")
 
-    with open(args.out, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["timestamp", "temperature_C", "humidity_pct"])
+    with sink_from_args(args.out, ["timestamp", "temperature_C", "humidity_pct"], args) as writer:
+        malformed_seen = 0
+        reader = ChunkedLineReader(ser)
+        parser = make_parser("dht")   # "timestamp,temperature_C,humidity_pct" or "temperature_C,humidity_pct"
         try:
             while True:
-                line = ser.readline().decode("utf-8", errors="ignore").strip()
-                if not line:
+                rows = parser.parse(reader.read_lines())
+                if parser.stats["malformed"] > malformed_seen:
+                    malformed_seen = parser.stats["malformed"]
+                    print("Skipping malformed lines:", parser.summary())
+                if not len(rows):
                     continue
-                parts = [p.strip() for p in line.split(",")]
-                if len(parts) != 3:
-                    # If the board prints only temp/hum, add timestamp here
-                    if len(parts) == 2:
-                        ts = datetime.now().isoformat(timespec="seconds")
-                        parts = [ts] + parts
-                    else:
-                        print("Skipping malformed line:", line)
-                        continue
-                writer.writerow(parts)
-                f.flush()
-                print("logged:", parts)
+                now = datetime.now().isoformat(timespec="seconds")
+                for first, (temp, hum) in zip(parser.first_fields, rows.tolist()):
+                    # If the board has no clock (or prints only temp/hum), add timestamp here
+                    ts = first.decode(errors="ignore").strip() if first else ""
+                    parts = [ts or now, temp, hum]
+                    writer.writerow(parts)
+                    print("logged:", parts)
         except KeyboardInterrupt:
             print("\\nStopped.")
+            print(parser.summary())
 
 if __name__ == "__main__":
     main()
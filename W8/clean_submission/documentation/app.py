@@ -1,225 +1,200 @@
-import os, time, random, math
-from collections import deque
+import os, sys, time, json, threading
 from datetime import datetime
+from pathlib import Path
 import numpy as np
-import pandas as pd
 
-from dash import Dash, dcc, html, Output, Input
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from shared.replay import Recording, ReplayPort, parse_speed
+from ring_buffer import RingBuffer
+from archiver import WindowArchiver
+from activity_sim import ActivitySim
+from live_client import LiveAccelClient, transport_from_spec
+
+from dash import Dash, dcc, html, Output, Input, State, no_update
+from flask import Response
 import plotly.graph_objects as go
 
 # ------------- Config -------------
-SIM_MODE = False         # Live mode: fetch data from Arduino IoT Cloud
-SAMPLE_RATE_HZ = 20      # ~20 samples/sec
+SIM_MODE = os.environ.get("W8_SIM", "0") == "1"   # default: live mode, fetch data from Arduino IoT Cloud
+REPLAY = os.environ.get("W8_REPLAY")               # with W8_SIM=1: play a recorded session instead of ActivitySim
+REPLAY_SPEED = parse_speed(os.environ.get("W8_REPLAY_SPEED", "1"))   # 1, 10, ... or max
+LIVE_SOURCE = os.environ.get("W8_LIVE", "arduino")      # "arduino" or "mqtt://host:port/prefix"
+LIVE_FALLBACK = os.environ.get("W8_FALLBACK", "none")   # "sim": show labelled simulated data while disconnected
+FALLBACK_AFTER_S = 5     # how long the link must be down before the fallback kicks in
+SAMPLE_RATE_HZ = 20      # ~20 samples/sec (acquired by a background thread)
+REFRESH_HZ = 4           # browser updates/sec; each one carries only the new points
+N_RECENT = 2000          # points kept on the live graphs
 N_WINDOW = 1000          # Number of samples per saved/refresh window (~50 sec @ 20 Hz)
+SAVE_FORMAT = "parquet"  # "parquet" (typed, compressed) or "csv"
+ARCHIVE_POLICY = os.environ.get("W8_ARCHIVE_POLICY", "block")  # when the archive queue is full: block | drop-oldest | drop-newest
 SAVE_DIR = os.path.join(os.path.dirname(__file__), "graphs")
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 os.makedirs(SAVE_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # Buffers
-buffer_a = deque(maxlen=10_000)   # continuously receives data
-buffer_b = []                     # copy window from A to B for plotting/saving
+buffer_a = RingBuffer(10_000)     # continuously receives data (seq, ts, x, y, z, label)
+archived_seq = 0                  # seq of the last sample handed to a window
+archiver = WindowArchiver(DATA_DIR, SAVE_DIR, save_format=SAVE_FORMAT, policy=ARCHIVE_POLICY)
 
 # ------------- Data Sources -------------
-def get_live_sample():
-    """Fetch live data from Arduino IoT Cloud.
-    Return a single (timestamp, x, y, z) tuple.
-    """
-    try:
-        # Import Arduino IoT Cloud client
-        from arduino_iot_cloud import ArduinoCloudClient
-        from arduino_config import (
-            ARDUINO_DEVICE_ID, ARDUINO_THING_ID, DEVICE_KEY,
-            ACCEL_X_VARIABLE, ACCEL_Y_VARIABLE, ACCEL_Z_VARIABLE
-        )
-        
-        # Check if credentials are configured
-        if (ARDUINO_DEVICE_ID == "your_device_id_here" or
-            ARDUINO_THING_ID == "your_thing_id_here"):
-            print("Arduino IoT Cloud credentials not configured. Using simulation mode.")
-            raise Exception("Credentials not configured")
-        
-        # Create Arduino IoT Cloud client using device key
-        client = ArduinoCloudClient(
-            device_id=ARDUINO_DEVICE_ID,
-            username=ARDUINO_CLIENT_ID,
-            password=ARDUINO_CLIENT_SECRET
-        )
-        
-        # Fetch accelerometer data
-        x = client.get_variable(ACCEL_X_VARIABLE)
-        y = client.get_variable(ACCEL_Y_VARIABLE)
-        z = client.get_variable(ACCEL_Z_VARIABLE)
-        
-        print(f"📡 Live data: x={x:.3f}, y={y:.3f}, z={z:.3f}")
-        return (datetime.now(), x, y, z)
-        
-    except ImportError:
-        print("Arduino IoT Cloud client not installed. Run: pip install arduino-iot-cloud")
-        raise Exception("Arduino IoT Cloud client not available")
-        
-    except Exception as e:
-        print(f"Error fetching live data: {e}")
-        print("🔄 Falling back to simulation mode...")
-        # Fallback to simulated data
-        import random
-        x = random.gauss(0, 0.1)
-        y = random.gauss(0, 0.1)
-        z = random.gauss(1, 0.1)
-        return (datetime.now(), x, y, z)
-
-# Simple activity simulator: walk, jog, jump, idle segments with distinct patterns
-class ActivitySim:
-    def __init__(self, seed=42):
-        random.seed(seed)
-        self.t = 0.0
-        self.activity = "idle"
-        self.segment_end = 0
-        self._schedule_next()
-
-    def _schedule_next(self):
-        self.activity = random.choice(["idle", "walk", "jog", "jump"])
-        dur = {"idle": 6, "walk": 10, "jog": 8, "jump": 5}[self.activity]
-        self.segment_end = self.t + dur
-
-    def step(self, dt=1.0/SAMPLE_RATE_HZ):
-        # Base gravity on z
-        ax, ay, az = 0.0, 0.0, 1.0  # g units-ish
-        if self.t >= self.segment_end:
-            self._schedule_next()
-
-        if self.activity == "idle":
-            # small noise
-            ax += random.gauss(0, 0.01)
-            ay += random.gauss(0, 0.01)
-            az += random.gauss(0, 0.01)
-        elif self.activity == "walk":
-            freq = 1.8
-            ax += 0.15 * math.sin(2*math.pi*freq*self.t) + random.gauss(0, 0.02)
-            ay += 0.10 * math.cos(2*math.pi*freq*self.t) + random.gauss(0, 0.02)
-            az += 0.08 * math.sin(2*math.pi*freq*self.t + 0.7) + random.gauss(0, 0.02)
-        elif self.activity == "jog":
-            freq = 3.0
-            ax += 0.35 * math.sin(2*math.pi*freq*self.t) + random.gauss(0, 0.03)
-            ay += 0.25 * math.cos(2*math.pi*freq*self.t) + random.gauss(0, 0.03)
-            az += 0.20 * math.sin(2*math.pi*freq*self.t + 0.5) + random.gauss(0, 0.03)
-        elif self.activity == "jump":
-            # spikes on z
-            if int(self.t * 2) % 3 == 0:
-                az += 0.8 + random.gauss(0, 0.05)
-            ax += random.gauss(0, 0.05)
-            ay += random.gauss(0, 0.05)
-        self.t += dt
-        return (datetime.now(), ax, ay, az, self.activity)
-
-sim = ActivitySim()
-
-def get_next_sample():
+def start_live_client():
+    """Connect once to the cloud (or W8_LIVE=mqtt://... stand-in); samples arrive via callbacks."""
+    client = LiveAccelClient(transport_from_spec(LIVE_SOURCE))
+    print(f"[live] connecting to {client.transport.name}")
+    return client.start()
+
+sim = ActivitySim(rate_hz=SAMPLE_RATE_HZ)
+replay = ReplayPort(Recording.load(REPLAY, "xyz_ms"), speed=REPLAY_SPEED, loop=True) if SIM_MODE and REPLAY else None
+live = None if SIM_MODE else start_live_client()
+
+def fallback_active():
+    return (not SIM_MODE and LIVE_FALLBACK == "sim"
+            and not live.connected and live.down_for() > FALLBACK_AFTER_S)
+
+def next_samples():
+    """Samples to append this tick: one simulated step, or whatever the live client received."""
+    if replay is not None:
+        return replay_samples()
     if SIM_MODE:
-        ts, x, y, z, act = sim.step()
-        return ts, x, y, z, act
+        return [sim.step()]
+    got = live.drain()
+    if got or not fallback_active():
+        return [(ts, x, y, z, "live") for ts, x, y, z, _latency in got]
+    ts, x, y, z, _ = sim.step()
+    return [(ts, x, y, z, "fallback")]
+
+def replay_samples():
+    """Recorded samples that are due, stamped at their (speed-scaled) replay time."""
+    idx, values, labels = replay.due_rows()
+    if not len(idx):
+        return []
+    # replay.t0 is monotonic; offsets from it are turned into local wall-clock times
+    now = np.datetime64(datetime.now(), "us")
+    if REPLAY_SPEED:
+        due_s = np.array([replay.rec.time_of(i) for i in idx]) / REPLAY_SPEED - (time.monotonic() - replay.t0)
+        ts = now + (due_s * 1e6).astype("timedelta64[us]")
     else:
-        ts, x, y, z = get_live_sample()
-        return ts, x, y, z, "live"
+        ts = np.full(len(idx), now)
+    labels = labels.tolist() if labels is not None else ["replay"] * len(idx)
+    return list(zip(ts.tolist(), *values.T.tolist(), labels))
+
+def source_status():
+    if replay is not None:
+        return f"Mode: REPLAY {replay.rec.name} at {f'{REPLAY_SPEED:g}x' if REPLAY_SPEED else 'max speed'}"
+    if SIM_MODE:
+        return "Mode: SIMULATION"
+    text = f"Mode: {live.describe()}"
+    if fallback_active():
+        text += " | FALLBACK: showing SIMULATED data (label 'fallback')"
+    return text
+
+# ------------- Acquisition -------------
+def acquire_one():
+    """Take this tick's samples into the buffers; queue a window for archiving when A is full."""
+    global archived_seq
+    head = buffer_a.head
+    for ts, x, y, z, label in next_samples():
+        head = buffer_a.append(ts, x, y, z, label)
+    while head - archived_seq >= N_WINDOW:
+        # the oldest unsaved N_WINDOW samples, as a view (no copy)
+        window = buffer_a.window(archived_seq + 1, N_WINDOW)
+        archived_seq += N_WINDOW
+        if window is None:
+            continue  # a burst already overwrote it
+        archiver.submit(window)   # copies the rows; files and PNGs are written off this thread
+
+def producer_loop(stop):
+    """Acquire at SAMPLE_RATE_HZ on a fixed schedule, independent of any browser."""
+    period = 1.0 / SAMPLE_RATE_HZ
+    next_t = time.monotonic()
+    while not stop.is_set():
+        try:
+            acquire_one()
+        except Exception as e:
+            print(f"[acquire] {e}")
+        next_t += period
+        delay = next_t - time.monotonic()
+        if delay > 0:
+            stop.wait(delay)
+        else:
+            next_t = time.monotonic()  # fell behind; don't try to catch up in a burst
+
+_producer_stop = threading.Event()
+_producer = None
+
+def start_producer():
+    global _producer
+    if _producer is None:
+        _producer = threading.Thread(target=producer_loop, args=(_producer_stop,), name="w8-producer", daemon=True)
+        _producer.start()
+
+def samples_since(seq):
+    """(newest seq, view of the samples after `seq`), at most N_RECENT of them."""
+    rows = buffer_a.since(seq, limit=N_RECENT)
+    return (int(rows["seq"][-1]) if len(rows) else max(seq, buffer_a.head)), rows
 
 # ------------- Dash App -------------
+def empty_figures():
+    fig1 = go.Figure([go.Scatter(x=[], y=[], mode="lines", name=v) for v in ("x", "y", "z")])
+    fig1.update_layout(title="Recent x, y, z", uirevision="live")
+    fig2 = go.Figure([go.Scatter(x=[], y=[], mode="lines", name="|a|")])
+    fig2.update_layout(title="Acceleration magnitude |a|", uirevision="live")
+    return fig1, fig2
+
+_fig1, _fig2 = empty_figures()
 app = Dash(__name__)
+server = app.server
 app.layout = html.Div([
     html.H2("SIT225 Week 8 — Live Accelerometer (x,y,z)"),
-    html.Div("Mode: SIMULATION" if SIM_MODE else "Mode: LIVE (Arduino IoT Cloud)"),
-    dcc.Graph(id="xyz-graph"),
-    dcc.Graph(id="mag-graph"),
-    dcc.Interval(id="tick", interval=1000//SAMPLE_RATE_HZ, n_intervals=0),
+    html.Div(source_status(), id="mode"),
+    dcc.Graph(id="xyz-graph", figure=_fig1),
+    dcc.Graph(id="mag-graph", figure=_fig2),
+    dcc.Store(id="last-seq", data=0),
+    # Only the refresh is periodic in the browser; sampling runs in the producer thread
+    dcc.Interval(id="tick", interval=1000//REFRESH_HZ, n_intervals=0),
     html.Div(id="status", style={"marginTop": "10px", "fontSize": "0.9em"})
 ])
 
-def df_from_buffer(buf):
-    if not buf:
-        return pd.DataFrame(columns=["ts","x","y","z","label"])
-    df = pd.DataFrame(buf, columns=["ts","x","y","z","label"])
-    return df
-
 @app.callback(
-    Output("xyz-graph", "figure"),
-    Output("mag-graph", "figure"),
+    Output("xyz-graph", "extendData"),
+    Output("mag-graph", "extendData"),
+    Output("last-seq", "data"),
     Output("status", "children"),
-    Input("tick", "n_intervals")
+    Output("mode", "children"),
+    Input("tick", "n_intervals"),
+    State("last-seq", "data"),
 )
-def on_tick(n):
-    # 1) Push one sample to buffer_a
-    ts, x, y, z, label = get_next_sample()
-    buffer_a.append((ts, x, y, z, label))
-
-    # 2) If enough samples, move a window from A to B and save artefacts
-    saved_info = ""
-    if len(buffer_a) >= N_WINDOW:
-        # copy oldest N_WINDOW into buffer_b
-        df_a = df_from_buffer(list(buffer_a))
-        df_b = df_a.iloc[:N_WINDOW].copy()
-        # remove those from A by rebuilding
-        remaining = df_a.iloc[N_WINDOW:]
-        buffer_a.clear()
-        for row in remaining.itertuples(index=False):
-            buffer_a.append((row.ts, row.x, row.y, row.z, row.label))
-        # assign buffer_b for plotting/saving
-        global buffer_b
-        buffer_b = df_b.to_dict("records")
-
-        # save CSV + PNG
-        ts_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-        csv_path = os.path.join(DATA_DIR, f"activity_{ts_str}.csv")
-        df_b.to_csv(csv_path, index=False)
-
-        # Generate Plotly figures and save static images via kaleido
-        # XYZ graph
-        fig_xyz = go.Figure()
-        fig_xyz.add_trace(go.Scatter(y=df_b["x"], mode="lines", name="x"))
-        fig_xyz.add_trace(go.Scatter(y=df_b["y"], mode="lines", name="y"))
-        fig_xyz.add_trace(go.Scatter(y=df_b["z"], mode="lines", name="z"))
-        fig_xyz.update_layout(title=f"x/y/z (N={len(df_b)})")
-
-        # Magnitude graph
-        mag = np.sqrt(df_b["x"]**2 + df_b["y"]**2 + df_b["z"]**2)
-        fig_mag = go.Figure()
-        fig_mag.add_trace(go.Scatter(y=mag, mode="lines", name="|a|"))
-        fig_mag.update_layout(title=f"Acceleration magnitude |a| (N={len(df_b)})")
-
-        # Try image export
-        png_xyz_path = os.path.join(SAVE_DIR, f"xyz_{ts_str}.png")
-        png_mag_path = os.path.join(SAVE_DIR, f"magnitude_{ts_str}.png")
-        try:
-            fig_xyz.write_image(png_xyz_path, scale=2, width=1000, height=400)
-            fig_mag.write_image(png_mag_path, scale=2, width=1000, height=400)
-            saved_info = f"Saved {os.path.basename(csv_path)}, {os.path.basename(png_xyz_path)}, and {os.path.basename(png_mag_path)}"
-        except Exception as e:
-            saved_info = f"Saved {os.path.basename(csv_path)} (PNG export failed: {e})"
-
-    # 3) Build figures from recent data
-    df_recent = df_from_buffer(list(buffer_a)[-min(2000, len(buffer_a)):])
-    if len(buffer_b) > 0:
-        df_b = pd.DataFrame(buffer_b)
-    else:
-        df_b = df_recent
-
-    # xyz plot
-    fig1 = go.Figure()
-    fig1.add_trace(go.Scatter(y=df_recent["x"], mode="lines", name="x (recent)"))
-    fig1.add_trace(go.Scatter(y=df_recent["y"], mode="lines", name="y (recent)"))
-    fig1.add_trace(go.Scatter(y=df_recent["z"], mode="lines", name="z (recent)"))
-    fig1.update_layout(title="Recent x, y, z")
-
-    # magnitude plot
-    if len(df_recent) > 0:
-        mag = np.sqrt(df_recent["x"]**2 + df_recent["y"]**2 + df_recent["z"]**2)
-    else:
-        mag = []
-    fig2 = go.Figure()
-    fig2.add_trace(go.Scatter(y=mag, mode="lines", name="|a|"))
-    fig2.update_layout(title="Acceleration magnitude |a|")
-
-    status = f"samples_in_A={len(buffer_a)} | window_size={N_WINDOW} | {saved_info}"
-    return fig1, fig2, status
+def on_tick(n, last_seq):
+    # Send only the points this browser has not seen yet
+    newest, rows = samples_since(last_seq or 0)
+    status = f"samples={newest} | samples_in_A={buffer_a.head - archived_seq} | window_size={N_WINDOW} | {archiver.describe()}"
+    mode = source_status()
+    if not len(rows):
+        return no_update, no_update, newest, status, mode
+    ts = rows["ts"].astype(str).tolist()
+    x, y, z = rows["x"].tolist(), rows["y"].tolist(), rows["z"].tolist()
+    mag = np.sqrt(rows["x"]**2 + rows["y"]**2 + rows["z"]**2).tolist()
+    xyz = (dict(x=[ts, ts, ts], y=[x, y, z]), [0, 1, 2], N_RECENT)
+    return xyz, (dict(x=[ts], y=[mag]), [0], N_RECENT), newest, status, mode
+
+@server.route("/stream")
+def stream():
+    """Server-sent events: new samples as JSON batches at REFRESH_HZ (for non-Dash viewers)."""
+    def events():
+        seq = buffer_a.head
+        while True:
+            time.sleep(1.0 / REFRESH_HZ)
+            seq, rows = samples_since(seq)
+            if len(rows):
+                batch = {"seq": seq, "t": rows["ts"].astype(str).tolist(),
+                         "x": rows["x"].tolist(), "y": rows["y"].tolist(), "z": rows["z"].tolist()}
+                yield f"data: {json.dumps(batch)}\n\n"
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+start_producer()
 
 if __name__ == "__main__":
-    print("Starting Dash on http://127.0.0.1:8050 ...")
-    app.run(debug=False)
+    port = int(os.environ.get("W8_PORT", "8050"))
+    print(f"Starting Dash on http://127.0.0.1:{port} ...")
+    app.run(debug=False, port=port, threaded=True)
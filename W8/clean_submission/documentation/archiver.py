@@ -0,0 +1,200 @@
+"""
+Background window archiver for the W8 dashboard.
+
+Every N_WINDOW samples the producer used to write the window's data file and
+then make two kaleido `write_image` calls (scale=2) before it took the next
+sample. Each call started a fresh Chromium, so acquisition stalled for
+seconds per window and the live graphs froze with it.
+
+`WindowArchiver.submit()` now copies the window out of the ring buffer, which
+takes microseconds for 1000 rows. The copy matters because the ring keeps
+overwriting the slots behind the view. The window is then queued, and the
+work happens in two stages:
+
+  writers (pool)   write the data file: compressed Parquet via
+                   shared.session_store, or CSV
+  renderer (one)   draws the x/y/z and |a| PNGs; the single thread keeps one
+                   kaleido browser process alive and reuses it for every window
+
+Both queues are bounded. When the window queue is full, `policy` decides:
+  block          backpressure: the producer waits (live samples keep queuing
+                 in the cloud client, so nothing is lost)
+  drop-oldest    discard the oldest queued window, accept the new one
+  drop-newest    discard the new window
+PNGs are best-effort: if the render queue is full, that window's PNGs are
+skipped and counted. `describe()` feeds the status line: queue depths,
+write/render latency p50, drops and the last file saved.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from shared.session_store import save_frame
+
+POLICIES = ("block", "drop-oldest", "drop-newest")
+
+def _p50(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+class WindowArchiver:
+    def __init__(self, data_dir, png_dir, save_format="parquet", workers=2, max_queue=4,
+                 policy="block", png=True, png_queue=2, png_scale=2):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.data_dir, self.png_dir = data_dir, png_dir
+        self.save_format = save_format
+        self.policy = policy
+        self.png = png
+        self.png_scale = png_scale
+        self.windows = queue.Queue(max_queue)
+        self.renders = queue.Queue(png_queue)
+        self.write_s = deque(maxlen=50)
+        self.render_s = deque(maxlen=50)
+        self.stats = {"submitted": 0, "written": 0, "rendered": 0, "dropped": 0,
+                      "png_skipped": 0, "errors": 0}
+        self.last = ""
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._writer, name=f"w8-archive-{i}", daemon=True)
+                         for i in range(workers)]
+        if png:
+            self._threads.append(threading.Thread(target=self._renderer, name="w8-render", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    # ---- producer side ----
+    def submit(self, window):
+        """Queue a window (structured array from the ring buffer). Returns False if it was dropped."""
+        item = (datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3], window.copy())
+        with self._lock:
+            self.stats["submitted"] += 1
+        if self.policy == "block":
+            self.windows.put(item)
+            return True
+        try:
+            self.windows.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        if self.policy == "drop-oldest":
+            try:
+                self.windows.get_nowait()
+                self.windows.task_done()
+            except queue.Empty:
+                pass
+            self.windows.put_nowait(item)
+        self._count("dropped")
+        return self.policy == "drop-oldest"
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    # ---- workers ----
+    def _writer(self):
+        while True:
+            stamp, rows = self.windows.get()
+            try:
+                t0 = time.perf_counter()
+                df = pd.DataFrame({c: rows[c] for c in ("ts", "x", "y", "z", "label")})
+                path = os.path.join(self.data_dir, f"activity_{stamp}.{self.save_format}")
+                save_frame(df, path, time_col="ts")
+                self.write_s.append(time.perf_counter() - t0)
+                self._count("written")
+                self.last = f"Saved {os.path.basename(path)}"
+                if self.png:
+                    try:
+                        self.renders.put_nowait((stamp, rows))
+                    except queue.Full:
+                        self._count("png_skipped")
+            except Exception as e:
+                self._count("errors")
+                self.last = f"Save failed: {e}"
+            finally:
+                self.windows.task_done()
+
+    def _start_kaleido(self):
+        """Keep one kaleido browser process for the renderer's lifetime (kaleido >= 1.0).
+
+        kaleido 0.2.x already keeps its process alive between calls.
+        """
+        try:
+            import kaleido
+        except ImportError:
+            return
+        start = getattr(kaleido, "start_sync_server", None)
+        if start is not None:
+            try:
+                start(silence_warnings=True)
+            except Exception as e:
+                print(f"[archive] could not keep kaleido running, PNGs will be slower: {e}")
+
+    def _renderer(self):
+        self._start_kaleido()
+        while True:
+            stamp, rows = self.renders.get()
+            try:
+                t0 = time.perf_counter()
+                paths = self.render_pngs(stamp, rows)
+                self.render_s.append(time.perf_counter() - t0)
+                self._count("rendered")
+                self.last = f"Saved activity_{stamp}.{self.save_format}, " + \
+                            ", ".join(os.path.basename(p) for p in paths)
+            except Exception as e:
+                self._count("errors")
+                first_line = next((l for l in str(e).splitlines() if l.strip()), type(e).__name__)
+                self.last = f"Saved activity_{stamp}.{self.save_format} (PNG export failed: {first_line.strip().rstrip(',')})"
+            finally:
+                self.renders.task_done()
+
+    def render_pngs(self, stamp, rows):
+        import plotly.graph_objects as go
+        import plotly.io as pio
+        n = len(rows)
+        fig_xyz = go.Figure([go.Scatter(y=rows[c], mode="lines", name=c) for c in ("x", "y", "z")])
+        fig_xyz.update_layout(title=f"x/y/z (N={n})")
+        mag = np.sqrt(rows["x"] ** 2 + rows["y"] ** 2 + rows["z"] ** 2)
+        fig_mag = go.Figure([go.Scatter(y=mag, mode="lines", name="|a|")])
+        fig_mag.update_layout(title=f"Acceleration magnitude |a| (N={n})")
+        paths = [os.path.join(self.png_dir, f"xyz_{stamp}.png"),
+                 os.path.join(self.png_dir, f"magnitude_{stamp}.png")]
+        opts = dict(scale=self.png_scale, width=1000, height=400)
+        if hasattr(pio, "write_images"):
+            pio.write_images([fig_xyz, fig_mag], paths, **opts)   # one kaleido round trip for both
+        else:
+            fig_xyz.write_image(paths[0], **opts)
+            fig_mag.write_image(paths[1], **opts)
+        return paths
+
+    # ---- reporting ----
+    def flush(self, timeout=None):
+        """Wait until every queued window is written and rendered (for tests and shutdown)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for q in (self.windows, self.renders):
+            while q.unfinished_tasks:
+                if deadline is not None and time.monotonic() > deadline:
+                    return False
+                time.sleep(0.01)
+        return True
+
+    def describe(self):
+        w, r = _p50(self.write_s), _p50(self.render_s)
+        parts = [f"archive queue {self.windows.qsize()}/{self.windows.maxsize}"]
+        if self.png:
+            parts.append(f"png queue {self.renders.qsize()}/{self.renders.maxsize}")
+        if w is not None:
+            parts.append(f"write p50 {1000 * w:.0f} ms")
+        if r is not None:
+            parts.append(f"render p50 {1000 * r:.0f} ms")
+        s = self.stats
+        if s["dropped"] or s["png_skipped"] or s["errors"]:
+            parts.append(f"dropped {s['dropped']}, png skipped {s['png_skipped']}, errors {s['errors']}")
+        if self.last:
+            parts.append(self.last)
+        return " | ".join(parts)
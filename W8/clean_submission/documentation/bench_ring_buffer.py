@@ -0,0 +1,80 @@
+"""
+Microbenchmark: per-tick cost of the old deque/DataFrame buffer vs RingBuffer.
+
+A "tick" is what the dashboard does per sample: append one sample, then read
+the most recent 2000 for the graphs. The old code did the read as
+`list(buffer_a)[-2000:]` plus a DataFrame. The old window cut copied all of A
+into a DataFrame and rebuilt the deque row by row with itertuples. With
+RingBuffer both are views. Each buffer is pre-filled to its size, so the
+table shows how cost grows with occupancy.
+
+    python bench_ring_buffer.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from ring_buffer import RingBuffer
+
+COLS = ["ts", "x", "y", "z", "label"]
+RECENT = 2000
+WINDOW = 1000
+
+def sample(i):
+    return (datetime(2025, 9, 17, 12, 0, 0), 0.01 * i, 0.02 * i, 1.0, "walk")
+
+def old_tick(buf, i):
+    buf.append(sample(i))
+    recent = list(buf)[-min(RECENT, len(buf)):]
+    return pd.DataFrame(recent, columns=COLS)
+
+def old_cut(buf):
+    df_a = pd.DataFrame(list(buf), columns=COLS)
+    df_b = df_a.iloc[:WINDOW].copy()
+    remaining = df_a.iloc[WINDOW:]
+    buf.clear()
+    for row in remaining.itertuples(index=False):
+        buf.append((row.ts, row.x, row.y, row.z, row.label))
+    return df_b
+
+def new_tick(rb, i):
+    rb.append(*sample(i))
+    return rb.last(RECENT)
+
+def new_cut(rb):
+    return rb.window(rb.head - rb.capacity + 1, WINDOW)
+
+def per_call_us(fn, arg, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(arg, i)
+    return 1e6 * (time.perf_counter() - t0) / n
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-tick cost vs buffer size")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    ap.add_argument("--ticks", type=int, default=200)
+    args = ap.parse_args()
+
+    print(f"{'buffer size':>12} {'old tick us':>12} {'ring tick us':>13} {'old cut ms':>11} {'ring cut us':>12}")
+    for size in args.sizes:
+        old = deque((sample(i) for i in range(size)), maxlen=size)
+        rb = RingBuffer(size)
+        for i in range(size):
+            rb.append(*sample(i))
+        old_us = per_call_us(old_tick, old, max(5, args.ticks * 1000 // size))
+        new_us = per_call_us(new_tick, rb, args.ticks * 10)
+        t0 = time.perf_counter()
+        old_cut(old)
+        cut_ms = 1000 * (time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            new_cut(rb)
+        ring_cut_us = 1e6 * (time.perf_counter() - t0) / 1000
+        print(f"{size:>12,} {old_us:>12.1f} {new_us:>13.1f} {cut_ms:>11.1f} {ring_cut_us:>12.2f}")
+
+if __name__ == "__main__":
+    main()
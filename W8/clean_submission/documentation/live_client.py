@@ -0,0 +1,229 @@
+"""
+Long-lived Arduino IoT Cloud subscriber for W8 live mode.
+
+The old `get_live_sample()` built a new `ArduinoCloudClient` and made three
+`get_variable` calls on every tick. That meant a new connection per sample
+at 20 Hz. On any error it quietly returned random numbers that looked like
+real data.
+
+`LiveAccelClient` connects once, on its own thread. The x/y/z variables arrive
+as callbacks and are assembled into samples in a timestamped buffer; the
+producer thread in app.py picks them up with `drain()`. Each sample gets:
+
+  ts        source time of its newest component (the board's send time when
+            the transport carries one, otherwise receive time)
+  latency   receive time of the completing update minus the source time of
+            the oldest component: the network delay plus the time the
+            three variables took to arrive
+
+If the link drops or the connect fails, it reconnects with exponential
+backoff (1 s doubling to 30 s). `state`, `last_error` and `describe()` say
+what is going on, so the dashboard can show it. This module never invents
+data: any fallback is the app's decision, and the app labels it.
+
+Transports:
+  ArduinoTransport   arduino-iot-cloud (`pip install arduino-iot-cloud`),
+                     credentials from arduino_config.py
+  MqttTransport      plain MQTT with topics <prefix>/<variable>; payload is a
+                     number or {"v": value, "t": epoch_seconds}. Point it at
+                     mqtt_standin.py to test without the cloud:
+
+    python mqtt_standin.py both --port 1883
+    W8_LIVE=mqtt://127.0.0.1:1883/thing python app.py
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlparse
+
+DEFAULT_VARIABLES = ("accelerometer_x", "accelerometer_y", "accelerometer_z")
+
+class ArduinoTransport:
+    name = "Arduino IoT Cloud"
+
+    def __init__(self, variables=None):
+        from arduino_config import (ARDUINO_DEVICE_ID, DEVICE_KEY,
+                                    ACCEL_X_VARIABLE, ACCEL_Y_VARIABLE, ACCEL_Z_VARIABLE)
+        self.device_id = ARDUINO_DEVICE_ID
+        self.secret = DEVICE_KEY
+        self.variables = tuple(variables or (ACCEL_X_VARIABLE, ACCEL_Y_VARIABLE, ACCEL_Z_VARIABLE))
+
+    def run(self, on_value, on_connected, stop):
+        """Blocks while connected; raises when the connection can't be made or is lost."""
+        if self.device_id in ("", "your_device_id_here") or self.secret in ("", "your_device_key_here"):
+            raise RuntimeError("credentials not configured in arduino_config.py")
+        try:
+            from arduino_iot_cloud import ArduinoCloudClient
+        except ImportError:
+            raise RuntimeError("arduino-iot-cloud not installed (pip install arduino-iot-cloud)")
+        client = ArduinoCloudClient(device_id=self.device_id, username=self.device_id, password=self.secret)
+        for name in self.variables:
+            client.register(name, value=None, on_write=lambda _c, v, name=name: on_value(name, v))
+        on_connected()
+        client.start()  # runs the client's event loop until the connection fails
+        if not stop.is_set():
+            raise ConnectionError("cloud client stopped")
+
+class MqttTransport:
+    def __init__(self, url, variables=DEFAULT_VARIABLES, client_id="w8-dashboard"):
+        u = urlparse(url)
+        self.host, self.port = u.hostname or "127.0.0.1", u.port or 1883
+        self.prefix = u.path.strip("/") or "thing"
+        self.variables = tuple(variables)
+        self.client_id = client_id
+        self.name = f"MQTT {self.host}:{self.port}/{self.prefix}"
+        self._client = None
+
+    def run(self, on_value, on_connected, stop):
+        from mqtt_standin import MiniMqttClient
+        self._client = client = MiniMqttClient(self.host, self.port, client_id=self.client_id)
+        wanted = {f"{self.prefix}/{v}": v for v in self.variables}
+        try:
+            for topic in wanted:
+                client.subscribe(topic)
+            on_connected()
+
+            def on_message(topic, payload):
+                name = wanted.get(topic)
+                if name is None:
+                    return
+                msg = json.loads(payload)
+                if isinstance(msg, dict):
+                    on_value(name, float(msg["v"]), msg.get("t"))
+                else:
+                    on_value(name, float(msg))
+
+            client.loop(on_message, stop)
+        finally:
+            self._client = None
+            client.close()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+def transport_from_spec(spec):
+    """"arduino" or "mqtt://host:port/prefix"."""
+    if not spec or spec == "arduino":
+        return ArduinoTransport()
+    if spec.startswith("mqtt://"):
+        return MqttTransport(spec)
+    raise SystemExit(f"Unknown W8_LIVE {spec!r} (arduino | mqtt://host:port/prefix)")
+
+class LiveAccelClient:
+    def __init__(self, transport, backoff_s=1.0, max_backoff_s=30.0, max_pending=10_000, latency_window=500):
+        self.transport = transport
+        self.variables = tuple(transport.variables)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.pending = deque(maxlen=max_pending)   # (ts, x, y, z, latency_s)
+        self.latencies = deque(maxlen=latency_window)
+        self.state = "idle"       # idle | connecting | connected | backoff | stopped
+        self.last_error = None
+        self.retry_at = None
+        self.down_since = time.monotonic()
+        self.stats = {"connects": 0, "failures": 0, "updates": 0, "samples": 0, "dropped": 0}
+        self._partial = {}        # variable -> (value, source_time, receive_time)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="w8-live", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        close = getattr(self.transport, "close", None)
+        if close:
+            close()
+        if self._thread is not None:
+            self._thread.join(5)
+        self.state = "stopped"
+
+    def _connected(self):
+        self.state = "connected"
+        self.stats["connects"] += 1
+        self.last_error = None
+        self.retry_at = None
+        self._delay = self.backoff_s
+        with self._lock:
+            self._partial = {}    # don't pair values from before the gap with new ones
+
+    def _run(self):
+        self._delay = self.backoff_s
+        while not self._stop.is_set():
+            self.state = "connecting"
+            try:
+                self.transport.run(self._on_value, self._connected, self._stop)
+                if self._stop.is_set():
+                    break
+                raise ConnectionError("connection closed")
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.stats["failures"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self.state == "connected":
+                    self.down_since = time.monotonic()
+                self.state = "backoff"
+                self.retry_at = time.monotonic() + self._delay
+                print(f"[live] {self.transport.name}: {self.last_error}; retrying in {self._delay:g}s")
+                self._stop.wait(self._delay)
+                self._delay = min(self._delay * 2, self.max_backoff_s)
+        self.state = "stopped"
+
+    def _on_value(self, name, value, source_time=None):
+        now = time.time()
+        with self._lock:
+            self.stats["updates"] += 1
+            self._partial[name] = (value, source_time or now, now)
+            if len(self._partial) < len(self.variables):
+                return
+            parts = [self._partial[v] for v in self.variables]
+            self._partial = {}
+        ts = max(p[1] for p in parts)
+        latency = now - min(p[1] for p in parts)
+        if len(self.pending) == self.pending.maxlen:
+            self.stats["dropped"] += 1
+        self.pending.append((datetime.fromtimestamp(ts), parts[0][0], parts[1][0], parts[2][0], latency))
+        self.latencies.append(latency)
+        self.stats["samples"] += 1
+
+    def drain(self):
+        """All samples received since the last call, oldest first."""
+        out = []
+        while True:
+            try:
+                out.append(self.pending.popleft())
+            except IndexError:
+                return out
+
+    @property
+    def connected(self):
+        return self.state == "connected"
+
+    def down_for(self):
+        """Seconds since the link was last up (0 while connected)."""
+        return 0.0 if self.connected else time.monotonic() - self.down_since
+
+    def latency_ms(self):
+        """(p50, p95) of recent per-sample latency in ms, or None."""
+        lat = sorted(self.latencies)
+        if not lat:
+            return None
+        return 1000 * lat[len(lat) // 2], 1000 * lat[min(len(lat) - 1, int(0.95 * len(lat)))]
+
+    def describe(self):
+        if self.connected:
+            lat = self.latency_ms()
+            lat_str = f", latency p50 {lat[0]:.0f} ms / p95 {lat[1]:.0f} ms" if lat else ", waiting for data"
+            return f"LIVE connected to {self.transport.name}{lat_str}"
+        if self.state == "backoff":
+            wait = max(0.0, (self.retry_at or 0) - time.monotonic())
+            return f"LIVE DISCONNECTED from {self.transport.name} ({self.last_error}); retry in {wait:.0f}s"
+        return f"LIVE {self.state} ({self.transport.name})"
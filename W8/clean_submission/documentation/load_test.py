@@ -0,0 +1,188 @@
+"""
+Load test for the W8 live dashboard: N concurrent viewers against a running app.
+
+Starts app.py (simulation mode) in a subprocess, then runs N viewer threads.
+Each one drives the dashboard's periodic callback at the rate the page's
+dcc.Interval would, exactly as a browser tab does: it POSTs
+/_dash-update-component and carries its `last-seq` state between calls. The
+test reports:
+
+  - server CPU (% of one core, from /proc or psutil)
+  - callback round-trip latency (p50/p95)
+  - data age: how old the newest point is when a viewer receives it
+  - response bytes per viewer per second
+
+    python load_test.py --viewers 20 --seconds 20
+    python load_test.py --viewers 20 --app /tmp/app_old.py   # e.g. the pre-push version
+
+`--sse` additionally opens N /stream (server-sent events) clients instead of polling.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+HERE = Path(__file__).resolve().parent
+
+def cpu_seconds(pid):
+    try:
+        import psutil
+        t = psutil.Process(pid).cpu_times()
+        return t.user + t.system
+    except ImportError:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def find_tick_callback(base):
+    deps = requests.get(f"{base}/_dash-dependencies", timeout=10).json()
+    for d in deps:
+        if any(i["id"] == "tick" and i["property"] == "n_intervals" for i in d["inputs"]):
+            return d
+    raise SystemExit("no callback driven by tick.n_intervals")
+
+def interval_ms(base):
+    layout = json.dumps(requests.get(f"{base}/_dash-layout", timeout=10).json())
+    key = '"id": "tick"'
+    i = layout.find(key)
+    j = layout.rfind('"interval":', 0, i) if i >= 0 else -1
+    k = layout.find('"interval":', i)
+    pos = k if k >= 0 and (j < 0 or k - i < i - j) else j
+    return float(layout[pos + len('"interval":'):].split(",")[0].split("}")[0])
+
+def outputs_of(dep):
+    spec = dep["output"].strip(".")
+    return [{"id": o.rsplit(".", 1)[0], "property": o.rsplit(".", 1)[1]} for o in spec.split("...")]
+
+def newest_time(response):
+    """Latest timestamp in an extendData update, if the response carries one."""
+    for comp in response.values():
+        ext = comp.get("extendData") if isinstance(comp, dict) else None
+        if ext:
+            xs = ext[0]["x"][0]
+            if xs:
+                return datetime.fromisoformat(str(xs[-1]).replace(" ", "T"))
+    return None
+
+def viewer(base, dep, period, stop, out):
+    s = requests.Session()
+    state_vals = {f'{st["id"]}.{st["property"]}': None for st in dep.get("state", [])}
+    outputs = outputs_of(dep)
+    n = 0
+    next_t = time.monotonic()
+    while not stop.is_set():
+        n += 1
+        body = {
+            "output": dep["output"],
+            "outputs": outputs if len(outputs) > 1 else outputs[0],
+            "inputs": [{"id": i["id"], "property": i["property"], "value": n} for i in dep["inputs"]],
+            "changedPropIds": ["tick.n_intervals"],
+            "state": [{"id": k.rsplit(".", 1)[0], "property": k.rsplit(".", 1)[1], "value": v}
+                      for k, v in state_vals.items()],
+        }
+        t0 = time.perf_counter()
+        try:
+            r = s.post(f"{base}/_dash-update-component", json=body, timeout=10)
+        except requests.RequestException:
+            out["errors"] += 1
+            continue
+        rtt = time.perf_counter() - t0
+        out["rtt"].append(rtt)
+        out["bytes"] += len(r.content)
+        if r.status_code == 200:
+            resp = r.json().get("response", {})
+            for k in state_vals:
+                cid, prop = k.rsplit(".", 1)
+                if cid in resp and prop in resp[cid]:
+                    state_vals[k] = resp[cid][prop]
+            newest = newest_time(resp)
+            if newest is not None:
+                out["age"].append((datetime.now() - newest).total_seconds())
+        elif r.status_code != 204:
+            out["errors"] += 1
+        next_t += period
+        stop.wait(max(0.0, next_t - time.monotonic()))
+
+def sse_viewer(base, stop, out):
+    with requests.get(f"{base}/stream", stream=True, timeout=10) as r:
+        for line in r.iter_lines():
+            if stop.is_set():
+                break
+            if line.startswith(b"data: "):
+                batch = json.loads(line[6:])
+                out["bytes"] += len(line)
+                out["age"].append((datetime.now() - datetime.fromisoformat(batch["t"][-1])).total_seconds())
+
+def pct(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent-viewer load test for the W8 dashboard")
+    ap.add_argument("--viewers", type=int, default=20)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--app", default=str(HERE / "app.py"), help="Dashboard script to test")
+    ap.add_argument("--sse", action="store_true", help="Viewers use /stream instead of polling")
+    args = ap.parse_args()
+
+    env = dict(os.environ, W8_SIM="1", W8_PORT=str(args.port))
+    proc = subprocess.Popen([sys.executable, args.app], cwd=str(Path(args.app).resolve().parent), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f"{base}/_dash-layout", timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.2)
+        else:
+            raise SystemExit("dashboard did not start")
+        period = interval_ms(base) / 1000.0
+        dep = find_tick_callback(base)
+        stop = threading.Event()
+        results = [{"rtt": [], "age": [], "bytes": 0, "errors": 0} for _ in range(args.viewers)]
+        if args.sse:
+            threads = [threading.Thread(target=sse_viewer, args=(base, stop, r), daemon=True) for r in results]
+        else:
+            threads = [threading.Thread(target=viewer, args=(base, dep, period, stop, r), daemon=True)
+                       for r in results]
+        cpu0, t0 = cpu_seconds(proc.pid), time.monotonic()
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        cpu1, t1 = cpu_seconds(proc.pid), time.monotonic()
+        stop.set()
+        for t in threads:
+            t.join(2)
+    finally:
+        proc.terminate()
+        proc.wait(5)
+
+    wall = t1 - t0
+    rtt = [x for r in results for x in r["rtt"]]
+    age = [x for r in results for x in r["age"]]
+    total_bytes = sum(r["bytes"] for r in results)
+    mode = "SSE /stream" if args.sse else f"polling every {period * 1000:.0f} ms"
+    print(f"{Path(args.app).name}: {args.viewers} viewers, {mode}, {wall:.0f}s")
+    print(f"  server CPU       {100 * (cpu1 - cpu0) / wall:6.1f}% of one core")
+    if rtt:
+        print(f"  callback RTT     p50 {1000 * pct(rtt, 0.5):6.1f} ms   p95 {1000 * pct(rtt, 0.95):6.1f} ms"
+              f"   ({len(rtt) / wall:.0f} req/s)")
+    if age:
+        print(f"  data age         p50 {1000 * pct(age, 0.5):6.1f} ms   p95 {1000 * pct(age, 0.95):6.1f} ms")
+    print(f"  bytes/viewer/s   {total_bytes / wall / args.viewers:8.0f}")
+    print(f"  errors           {sum(r['errors'] for r in results)}")
+
+if __name__ == "__main__":
+    main()
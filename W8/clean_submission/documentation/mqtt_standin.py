@@ -0,0 +1,256 @@
+"""
+Local MQTT stand-in for Arduino IoT Cloud, for exercising live mode without
+the cloud or a board.
+
+Arduino IoT Cloud is MQTT underneath. This file has just enough MQTT 3.1.1
+(QoS 0 CONNECT/SUBSCRIBE/PUBLISH/PINGREQ/DISCONNECT, `#` wildcards) for:
+
+  - `StandInBroker`: a threaded broker on localhost
+  - `MiniMqttClient`: a tiny blocking client (used by live_client.MqttTransport)
+  - `fake_board()`: publishes accelerometer_x/y/z like the Nano 33 IoT sketch
+    does, with the send time in each payload so that latency can be measured
+
+    python mqtt_standin.py broker --port 1883
+    python mqtt_standin.py board --port 1883 --rate 20
+    python mqtt_standin.py both --port 1883 --rate 20
+    W8_LIVE=mqtt://127.0.0.1:1883/thing python app.py
+"""
+import argparse
+import json
+import math
+import random
+import socket
+import struct
+import threading
+import time
+
+CONNECT, CONNACK, PUBLISH, SUBSCRIBE, SUBACK = 1, 2, 3, 8, 9
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+# ---- wire format ----
+
+def _encode_len(n):
+    out = bytearray()
+    while True:
+        b, n = n % 128, n // 128
+        out.append(b | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+def _str(s):
+    b = s.encode()
+    return struct.pack("!H", len(b)) + b
+
+def packet(ptype, body=b"", flags=0):
+    return bytes([(ptype << 4) | flags]) + _encode_len(len(body)) + body
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf += chunk
+    return bytes(buf)
+
+def read_packet(sock):
+    """(type, flags, body) of the next packet on a blocking socket."""
+    first = _recv_exact(sock, 1)[0]
+    mult, length = 1, 0
+    while True:
+        b = _recv_exact(sock, 1)[0]
+        length += (b & 0x7F) * mult
+        if not b & 0x80:
+            break
+        mult *= 128
+    return first >> 4, first & 0x0F, _recv_exact(sock, length) if length else b""
+
+def connect_packet(client_id, keepalive=30):
+    return packet(CONNECT, _str("MQTT") + bytes([4, 0x02]) + struct.pack("!H", keepalive) + _str(client_id))
+
+def publish_packet(topic, payload):
+    return packet(PUBLISH, _str(topic) + payload)
+
+def parse_publish(body):
+    n = struct.unpack("!H", body[:2])[0]
+    return body[2:2 + n].decode(), body[2 + n:]
+
+def topic_matches(pattern, topic):
+    if pattern.endswith("#"):
+        return topic.startswith(pattern[:-1]) or topic == pattern[:-2]
+    p, t = pattern.split("/"), topic.split("/")
+    return len(p) == len(t) and all(a in ("+", b) for a, b in zip(p, t))
+
+# ---- broker ----
+
+class StandInBroker:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(16)
+        self.host, self.port = self.sock.getsockname()
+        self.subs = {}          # conn -> [patterns]
+        self.lock = threading.Lock()
+        self.running = False
+        self.stats = {"clients": 0, "published": 0, "delivered": 0}
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._accept, name="mqtt-broker", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Close the listener and drop every client (they see the connection reset)."""
+        self.running = False
+        with self.lock:
+            socks = [self.sock] + list(self.subs)
+            self.subs.clear()
+        for s in socks:
+            try:
+                s.shutdown(socket.SHUT_RDWR)  # wakes threads blocked in accept()/recv()
+            except OSError:
+                pass
+            s.close()
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with self.lock:
+            self.subs[conn] = []
+            self.stats["clients"] += 1
+        try:
+            while self.running:
+                ptype, flags, body = read_packet(conn)
+                if ptype == CONNECT:
+                    conn.sendall(packet(CONNACK, b"\x00\x00"))
+                elif ptype == SUBSCRIBE:
+                    pid, pos, granted = body[:2], 2, bytearray()
+                    while pos < len(body):
+                        n = struct.unpack("!H", body[pos:pos + 2])[0]
+                        with self.lock:
+                            self.subs[conn].append(body[pos + 2:pos + 2 + n].decode())
+                        pos += 2 + n + 1
+                        granted.append(0)
+                    conn.sendall(packet(SUBACK, pid + bytes(granted)))
+                elif ptype == PUBLISH:
+                    topic, payload = parse_publish(body)
+                    self._route(topic, payload)
+                elif ptype == PINGREQ:
+                    conn.sendall(packet(PINGRESP))
+                elif ptype == DISCONNECT:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with self.lock:
+                self.subs.pop(conn, None)
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _route(self, topic, payload):
+        data = publish_packet(topic, payload)
+        with self.lock:
+            targets = [c for c, pats in self.subs.items() if any(topic_matches(p, topic) for p in pats)]
+            self.stats["published"] += 1
+        for c in targets:
+            try:
+                c.sendall(data)
+                self.stats["delivered"] += 1
+            except OSError:
+                pass
+
+# ---- client ----
+
+class MiniMqttClient:
+    def __init__(self, host, port, client_id="w8", keepalive=30, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.keepalive = keepalive
+        self.sock.sendall(connect_packet(client_id, keepalive))
+        ptype, _, body = read_packet(self.sock)
+        if ptype != CONNACK or body[1:2] != b"\x00":
+            raise ConnectionError(f"broker refused connection: {body!r}")
+        self._pid = 0
+
+    def subscribe(self, topic):
+        self._pid += 1
+        self.sock.sendall(packet(SUBSCRIBE, struct.pack("!H", self._pid) + _str(topic) + b"\x00", flags=2))
+
+    def publish(self, topic, payload):
+        self.sock.sendall(publish_packet(topic, payload if isinstance(payload, bytes) else payload.encode()))
+
+    def loop(self, on_message, stop):
+        """Deliver PUBLISHes to on_message(topic, payload) until `stop` is set or the link drops."""
+        self.sock.settimeout(max(1.0, self.keepalive / 2))
+        while not stop.is_set():
+            try:
+                ptype, _, body = read_packet(self.sock)
+            except socket.timeout:
+                self.sock.sendall(packet(PINGREQ))
+                continue
+            if ptype == PUBLISH:
+                on_message(*parse_publish(body))
+
+    def close(self):
+        try:
+            self.sock.sendall(packet(DISCONNECT))
+        except OSError:
+            pass
+        self.sock.close()
+
+# ---- fake board ----
+
+def fake_board(host, port, prefix="thing", rate=20.0, stop=None, variables=None):
+    """Publish accelerometer x/y/z at `rate` Hz; payload is {"v": value, "t": send_time}."""
+    variables = variables or ("accelerometer_x", "accelerometer_y", "accelerometer_z")
+    stop = stop or threading.Event()
+    client = MiniMqttClient(host, port, client_id="fake-board")
+    period, next_t, k = 1.0 / rate, time.monotonic(), 0
+    try:
+        while not stop.is_set():
+            t = k / rate
+            values = (0.15 * math.sin(2 * math.pi * 1.8 * t) + random.gauss(0, 0.02),
+                      0.10 * math.cos(2 * math.pi * 1.8 * t) + random.gauss(0, 0.02),
+                      1.0 + 0.08 * math.sin(2 * math.pi * 1.8 * t + 0.7) + random.gauss(0, 0.02))
+            for name, v in zip(variables, values):
+                client.publish(f"{prefix}/{name}", json.dumps({"v": v, "t": time.time()}))
+            k += 1
+            next_t += period
+            stop.wait(max(0.0, next_t - time.monotonic()))
+    finally:
+        client.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Local MQTT stand-in for Arduino IoT Cloud")
+    ap.add_argument("role", choices=["broker", "board", "both"])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=1883)
+    ap.add_argument("--prefix", default="thing", help="Topic prefix: <prefix>/<variable>")
+    ap.add_argument("--rate", type=float, default=20.0, help="Board samples/s")
+    args = ap.parse_args()
+
+    if args.role in ("broker", "both"):
+        broker = StandInBroker(args.host, args.port).start()
+        print(f"[broker] listening on {broker.host}:{broker.port}")
+    try:
+        if args.role in ("board", "both"):
+            print(f"[board] publishing {args.prefix}/accelerometer_x|y|z at {args.rate:g} Hz")
+            fake_board(args.host, args.port, args.prefix, args.rate)
+        else:
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
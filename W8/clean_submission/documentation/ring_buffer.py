@@ -0,0 +1,107 @@
+"""
+Preallocated NumPy ring buffer for the W8 live dashboard.
+
+Replaces `buffer_a` (a deque of tuples that on_tick turned into DataFrames
+twice per tick and rebuilt row by row whenever a window was cut). There is one
+producer (the acquisition thread) and any number of readers (browser
+callbacks, the /stream endpoint, the window archiver). No locks are taken:
+
+- Every sample is written twice, at slot i and at i + capacity (a "mirrored"
+  buffer). Any run of up to `capacity` consecutive samples is therefore one
+  contiguous slice, and `last(k)`, `since(seq)` and `window(seq, n)` all
+  return views without copying, even across the wrap point.
+- The producer fills both slots and only then advances `head`. A Python int
+  store is atomic under the GIL, so readers never see a half-written row.
+- A view stays valid until the producer has written `capacity - len(view)`
+  more samples. `valid(seq)` tells a slow reader whether its oldest row has
+  been overwritten. Take a `.copy()` if you need to keep rows longer.
+
+Rows carry a 1-based sequence number, so a reader can ask for "everything
+after the last seq I saw".
+"""
+import numpy as np
+
+SAMPLE_DTYPE = np.dtype([
+    ("seq", "<i8"),
+    ("ts", "datetime64[us]"),
+    ("x", "<f8"),
+    ("y", "<f8"),
+    ("z", "<f8"),
+    ("label", "<U8"),
+])
+
+class RingBuffer:
+    def __init__(self, capacity, dtype=SAMPLE_DTYPE):
+        self.capacity = int(capacity)
+        self.buf = np.zeros(2 * self.capacity, dtype=dtype)
+        self.head = 0   # number of samples written == seq of the newest one
+
+    def append(self, ts, x, y, z, label=""):
+        """Producer only. Returns the new sample's seq."""
+        seq = self.head + 1
+        i = (seq - 1) % self.capacity
+        row = (seq, ts, x, y, z, label)
+        self.buf[i] = row
+        self.buf[i + self.capacity] = row
+        self.head = seq
+        return seq
+
+    def extend(self, rows):
+        """Producer only: append a structured array (or list of tuples without seq) in one go."""
+        rows = np.asarray(rows, dtype=self.buf.dtype) if not isinstance(rows, np.ndarray) else rows
+        n = len(rows)
+        if not n:
+            return self.head
+        if n > self.capacity:
+            rows = rows[-self.capacity:]
+            self.head += n - self.capacity
+            n = self.capacity
+        first = self.head + 1
+        block = np.empty(n, dtype=self.buf.dtype)
+        for name in self.buf.dtype.names:
+            if name != "seq":
+                block[name] = rows[name]
+        block["seq"] = np.arange(first, first + n)
+        start = (first - 1) % self.capacity
+        head_part = min(n, self.capacity - start)
+        for off in (0, self.capacity):
+            self.buf[start + off:start + off + head_part] = block[:head_part]
+            if head_part < n:
+                self.buf[off:off + n - head_part] = block[head_part:]
+        self.head = first + n - 1
+        return self.head
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    @property
+    def oldest(self):
+        """seq of the oldest sample still held (0 when empty)."""
+        return max(1, self.head - self.capacity + 1) if self.head else 0
+
+    def valid(self, seq):
+        """True if sample `seq` has not been overwritten yet."""
+        return seq >= self.oldest
+
+    def _view(self, first, n):
+        i = (first - 1) % self.capacity
+        return self.buf[i:i + n]
+
+    def last(self, k):
+        """View of the newest min(k, len) samples, oldest first."""
+        head = self.head
+        n = min(k, head, self.capacity)
+        return self._view(head - n + 1, n) if n else self.buf[:0]
+
+    def since(self, seq, limit=None):
+        """View of samples with seq > `seq` (at most `limit`, newest kept)."""
+        head = self.head
+        n = min(head - seq, self.capacity, limit or self.capacity)
+        return self._view(head - n + 1, n) if n > 0 else self.buf[:0]
+
+    def window(self, first, n):
+        """View of samples first .. first + n - 1, or None if not all written or already overwritten."""
+        head = self.head
+        if first + n - 1 > head or first < max(1, head - self.capacity + 1) or n > self.capacity:
+            return None
+        return self._view(first, n)
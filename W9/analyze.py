@@ -1,26 +1,100 @@
+import argparse
+import time
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import sys
 from pathlib import Path
 
-CSV = "deskcoach_session.csv"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.fastplot import Plotter, add_plot_args, decimate
+from shared.session_store import load_frame
+from posture_stream import BASELINE_N, SLOUCH_DELTA, CsvTail, summary_text
+from episodes import episodes_path, save_episodes, segment
+
+CSV = "deskcoach_session.csv"   # read from deskcoach_session.parquet once migrated
+
+def plot_pitch(plotter, path, ts, pitch, baseline, points=None):
+    import matplotlib.dates as mdates
+    with plotter.figure(path, figsize=(12, 6)) as (fig, ax):
+        plotter.line(ax, ts, pitch, points=points, linewidth=1, alpha=0.7, label="Pitch")
+        
+        # Add baseline and threshold lines
+        ax.axhline(y=baseline, color='green', linestyle='--', 
+                   label=f'Baseline ({baseline}°)')
+        ax.axhline(y=baseline + SLOUCH_DELTA, color='red', linestyle='--', 
+                   label=f'Slouch Threshold ({baseline + SLOUCH_DELTA}°)')
+        ax.axhline(y=baseline - SLOUCH_DELTA, color='red', linestyle='--')
+        
+        # Formatting
+        ax.set_title("Chair Pitch Over Time - Desk Coach Session")
+        ax.set_xlabel("Time")
+        ax.set_ylabel("Pitch (degrees)")
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        
+        # Format x-axis dates
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+        ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=5))
+        ax.tick_params(axis="x", labelrotation=45)
+        fig.tight_layout()
+
+def plot_summary(plotter, path, kpi):
+    """Bar chart of the key statistics."""
+    with plotter.figure(path, figsize=(10, 6)) as (fig, ax):
+        categories = ['Duration\n(min)', 'Slouching\n(%)', 'Min Pitch\n(°)', 'Max Pitch\n(°)', 'Avg Pitch\n(°)']
+        values = [kpi['Duration_min'], kpi['Pct_Slouch'], kpi['Min_pitch_deg'], 
+                 kpi['Max_pitch_deg'], kpi['Avg_pitch_deg']]
+        colors = ['blue', 'green' if kpi['Pct_Slouch'] == 0 else 'orange', 'purple', 'red', 'teal']
+        
+        bars = ax.bar(categories, values, color=colors, alpha=0.7)
+        ax.set_title("Desk Coach Session Summary")
+        ax.set_ylabel("Values")
+        
+        # Add value labels on bars
+        for bar, value in zip(bars, values):
+            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
+                    f'{value}', ha='center', va='bottom', fontweight='bold')
+        
+        ax.grid(True, alpha=0.3, axis='y')
+        fig.tight_layout()
+
+def incremental(csv):
+    """KPIs only, from the checkpointed incremental engine: just the rows added since the last run are read."""
+    t0 = time.perf_counter()
+    tail = CsvTail(csv)
+    added = tail.poll()
+    kpi = tail.stats.kpi()
+    print(f"Processed {added} new rows ({tail.stats.rows} total) in {1000 * (time.perf_counter() - t0):.1f} ms")
+    print("\n=== SESSION ANALYSIS ===")
+    for key, value in kpi.items():
+        print(f"{key}: {value}")
+    Path("session_summary.txt").write_text(summary_text(kpi), encoding="utf-8")
+    print(f"\nSession summary saved to session_summary.txt")
 
 def main():
-    # Load data
-    df = pd.read_csv(CSV)
+    ap = argparse.ArgumentParser(description="Desk-coach session analysis")
+    ap.add_argument("--csv", default=CSV)
+    ap.add_argument("--incremental", action="store_true",
+                    help="KPIs only, via posture_stream's checkpoint (no plots, no full re-read)")
+    add_plot_args(ap, dpi=300)
+    args = ap.parse_args()
+    if args.incremental:
+        return incremental(args.csv)
+
+    # Load data (timestamps come back parsed)
+    df = load_frame(args.csv, columns=["timestamp_iso", "pitch_deg"])
     print("Columns found:", df.columns.tolist())
     print("Data shape:", df.shape)
     
-    # Convert timestamp to datetime
-    df["timestamp"] = pd.to_datetime(df["timestamp_iso"], errors="coerce")
+    df["timestamp"] = df["timestamp_iso"]
     df = df.dropna(subset=["timestamp"]).sort_values("timestamp")
     
     # Convert pitch_deg to numeric
     df["pitch_deg"] = pd.to_numeric(df["pitch_deg"], errors="coerce")
     
     # Calculate baseline pitch from first 10 readings
-    BASELINE_PITCH = df["pitch_deg"].dropna().iloc[:10].mean() if len(df["pitch_deg"].dropna()) > 0 else 0.0
-    SLOUCH_DELTA = 8.0
+    BASELINE_PITCH = df["pitch_deg"].dropna().iloc[:BASELINE_N].mean() if len(df["pitch_deg"].dropna()) > 0 else 0.0
     
     print(f"Baseline pitch: {BASELINE_PITCH:.1f} degrees")
     print(f"Slouch threshold: {BASELINE_PITCH + SLOUCH_DELTA:.1f}° (upper), {BASELINE_PITCH - SLOUCH_DELTA:.1f}° (lower)")
@@ -46,6 +120,13 @@ def main():
         print("Sample slouching readings:")
         print(slouch_readings[["timestamp", "pitch_deg", "posture_state"]].head())
     
+    # Slouch episodes as an interval table next to the session (query with episodes.py)
+    episodes = segment(df["timestamp"].to_numpy(), df["pitch_deg"].to_numpy(), BASELINE_PITCH)
+    save_episodes(episodes, episodes_path(args.csv))
+    if len(episodes) > 0:
+        print(f"Slouch episodes: {len(episodes)}, longest {episodes['duration_s'].max():.0f}s "
+              f"-> {episodes_path(args.csv).name}")
+
     # Summary KPIs
     kpi = {
         "Duration_min": round(duration_min, 1),
@@ -60,77 +141,21 @@ def main():
     for key, value in kpi.items():
         print(f"{key}: {value}")
     
-    # Create plots using matplotlib (more reliable)
+    # Plots: decimated to the output width, optionally rendered in worker processes
+    t0 = time.perf_counter()
     try:
-        import matplotlib.pyplot as plt
-        import matplotlib.dates as mdates
-        
-        # Create the plot
-        plt.figure(figsize=(12, 6))
-        plt.plot(df["timestamp"], df["pitch_deg"], linewidth=1, alpha=0.7, label="Pitch")
-        
-        # Add baseline and threshold lines
-        plt.axhline(y=BASELINE_PITCH, color='green', linestyle='--', 
-                   label=f'Baseline ({BASELINE_PITCH}°)')
-        plt.axhline(y=BASELINE_PITCH + SLOUCH_DELTA, color='red', linestyle='--', 
-                   label=f'Slouch Threshold ({BASELINE_PITCH + SLOUCH_DELTA}°)')
-        plt.axhline(y=BASELINE_PITCH - SLOUCH_DELTA, color='red', linestyle='--')
-        
-        # Formatting
-        plt.title("Chair Pitch Over Time - Desk Coach Session")
-        plt.xlabel("Time")
-        plt.ylabel("Pitch (degrees)")
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        
-        # Format x-axis dates
-        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-        plt.gca().xaxis.set_major_locator(mdates.MinuteLocator(interval=5))
-        plt.xticks(rotation=45)
-        
-        # Save plot
-        plt.tight_layout()
-        plt.savefig("plot_pitch.png", dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print("Saved: plot_pitch.png")
-        
-        # Create a summary plot with key statistics
-        plt.figure(figsize=(10, 6))
-        categories = ['Duration\n(min)', 'Slouching\n(%)', 'Min Pitch\n(°)', 'Max Pitch\n(°)', 'Avg Pitch\n(°)']
-        values = [kpi['Duration_min'], kpi['Pct_Slouch'], kpi['Min_pitch_deg'], 
-                 kpi['Max_pitch_deg'], kpi['Avg_pitch_deg']]
-        colors = ['blue', 'green' if kpi['Pct_Slouch'] == 0 else 'orange', 'purple', 'red', 'teal']
-        
-        bars = plt.bar(categories, values, color=colors, alpha=0.7)
-        plt.title("Desk Coach Session Summary")
-        plt.ylabel("Values")
-        
-        # Add value labels on bars
-        for bar, value in zip(bars, values):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                    f'{value}', ha='center', va='bottom', fontweight='bold')
-        
-        plt.grid(True, alpha=0.3, axis='y')
-        plt.tight_layout()
-        plt.savefig("plot_summary.png", dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print("Saved: plot_summary.png")
-        
+        plotter = Plotter(args.dpi, args.max_points, args.plot_workers)
+        bins = args.max_points // 2 if args.max_points is not None else 12 * args.dpi
+        ts, pitch = decimate(df["timestamp"].to_numpy(), df["pitch_deg"].to_numpy(), bins)
+        plotter.submit(plot_pitch, "plot_pitch.png", ts, pitch, BASELINE_PITCH, len(df))
+        plotter.submit(plot_summary, "plot_summary.png", kpi)
+        plotter.close()
+        plotter.report(time.perf_counter() - t0)
     except Exception as e:
         print(f"Plotting not available: {e}")
     
     # Save summary
-    summary = (
-        f"Duration (min): {kpi['Duration_min']}\n"
-        f"Slouching (%): {kpi['Pct_Slouch']}\n"
-        f"Baseline pitch (deg): {kpi['Baseline_pitch_deg']}\n"
-        f"Pitch range: {kpi['Min_pitch_deg']} to {kpi['Max_pitch_deg']}\n"
-        f"Average pitch (deg): {kpi['Avg_pitch_deg']}\n"
-    )
-    
-    Path("session_summary.txt").write_text(summary, encoding="utf-8")
+    Path("session_summary.txt").write_text(summary_text(kpi), encoding="utf-8")
     print(f"\nSession summary saved to session_summary.txt")
     
     # Show sample data
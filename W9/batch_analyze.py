@@ -0,0 +1,212 @@
+"""
+Batch posture analysis over many desk-coach sessions.
+
+analyze.py handles one hard-coded session and renders two 300-dpi PNGs on
+every run. This script takes globs and/or directories of sessions (CSV files
+or Parquet datasets, e.g. sessions/<user>/<day>.csv) and spreads them over a
+ProcessPoolExecutor. Each worker loads one session and computes the
+analyze.py KPIs with posture_stream.PostureStats. The results go into one
+table (--out .parquet or .csv), one row per session, with the source path,
+size and mtime.
+
+Reruns are incremental. A session whose size and mtime match its row in the
+existing table is not read again. Only new or changed sessions go to the pool,
+and the table is rewritten atomically at the end.
+
+Plotting is optional and runs after all KPIs are written (--plots DIR). It
+uses shared/fastplot.py (Agg, min/max decimation to the pixel width, one
+reused figure per worker) at --dpi (default 100), and skips any PNG newer
+than its session.
+
+Workers are single-threaded (Arrow and BLAS pools pinned to one thread), so
+N processes don't oversubscribe N cores. Small sessions are handed out in
+chunks to amortise IPC. Throughput should scale with --workers until disk
+reads become the bottleneck.
+
+    python batch_analyze.py sessions/ --out kpis.parquet
+    python batch_analyze.py "sessions/*/2025-10-*.csv" --out kpis.csv --workers 8 --plots plots/
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.fastplot import Plotter
+from shared.session_store import load_frame
+from posture_stream import SLOUCH_DELTA, PostureStats
+
+KPI_KEYS = ["Duration_min", "Pct_Slouch", "Baseline_pitch_deg", "Min_pitch_deg", "Max_pitch_deg", "Avg_pitch_deg"]
+META = ["session", "size", "mtime_ns"]
+_plotters = {}   # per worker process
+
+def find_sessions(patterns):
+    """Expand globs and directories into session paths (CSV files and *.parquet datasets)."""
+    found = []
+    for pattern in patterns:
+        p = Path(pattern)
+        if p.is_dir() and p.suffix.lower() != ".parquet":
+            hits = [q for q in p.rglob("*") if q.suffix.lower() in (".csv", ".parquet")
+                    and not any(part.endswith(".parquet") for part in q.relative_to(p).parts[:-1])]
+        else:
+            hits = [Path(q) for q in glob.glob(pattern, recursive=True)]
+        found += [q for q in hits if not q.name.startswith(".") and q.suffix.lower() in (".csv", ".parquet")]
+    # A CSV that was migrated is read from its Parquet copy anyway
+    paths = {str(q) for q in found}
+    return sorted(q for q in set(paths)
+                  if not (q.lower().endswith(".csv") and q[:-4] + ".parquet" in paths))
+
+def stamp(path):
+    """(size, mtime_ns) of a session; datasets use their newest part file."""
+    p = Path(path)
+    if p.is_dir():
+        parts = [f.stat() for f in p.rglob("*.parquet") if f.is_file()]
+        return sum(s.st_size for s in parts), max((s.st_mtime_ns for s in parts), default=0)
+    st = p.stat()
+    return st.st_size, st.st_mtime_ns
+
+def _init_worker():
+    # One thread per process: parallelism comes from the pool
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    try:
+        import pyarrow
+        pyarrow.set_cpu_count(1)
+        pyarrow.set_io_thread_count(1)
+    except ImportError:
+        pass
+
+def load_session(path):
+    df = load_frame(path, columns=["timestamp_iso", "pitch_deg"])
+    df = df.dropna(subset=["timestamp_iso"]).sort_values("timestamp_iso", kind="stable")
+    ts = df["timestamp_iso"]
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_convert(None)
+    secs = (ts - pd.Timestamp(0)).dt.total_seconds().to_numpy(dtype=np.float64)
+    pitch = pd.to_numeric(df["pitch_deg"], errors="coerce").to_numpy(dtype=np.float64)
+    return ts, secs, pitch
+
+def analyze_session(path):
+    """KPI row for one session. Errors are returned in the row, not raised, so one bad file doesn't stop the batch."""
+    size, mtime_ns = stamp(path)
+    row = {"session": path, "size": size, "mtime_ns": mtime_ns}
+    try:
+        _, secs, pitch = load_session(path)
+        stats = PostureStats()
+        stats.update(secs, pitch)
+        row.update(stats.kpi(), rows=stats.rows, error="")
+    except Exception as e:
+        row.update({k: float("nan") for k in KPI_KEYS}, rows=0, error=f"{type(e).__name__}: {e}")
+    return row
+
+def plot_session(job):
+    """Pitch-over-time PNG for one session (same look as analyze.py's plot_pitch.png)."""
+    path, png, baseline, dpi, max_points = job
+    # One Plotter per worker process, so its figure is reused across sessions
+    plotter = _plotters.setdefault((dpi, max_points), Plotter(dpi, max_points, verbose=False))
+    ts, _, pitch = load_session(path)
+    with plotter.figure(png, figsize=(12, 6)) as (fig, ax):
+        plotter.line(ax, ts.to_numpy(), pitch, linewidth=1, alpha=0.7, label="Pitch")
+        ax.axhline(y=baseline, color="green", linestyle="--", label=f"Baseline ({baseline}°)")
+        ax.axhline(y=baseline + SLOUCH_DELTA, color="red", linestyle="--",
+                   label=f"Slouch Threshold ({baseline + SLOUCH_DELTA}°)")
+        ax.axhline(y=baseline - SLOUCH_DELTA, color="red", linestyle="--")
+        ax.set_title(f"Chair Pitch Over Time - {Path(path).name}")
+        ax.set_xlabel("Time")
+        ax.set_ylabel("Pitch (degrees)")
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        fig.autofmt_xdate()
+    return plotter.rows.pop()
+
+def read_table(out):
+    out = Path(out)
+    if not out.exists():
+        return pd.DataFrame(columns=META)
+    return pd.read_csv(out) if out.suffix.lower() == ".csv" else pd.read_parquet(out)
+
+def write_table(df, out):
+    out = Path(out)
+    tmp = out.with_name(out.name + ".tmp")
+    if out.suffix.lower() == ".csv":
+        df.to_csv(tmp, index=False)
+    else:
+        df.to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, out)
+
+def png_name(session, root):
+    """sessions/alice/2025-10-01.csv -> alice__2025-10-01.png (unique per session)."""
+    rel = os.path.relpath(session, root) if root else session
+    return Path(rel).with_suffix("").as_posix().replace("/", "__") + ".png"
+
+def main():
+    ap = argparse.ArgumentParser(description="KPIs for many desk-coach sessions in parallel")
+    ap.add_argument("sessions", nargs="+", help="Globs and/or directories of session CSVs / Parquet datasets")
+    ap.add_argument("--out", default="session_kpis.parquet", help="Consolidated KPI table (.parquet or .csv)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes (default: all cores)")
+    ap.add_argument("--force", action="store_true", help="Re-analyse every session, even if up to date")
+    ap.add_argument("--plots", help="Also write a pitch PNG per session into this directory (after the KPIs)")
+    ap.add_argument("--dpi", type=int, default=100, help="PNG resolution for --plots")
+    ap.add_argument("--max-points", type=int, default=None,
+                    help="Max points drawn per plot (default: 2 per pixel column; 0 = all)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    paths = find_sessions(args.sessions)
+    if not paths:
+        raise SystemExit(f"No sessions match {args.sessions}")
+
+    old = read_table(args.out)
+    known = {} if args.force else {r.session: (r.size, r.mtime_ns) for r in old[META].itertuples(index=False)}
+    todo = [p for p in paths if known.get(p) != stamp(p)]
+    print(f"[batch] {len(paths)} sessions, {len(paths) - len(todo)} up to date, "
+          f"{len(todo)} to analyse on {args.workers} workers")
+
+    rows = []
+    if todo:
+        chunksize = max(1, len(todo) // (args.workers * 8))
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+            for i, row in enumerate(pool.map(analyze_session, todo, chunksize=chunksize), 1):
+                rows.append(row)
+                if i % 100 == 0 or i == len(todo):
+                    print(f"[batch] {i}/{len(todo)} analysed", end="\r", flush=True)
+        print()
+    t_kpi = time.perf_counter() - t0
+
+    fresh = pd.DataFrame(rows)
+    keep = old[old["session"].isin(set(paths) - set(todo))] if len(old) else old
+    table = pd.concat([t for t in (keep, fresh) if len(t)], ignore_index=True)
+    table = table.sort_values("session").reset_index(drop=True)
+    write_table(table, args.out)
+    failed = table[table["error"].fillna("") != ""] if "error" in table else table.iloc[:0]
+    rate = f" ({len(todo) / t_kpi:,.0f} sessions/s)" if todo else ""
+    print(f"[batch] {len(table)} sessions -> {args.out} in {t_kpi:.2f}s{rate}, {len(failed)} failed")
+    for r in failed.head(10).itertuples(index=False):
+        print(f"  {r.session}: {r.error}")
+
+    if args.plots:
+        plot_dir = Path(args.plots)
+        plot_dir.mkdir(parents=True, exist_ok=True)
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+        jobs = []
+        for r in table[table["error"].fillna("") == ""].itertuples(index=False):
+            png = plot_dir / png_name(os.path.abspath(r.session), root)
+            if args.force or not png.exists() or png.stat().st_mtime_ns < r.mtime_ns:
+                jobs.append((r.session, str(png), r.Baseline_pitch_deg, args.dpi, args.max_points))
+        t1 = time.perf_counter()
+        timings = []
+        if jobs:
+            with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+                timings = list(pool.map(plot_session, jobs, chunksize=max(1, len(jobs) // (args.workers * 8))))
+        points, drawn, draw_s, save_s = (sum(col) for col in zip(*[t[1:] for t in timings])) if timings else (0,) * 4
+        print(f"[batch] {len(jobs)} plots -> {plot_dir}/ in {time.perf_counter() - t1:.2f}s "
+              f"({len(table) - len(failed) - len(jobs)} up to date); {points:,} points drawn as {drawn:,}, "
+              f"draw {draw_s:.2f}s, save {save_s:.2f}s")
+
+if __name__ == "__main__":
+    main()
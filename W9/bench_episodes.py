@@ -0,0 +1,93 @@
+"""
+Benchmark for episodes.py: segmenting and querying slouch episodes on large sessions.
+
+Builds synthetic desk-coach sessions at 2 Hz: upright stretches alternating
+with forward/back slouches, plus noise. For each size it times:
+
+  segment     label + run-length pass -> episode table (episodes.segment)
+  groupby     the pandas way: label, shift/cumsum run ids, groupby.agg
+              (reference; its output is checked against segment)
+  save/load   the _episodes.parquet round trip
+  query       EpisodeIndex.overlapping() for a random 1-hour window with
+              min_duration 120 s, averaged over many queries, next to a rescan
+              of the raw rows for the same window
+
+    python bench_episodes.py --rows 1000000 10000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from episodes import EpisodeIndex, baseline_of, save_episodes, segment, slouch_mask
+
+def synth_session(n, rate_hz=2.0, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = np.datetime64("2025-01-01T08:00:00", "ns") + (np.arange(n) * (1e9 / rate_hz)).astype("timedelta64[ns]")
+    # Alternate upright stretches (~5 min) with slouches (~90 s, forward or back)
+    k = int(n / rate_hz / 190) + 2
+    lengths = np.ceil(np.column_stack([rng.exponential(300, k), rng.exponential(90, k)]).ravel() * rate_hz)
+    offset = np.zeros(2 * k)
+    offset[1::2] = rng.choice([-1, 1], k) * rng.uniform(10, 16, k)
+    shift = np.repeat(offset, lengths.astype(np.int64))[:n]
+    pitch = (8.0 + shift + rng.normal(0, 1.2, n)).round(1)
+    pitch[rng.random(n) < 0.001] = np.nan
+    return ts, pitch
+
+def groupby_episodes(ts, pitch, baseline):
+    df = pd.DataFrame({"ts": ts, "pitch": pitch})
+    df["slouch"] = slouch_mask(pitch, baseline)
+    run = (df["slouch"] != df["slouch"].shift()).cumsum()
+    g = df[df["slouch"]].groupby(run[df["slouch"]])
+    return g.agg(start=("ts", "first"), rows=("ts", "size"), mean=("pitch", "mean")).reset_index(drop=True)
+
+def timed(fn, repeat=1):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - t0) / repeat
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark slouch-episode segmentation and interval queries")
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    ap.add_argument("--queries", type=int, default=1000)
+    args = ap.parse_args()
+
+    print(f"{'rows':>11} {'episodes':>9} {'segment':>9} {'groupby':>9} {'save':>8} {'load':>8} "
+          f"{'query':>9} {'rescan':>9}")
+    for n in args.rows:
+        ts, pitch = synth_session(n)
+        baseline = baseline_of(pitch)
+        eps, t_seg = timed(lambda: segment(ts, pitch, baseline), 3)
+        ref, t_gb = timed(lambda: groupby_episodes(ts, pitch, baseline))
+        assert len(ref) == len(eps) and (ref["rows"].to_numpy() == eps["rows"].to_numpy()).all()
+        assert np.allclose(ref["mean"].to_numpy(), eps["mean_pitch_deg"].to_numpy())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bench_episodes.parquet"
+            _, t_save = timed(lambda: save_episodes(eps, path))
+            index, t_load = timed(lambda: EpisodeIndex.load(path))
+
+        rng = np.random.default_rng(1)
+        span = ts[-1] - ts[0] - np.timedelta64(3600, "s")
+        offsets = (rng.random(args.queries) * (span / np.timedelta64(1, "s"))).astype("timedelta64[s]")
+        windows = [(ts[0] + o, ts[0] + o + np.timedelta64(3600, "s")) for o in offsets]
+        _, t_q = timed(lambda: [index.overlapping(a, b, 120) for a, b in windows])
+        t_q /= args.queries
+
+        # Rescan: slice the raw rows for one window and re-segment them
+        def rescan(a, b):
+            i, j = np.searchsorted(ts, a), np.searchsorted(ts, b)
+            e = segment(ts[i:j], pitch[i:j], baseline)
+            return e[e["duration_s"] >= 120]
+        _, t_rs = timed(lambda: [rescan(a, b) for a, b in windows[:50]])
+        t_rs /= 50
+
+        print(f"{n:>11,} {len(eps):>9,} {1000 * t_seg:>7.1f}ms {1000 * t_gb:>7.0f}ms {1000 * t_save:>6.1f}ms "
+              f"{1000 * t_load:>6.1f}ms {1e6 * t_q:>7.1f}us {1e6 * t_rs:>7.0f}us")
+
+if __name__ == "__main__":
+    main()
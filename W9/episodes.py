@@ -0,0 +1,179 @@
+"""
+Slouch episodes: the SLOUCH rows of a session turned into an interval table.
+
+analyze.py labels every row OK / SLOUCH and reports one Pct_Slouch. To answer
+"every slouch longer than 2 minutes" you had to label and scan the raw rows
+again. `segment()` does one vectorised run-length pass over the labels. Run
+boundaries come from np.diff of the padded mask. Per-episode peak and mean
+pitch come from np.maximum/minimum.reduceat and a cumulative sum. No Python
+loop runs per row or per episode.
+
+One row per episode:
+
+  start, end        time of the first SLOUCH row, and of the first row after
+                    the run (the last row of the session if it never ended)
+  duration_s, rows
+  peak_pitch_deg    the reading furthest from the baseline
+  mean_pitch_deg
+  direction         "forward" / "back" (sign of the peak vs the baseline)
+
+Episodes are saved next to the session as `<name>_episodes.parquet`.
+`EpisodeIndex` loads them as sorted start/end arrays. Episodes never overlap,
+so both arrays are sorted. A time-range query is two binary searches and a
+slice, O(log n).
+
+    python episodes.py deskcoach_session.csv                      # segment + save
+    python episodes.py deskcoach_session.csv --min-duration 120   # slouches > 2 min
+    python episodes.py deskcoach_session.csv --start 2025-09-28T10:00 --end 2025-09-28T11:00
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.session_store import load_frame, resolve
+from posture_stream import BASELINE_N, SLOUCH_DELTA
+
+COLUMNS = ["start", "end", "duration_s", "rows", "peak_pitch_deg", "mean_pitch_deg", "direction"]
+
+def baseline_of(pitch, n=BASELINE_N):
+    valid = pitch[~np.isnan(pitch)][:n]
+    return float(valid.mean()) if len(valid) else 0.0
+
+def slouch_mask(pitch, baseline, delta=SLOUCH_DELTA):
+    """Same rule as analyze.py's posture_state (NaN pitch counts as OK)."""
+    with np.errstate(invalid="ignore"):
+        return np.abs(pitch - baseline) > delta
+
+def segment(ts, pitch, baseline=None, delta=SLOUCH_DELTA):
+    """Episode table for a time-sorted session. ts: datetime64 array, pitch: float array."""
+    ts = np.asarray(ts, dtype="datetime64[ns]")
+    pitch = np.asarray(pitch, dtype=np.float64)
+    if baseline is None:
+        baseline = baseline_of(pitch)
+    mask = slouch_mask(pitch, baseline, delta)
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)          # one past the last SLOUCH row
+    if not len(starts):
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in zip(
+            COLUMNS, ["datetime64[ns]", "datetime64[ns]", "float64", "int64", "float64", "float64", "object"])})
+
+    # Every run holds only SLOUCH rows (so no NaN); reduce over [start, stop) slices
+    bounds = np.column_stack([starts, stops]).ravel()
+    if bounds[-1] == len(pitch):
+        bounds = bounds[:-1]                     # reduceat can't take len(pitch); the last slice runs to the end
+    hi = np.maximum.reduceat(pitch, bounds)[::2]
+    lo = np.minimum.reduceat(pitch, bounds)[::2]
+    csum = np.concatenate(([0.0], np.cumsum(np.where(mask, pitch, 0.0))))
+    rows = stops - starts
+    mean = (csum[stops] - csum[starts]) / rows
+    forward = (hi - baseline) >= (baseline - lo)
+    start_t = ts[starts]
+    end_t = ts[np.minimum(stops, len(ts) - 1)]
+    return pd.DataFrame({
+        "start": start_t,
+        "end": end_t,
+        "duration_s": (end_t - start_t) / np.timedelta64(1, "s"),
+        "rows": rows,
+        "peak_pitch_deg": np.where(forward, hi, lo),
+        "mean_pitch_deg": mean,
+        "direction": np.where(forward, "forward", "back"),
+    })
+
+def load_session(path):
+    """(ts, pitch) of a session, time-sorted, rows without a timestamp dropped (as analyze.py does)."""
+    df = load_frame(path, columns=["timestamp_iso", "pitch_deg"])
+    df = df.dropna(subset=["timestamp_iso"]).sort_values("timestamp_iso", kind="stable")
+    ts = df["timestamp_iso"]
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_convert(None)
+    return ts.to_numpy(dtype="datetime64[ns]"), pd.to_numeric(df["pitch_deg"], errors="coerce").to_numpy(np.float64)
+
+def episodes_path(session):
+    """deskcoach_session.csv -> deskcoach_session_episodes.parquet (also for a migrated .parquet)."""
+    p = resolve(session)
+    return p.with_name(f"{p.stem}_episodes.parquet")
+
+def save_episodes(df, path):
+    df.to_parquet(path, index=False, compression="zstd")
+    return path
+
+def _ns(value):
+    if isinstance(value, np.datetime64):
+        return value.astype("datetime64[ns]")
+    return np.datetime64(pd.Timestamp(value).tz_localize(None), "ns")
+
+class EpisodeIndex:
+    """Sorted interval index over a session's episodes."""
+
+    def __init__(self, episodes):
+        self.df = episodes.sort_values("start", kind="stable").reset_index(drop=True)
+        self.starts = self.df["start"].to_numpy(dtype="datetime64[ns]")
+        self.ends = self.df["end"].to_numpy(dtype="datetime64[ns]")
+        self.durations = self.df["duration_s"].to_numpy()
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_parquet(path))
+
+    @classmethod
+    def for_session(cls, session, rebuild=False):
+        """Episodes of `session`, re-segmented if the saved table is missing or older than the session."""
+        path = episodes_path(session)
+        src = resolve(session)
+        if not rebuild and path.exists() and path.stat().st_mtime >= src.stat().st_mtime:
+            return cls.load(path)
+        ts, pitch = load_session(session)
+        df = segment(ts, pitch)
+        save_episodes(df, path)
+        return cls(df)
+
+    def __len__(self):
+        return len(self.df)
+
+    def _slice(self, start=None, end=None):
+        """Positions [i, j) of episodes overlapping [start, end)."""
+        i = 0 if start is None else int(np.searchsorted(self.ends, _ns(start), "right"))
+        j = len(self.df) if end is None else int(np.searchsorted(self.starts, _ns(end), "left"))
+        return i, max(i, j)
+
+    def overlapping(self, start=None, end=None, min_duration_s=0.0):
+        """Episodes that overlap [start, end), optionally only those lasting at least min_duration_s."""
+        i, j = self._slice(start, end)
+        if not min_duration_s:
+            return self.df.iloc[i:j]
+        return self.df.take(i + np.flatnonzero(self.durations[i:j] >= min_duration_s))
+
+    def total_s(self, start=None, end=None):
+        """Seconds spent slouching within [start, end) (episodes clipped to the range)."""
+        i, j = self._slice(start, end)
+        s, e = self.starts[i:j], self.ends[i:j]
+        if start is not None:
+            s = np.maximum(s, _ns(start))
+        if end is not None:
+            e = np.minimum(e, _ns(end))
+        return float(((e - s) / np.timedelta64(1, "s")).sum())
+
+def main():
+    ap = argparse.ArgumentParser(description="Segment a desk-coach session into slouch episodes and query them")
+    ap.add_argument("session", nargs="?", default="deskcoach_session.csv")
+    ap.add_argument("--start", help="Only episodes overlapping [start, end)")
+    ap.add_argument("--end")
+    ap.add_argument("--min-duration", type=float, default=0.0, help="Only episodes at least this long (s)")
+    ap.add_argument("--rebuild", action="store_true", help="Re-segment even if the saved episodes are current")
+    args = ap.parse_args()
+
+    index = EpisodeIndex.for_session(args.session, rebuild=args.rebuild)
+    hits = index.overlapping(args.start, args.end, args.min_duration)
+    print(f"[episodes] {len(index)} episodes in {episodes_path(args.session)}; "
+          f"{len(hits)} match, {index.total_s(args.start, args.end):.0f}s slouching in range")
+    if len(hits):
+        with pd.option_context("display.width", 120, "display.max_rows", 40):
+            print(hits.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Incremental posture KPIs for desk-coach sessions.
+
+analyze.py re-reads the whole session, labels every row and only then
+reports. `PostureStats` keeps the same KPIs as running state, updated in O(1)
+per sample:
+
+  duration, rows, slouch count / %, baseline (mean of the first BASELINE_N
+  pitch readings), min / max / mean pitch
+
+Rows that arrive before the baseline exists are held (at most BASELINE_N)
+and labelled once it is known. The final numbers therefore match analyze.py
+on the same file.
+
+`CsvTail` consumes a CSV that serial_logger_lite.py is still appending to.
+It reads only complete lines after the last byte offset it processed. The
+offset and the stats are saved to a checkpoint next to the file
+(`.<name>.kpi.json`), so a rerun on a grown file parses just the new bytes.
+If the file was truncated or replaced (its first line changed), it starts
+over.
+
+    python posture_stream.py deskcoach_session.csv            # catch up, print KPIs
+    python posture_stream.py deskcoach_session.csv --follow   # keep tailing
+    python serial_logger_lite.py --port /dev/ttyUSB0 | python posture_stream.py --stdin
+"""
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASELINE_N = 10        # pitch readings averaged for the baseline
+SLOUCH_DELTA = 8.0     # degrees either side of the baseline
+COLUMNS = ["timestamp_iso", "temp_c", "hum_pct", "pitch_deg"]
+
+class PostureStats:
+    def __init__(self, baseline_n=BASELINE_N, slouch_delta=SLOUCH_DELTA):
+        self.baseline_n = baseline_n
+        self.slouch_delta = slouch_delta
+        self.rows = 0
+        self.slouch = 0
+        self.n_pitch = 0
+        self.sum_pitch = 0.0
+        self.min_pitch = math.inf
+        self.max_pitch = -math.inf
+        self.first_ts = None       # epoch seconds
+        self.last_ts = None
+        self.baseline = None
+        self.pending = []          # pitches seen before the baseline was known
+
+    def _is_slouch(self, pitch):
+        return not math.isnan(pitch) and abs(pitch - self.baseline) > self.slouch_delta
+
+    def update_one(self, ts, pitch):
+        """Add one row (ts in epoch seconds; pitch may be NaN)."""
+        if ts is None or math.isnan(ts):
+            return
+        self.rows += 1
+        self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+        if not math.isnan(pitch):
+            self.n_pitch += 1
+            self.sum_pitch += pitch
+            self.min_pitch = min(self.min_pitch, pitch)
+            self.max_pitch = max(self.max_pitch, pitch)
+        if self.baseline is None:
+            self.pending.append(pitch)
+            valid = [p for p in self.pending if not math.isnan(p)]
+            if len(valid) >= self.baseline_n:
+                self.baseline = sum(valid[:self.baseline_n]) / self.baseline_n
+                self.slouch += sum(self._is_slouch(p) for p in self.pending)
+                self.pending = []
+        elif self._is_slouch(pitch):
+            self.slouch += 1
+
+    def update(self, ts, pitch):
+        """Add a batch: arrays of epoch seconds and pitch. Same result as update_one per row, vectorised."""
+        ts = np.asarray(ts, dtype=np.float64)
+        pitch = np.asarray(pitch, dtype=np.float64)
+        keep = ~np.isnan(ts)
+        ts, pitch = ts[keep], pitch[keep]
+        # Rows up to the baseline go through the scalar path; the rest in one go
+        i = 0
+        while self.baseline is None and i < len(ts):
+            self.update_one(float(ts[i]), float(pitch[i]))
+            i += 1
+        ts, pitch = ts[i:], pitch[i:]
+        if not len(ts):
+            return
+        self.rows += len(ts)
+        self.first_ts = float(ts.min()) if self.first_ts is None else min(self.first_ts, float(ts.min()))
+        self.last_ts = float(ts.max()) if self.last_ts is None else max(self.last_ts, float(ts.max()))
+        valid = pitch[~np.isnan(pitch)]
+        if len(valid):
+            self.n_pitch += len(valid)
+            self.sum_pitch += float(valid.sum())
+            self.min_pitch = min(self.min_pitch, float(valid.min()))
+            self.max_pitch = max(self.max_pitch, float(valid.max()))
+            self.slouch += int((np.abs(valid - self.baseline) > self.slouch_delta).sum())
+
+    def kpi(self):
+        """Same keys and rounding as analyze.py."""
+        # Before BASELINE_N readings, use what there is (analyze.py takes the first up-to-10)
+        valid = [p for p in self.pending if not math.isnan(p)]
+        baseline = self.baseline if self.baseline is not None else (sum(valid) / len(valid) if valid else 0.0)
+        slouch = self.slouch if self.baseline is not None else \
+            sum(abs(p - baseline) > self.slouch_delta for p in valid)
+        has_pitch = self.n_pitch > 0
+        return {
+            "Duration_min": round((self.last_ts - self.first_ts) / 60, 1) if self.rows else 0.0,
+            "Pct_Slouch": round(100 * slouch / self.rows, 3) if self.rows else 0.0,
+            "Baseline_pitch_deg": round(baseline, 1),
+            "Min_pitch_deg": round(self.min_pitch, 1) if has_pitch else float("nan"),
+            "Max_pitch_deg": round(self.max_pitch, 1) if has_pitch else float("nan"),
+            "Avg_pitch_deg": round(self.sum_pitch / self.n_pitch, 1) if has_pitch else float("nan"),
+        }
+
+    def to_dict(self):
+        d = dict(self.__dict__)
+        d["min_pitch"] = None if math.isinf(self.min_pitch) else self.min_pitch
+        d["max_pitch"] = None if math.isinf(self.max_pitch) else self.max_pitch
+        d["pending"] = [None if math.isnan(p) else p for p in self.pending]
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["baseline_n"], d["slouch_delta"])
+        s.__dict__.update(d)
+        s.min_pitch = math.inf if d["min_pitch"] is None else d["min_pitch"]
+        s.max_pitch = -math.inf if d["max_pitch"] is None else d["max_pitch"]
+        s.pending = [math.nan if p is None else p for p in d["pending"]]
+        return s
+
+def summary_text(kpi):
+    return (
+        f"Duration (min): {kpi['Duration_min']}\n"
+        f"Slouching (%): {kpi['Pct_Slouch']}\n"
+        f"Baseline pitch (deg): {kpi['Baseline_pitch_deg']}\n"
+        f"Pitch range: {kpi['Min_pitch_deg']} to {kpi['Max_pitch_deg']}\n"
+        f"Average pitch (deg): {kpi['Avg_pitch_deg']}\n"
+    )
+
+def parse_rows(data, header):
+    """Complete CSV lines (bytes, no header) -> (epoch seconds, pitch) arrays."""
+    df = pd.read_csv(io.BytesIO(data), names=header, header=None, usecols=["timestamp_iso", "pitch_deg"],
+                     on_bad_lines="skip", encoding_errors="replace")
+    ts = pd.to_datetime(df["timestamp_iso"], errors="coerce", format="ISO8601")
+    secs = (ts - pd.Timestamp(0)).dt.total_seconds().to_numpy(dtype=np.float64, na_value=np.nan)
+    pitch = pd.to_numeric(df["pitch_deg"], errors="coerce").to_numpy(dtype=np.float64)
+    return secs, pitch
+
+class CsvTail:
+    """Incrementally analyse a growing session CSV, checkpointing the byte offset and stats."""
+
+    def __init__(self, path, checkpoint=None, chunk_bytes=8 << 20):
+        self.path = Path(path)
+        self.checkpoint = Path(checkpoint) if checkpoint else self.path.with_name(f".{self.path.name}.kpi.json")
+        self.chunk_bytes = chunk_bytes
+        self.offset = 0
+        self.header = None
+        self.head_hash = None
+        self.stats = PostureStats()
+        self._load()
+
+    def _load(self):
+        try:
+            cp = json.loads(self.checkpoint.read_text())
+        except (OSError, ValueError):
+            return
+        self.offset, self.header, self.head_hash = cp["offset"], cp["header"], cp["head_hash"]
+        self.stats = PostureStats.from_dict(cp["stats"])
+
+    def save(self):
+        tmp = self.checkpoint.with_name(self.checkpoint.name + ".tmp")
+        tmp.write_text(json.dumps({"path": str(self.path), "offset": self.offset, "header": self.header,
+                                   "head_hash": self.head_hash, "stats": self.stats.to_dict()}))
+        os.replace(tmp, self.checkpoint)
+
+    def _first_line(self, f):
+        f.seek(0)
+        return f.readline()
+
+    def poll(self):
+        """Process whatever complete lines were appended since the last call. Returns rows added."""
+        added = 0
+        with open(self.path, "rb") as f:
+            first = self._first_line(f)
+            if not first.endswith(b"\n"):
+                return 0   # header not complete yet
+            digest = hashlib.sha1(first).hexdigest()
+            size = os.fstat(f.fileno()).st_size
+            if digest != self.head_hash or size < self.offset:
+                # New, truncated or replaced file: start over
+                self.header = first.decode(errors="replace").strip().split(",")
+                self.head_hash = digest
+                self.offset = len(first)
+                self.stats = PostureStats()
+            if not {"timestamp_iso", "pitch_deg"} <= set(self.header):
+                raise SystemExit(f"{self.path}: expected columns {COLUMNS}, got {self.header}")
+            f.seek(self.offset)
+            while True:
+                data = f.read(self.chunk_bytes)
+                if not data:
+                    break
+                end = data.rfind(b"\n")
+                if end < 0:
+                    break   # only a partial line so far
+                data = data[:end + 1]
+                ts, pitch = parse_rows(data, self.header)
+                self.stats.update(ts, pitch)
+                added += len(ts)
+                self.offset += len(data)
+                f.seek(self.offset)
+        self.save()
+        return added
+
+def follow(tail, interval_s):
+    try:
+        while True:
+            t0 = time.perf_counter()
+            added = tail.poll()
+            if added:
+                print(f"[kpi] +{added} rows in {1000 * (time.perf_counter() - t0):.1f} ms: {tail.stats.kpi()}")
+            time.sleep(interval_s)
+    except KeyboardInterrupt:
+        pass
+
+def from_stdin(stats, report_every=10):
+    """Live feed: the "ts,temp_c,hum_pct,pitch_deg" rows serial_logger_lite.py prints."""
+    for n, line in enumerate(sys.stdin, 1):
+        parts = line.strip().split(",")
+        if len(parts) != 4:
+            continue
+        try:
+            ts = pd.Timestamp(parts[0]).timestamp() if parts[0] else math.nan
+        except ValueError:
+            continue
+        try:
+            pitch = float(parts[3]) if parts[3] else math.nan
+        except ValueError:
+            pitch = math.nan
+        stats.update_one(ts, pitch)
+        if n % report_every == 0:
+            print(f"[kpi] {stats.kpi()}", flush=True)
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description="Incremental desk-coach posture KPIs")
+    ap.add_argument("csv", nargs="?", default="deskcoach_session.csv")
+    ap.add_argument("--follow", action="store_true", help="Keep tailing the file")
+    ap.add_argument("--interval", type=float, default=1.0, help="Seconds between polls with --follow")
+    ap.add_argument("--stdin", action="store_true", help="Read rows from stdin (pipe serial_logger_lite.py into it)")
+    ap.add_argument("--checkpoint", help="Checkpoint file (default: .<csv>.kpi.json next to the CSV)")
+    ap.add_argument("--reset", action="store_true", help="Ignore an existing checkpoint")
+    ap.add_argument("--summary", help="Also write the KPIs here (like analyze.py's session_summary.txt)")
+    args = ap.parse_args()
+
+    if args.stdin:
+        stats = from_stdin(PostureStats())
+        kpi = stats.kpi()
+    else:
+        tail = CsvTail(args.csv, args.checkpoint)
+        if args.reset:
+            tail.head_hash = None
+        t0 = time.perf_counter()
+        added = tail.poll()
+        print(f"[kpi] {args.csv}: processed {added} new rows ({tail.stats.rows} total) "
+              f"in {1000 * (time.perf_counter() - t0):.1f} ms")
+        if args.follow:
+            follow(tail, args.interval)
+        kpi = tail.stats.kpi()
+    print("\n=== SESSION ANALYSIS ===")
+    for key, value in kpi.items():
+        print(f"{key}: {value}")
+    if args.summary:
+        Path(args.summary).write_text(summary_text(kpi), encoding="utf-8")
+        print(f"Saved: {args.summary}")
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,60 @@
-import argparse, csv, datetime as dt, time
+import argparse, datetime as dt, math, sys, time
 import serial
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.csv_sink import add_sink_args, sink_from_args
+from shared.serial_ingest import ChunkedLineReader, make_parser
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--port", required=True)
     ap.add_argument("--baud", type=int, default=115200)
     ap.add_argument("--out", default="deskcoach_session.csv")
+    ap.add_argument("--period-ms", type=float, default=1000.0,
+                    help="Board's sample period, used to space rows that arrive in the same read")
+    add_sink_args(ap)
     args = ap.parse_args()
 
     out = Path(args.out)
     print(f"Logging from {args.port} @ {args.baud} -> {out.resolve()}")
-    
-    # Write header first
-    with out.open("w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["timestamp_iso", "temp_c", "hum_pct", "pitch_deg"])
-    
-    with serial.Serial(args.port, args.baud, timeout=1) as ser, out.open("a", newline="") as f:
-        writer = csv.writer(f)
+
+    # Rows are committed in groups (--flush-rows / --flush-ms), not flushed one by one
+    writer = sink_from_args(out, ["timestamp_iso", "temp_c", "hum_pct", "pitch_deg"], args)
+    with serial.Serial(args.port, args.baud, timeout=1) as ser:
+        reader = ChunkedLineReader(ser)
+        # "ts,temp_c,hum_pct,pitch_deg"; unlike the old readline loop, lines with extra fields are
+        # counted as malformed instead of being written out wider than the header
+        parser = make_parser("deskcoach")
+        period = dt.timedelta(milliseconds=args.period_ms)
+        last_read = None
         try:
             while True:
                 try:
-                    line = ser.readline().decode(errors="ignore").strip()
-                    if not line:
+                    rows = parser.parse(reader.read_lines())
+                    if not len(rows):
                         continue
-                    parts = line.split(",")
-                    if len(parts) >= 4:
-                        # Replace first column (timestamp) with current ISO timestamp
-                        parts[0] = dt.datetime.now().isoformat()
-                        writer.writerow(parts)
-                        f.flush()  # Ensure data is written immediately
-                        print(line)
+                    # Replace first column (timestamp) with the time each line was read: the newest
+                    # line now, earlier ones one sample period apart, never before the previous read
+                    now = dt.datetime.now()
+                    n = len(rows)
+                    step = period if last_read is None else min(period, (now - last_read) / n)
+                    last_read = now
+                    stamps = [(now - step * (n - 1 - i)).isoformat() for i in range(n)]
+                    # Blank temp/hum fields come back as NaN; keep them blank in the CSV
+                    batch = [[ts] + ["" if math.isnan(v) else v for v in vals]
+                             for ts, vals in zip(stamps, rows.tolist())]
+                    writer.writerows(batch)
+                    for parts in batch:
+                        print(",".join(str(p) for p in parts))
                 except Exception as e:
                     print(f"Error reading line: {e}")
                     continue
         except KeyboardInterrupt:
             pass
+        finally:
+            writer.close()
+    print(parser.summary())
     print("Saved:", out)
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Helpers shared by the weekly SIT225 scripts (serial ingestion, sinks, storage)."""
@@ -0,0 +1,55 @@
+"""
+Load test for multi_collector.py using pty-based fake boards (no hardware).
+
+    python shared/bench_collector.py --devices 12 --rate 1000 --seconds 10
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.fake_serial import FakeSerialDevice, synthetic_lines
+from shared.multi_collector import Collector, CsvSink, ParquetSink, PortSpec
+
+def main():
+    ap = argparse.ArgumentParser(description="Drive the multi-port collector with fake pty boards")
+    ap.add_argument("--devices", type=int, default=12)
+    ap.add_argument("--rate", type=float, default=1000.0, help="Samples/s per device (0 = max)")
+    ap.add_argument("--fmt", default="gyro", help="Board format for every fake device")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--parquet", action="store_true", help="Also write Parquet")
+    args = ap.parse_args()
+
+    devs = [FakeSerialDevice(synthetic_lines(args.fmt, seed=i), args.rate, binary=args.fmt == "binary")
+            for i in range(args.devices)]
+    specs = [PortSpec(f"{d.path},{args.fmt},board{i:02d}") for i, d in enumerate(devs)]
+    with tempfile.TemporaryDirectory() as tmp:
+        sinks = [CsvSink(Path(tmp) / "csv")]
+        if args.parquet:
+            sinks.append(ParquetSink(Path(tmp) / "pq"))
+        collector = Collector(specs, sinks, flush_s=1.0)
+        for d in devs:
+            d.start()
+        cpu0 = time.process_time()
+        elapsed = asyncio.run(collector.run(args.seconds, report_s=max(1.0, args.seconds / 5)))
+        cpu = time.process_time() - cpu0
+        for d in devs:
+            d.close()
+
+    sent = sum(d.sent for d in devs)
+    got = collector.totals()
+    print(f"\n{args.devices} devices x {args.rate:g} Hz ({args.fmt}) for {elapsed:.1f}s")
+    print(f"sent={sent} collected={got} ({got / elapsed:.0f} rows/s total)")
+    # CPU includes the fake devices' writer threads, so this is an upper bound
+    print(f"process CPU: {cpu:.1f}s = {100 * cpu / elapsed:.0f}% of one core")
+    for r in collector.readers:
+        s = r.parser.stats if r.parser else {}
+        print(f"  {r.spec.device_id}: rows={r.stats['rows']} batches={r.stats['batches']} "
+              f"dropped_batches={r.stats['dropped_batches']} reconnects={r.stats['reconnects']} "
+              f"malformed={s.get('malformed', s.get('crc_errors', 0))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: flush-per-row CSV logging vs GroupCommitCsvWriter policies.
+
+For every policy it reports rows/s, write syscalls per 1000 rows, fsyncs,
+and an estimate of flash write amplification. The estimate assumes each
+durable commit rewrites every 4 KiB page it touches, which is what an SD card
+does when you fsync a partial page:
+
+    WA = (4 KiB pages rewritten x 4096) / payload bytes
+
+    python shared/bench_csv_sink.py --rows 100000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.csv_sink import GroupCommitCsvWriter
+
+PAGE = 4096
+
+def rows_for(n):
+    return [[f"2025-09-28T20:25:{i % 60:02d}.{i % 1000000:06d}", "", "", round(7.9 + (i % 50) / 10, 1)]
+            for i in range(n)]
+
+def pages_touched(start, end):
+    return (end - 1) // PAGE - start // PAGE + 1 if end > start else 0
+
+def legacy(path, rows, fsync):
+    """What serial_logger_lite.py / esp32_dht11_logger.py used to do."""
+    pages = 0
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["timestamp_iso", "temp_c", "hum_pct", "pitch_deg"])
+        for r in rows:
+            start = f.tell()
+            w.writerow(r)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+            pages += pages_touched(start, f.tell())
+    return {"writes": len(rows), "fsyncs": len(rows) if fsync else 0, "pages": pages}
+
+def grouped(path, rows, **policy):
+    w = GroupCommitCsvWriter(path, ["timestamp_iso", "temp_c", "hum_pct", "pitch_deg"], **policy)
+    pages = 0
+    last_bytes = w.stats["bytes"]
+    for r in rows:
+        commits = w.stats["commits"]
+        w.writerow(r)
+        if w.stats["commits"] != commits:
+            pages += pages_touched(last_bytes, w.stats["bytes"])
+            last_bytes = w.stats["bytes"]
+    w.close()
+    pages += pages_touched(last_bytes, w.stats["bytes"])
+    return {"writes": w.stats["commits"], "fsyncs": w.stats["fsyncs"], "pages": pages}
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare CSV commit policies")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--fsync-rows", type=int, default=5_000,
+                    help="Rows for the per-row fsync policy (it is very slow)")
+    ap.add_argument("--dir", default=None, help="Directory to write into (default: temp dir)")
+    args = ap.parse_args()
+
+    policies = [
+        ("flush per row (old)", legacy, {"fsync": False}, args.rows),
+        ("flush+fsync per row", legacy, {"fsync": True}, args.fsync_rows),
+        ("group 256 rows/1 s", grouped, {"flush_rows": 256, "flush_ms": 1000}, args.rows),
+        ("group 1000 rows/5 s", grouped, {"flush_rows": 1000, "flush_ms": 5000}, args.rows),
+        ("group 256/1 s + fsync", grouped, {"flush_rows": 256, "flush_ms": 1000, "fsync": True}, args.rows),
+    ]
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        print(f"{'policy':<24} {'rows/s':>12} {'writes/1k rows':>15} {'fsyncs':>8} {'est. WA':>8}")
+        for name, fn, opts, n in policies:
+            rows = rows_for(n)
+            path = Path(tmp) / "bench.csv"
+            t0 = time.perf_counter()
+            res = fn(path, rows, **opts)
+            dt = time.perf_counter() - t0
+            payload = path.stat().st_size
+            wa = res["pages"] * PAGE / payload
+            print(f"{name:<24} {n / dt:>12,.0f} {1000 * res['writes'] / n:>15.1f} "
+                  f"{res['fsyncs']:>8} {wa:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: per-line readline/decode/split/float vs ChunkedLineReader + LineParser.
+
+Replays byte streams rebuilt from the recorded sessions in this repo through
+an in-memory fake serial port, so no board is needed:
+
+    python shared/bench_ingest.py --lines 200000
+"""
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.binary_frames import FRAME_SIZE, BinaryFrameReader, encode_frame
+from shared.serial_ingest import ChunkedLineReader, make_parser
+
+class BytesPort:
+    """Minimal pyserial stand-in over a bytes object.
+
+    `in_waiting` never reports more than `uart_buffer` bytes, like a real
+    driver buffer that the reader has to keep draining.
+    """
+
+    def __init__(self, data, uart_buffer=4096):
+        self.data = data
+        self.pos = 0
+        self.uart_buffer = uart_buffer
+
+    @property
+    def in_waiting(self):
+        return min(len(self.data) - self.pos, self.uart_buffer)
+
+    def read(self, n=1):
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += len(chunk)
+        return chunk
+
+    def readline(self):
+        # Same shape as pyserial's read_until(): one read(1) call per byte
+        line = bytearray()
+        while True:
+            c = self.read(1)
+            if not c:
+                break
+            line += c
+            if c == b"\n":
+                break
+        return bytes(line)
+
+def recorded_lines(fmt):
+    """Rebuild the board's serial output from the CSVs we logged."""
+    if fmt == "gyro":
+        with open(ROOT / "W5" / "gyro_data_final.csv", newline="") as f:
+            return [f",{r['gx']},{r['gy']},{r['gz']}".encode() for r in csv.DictReader(f)]
+    if fmt == "deskcoach":
+        with open(ROOT / "W9" / "deskcoach_session.csv", newline="") as f:
+            return [",".join(r).encode() for r in list(csv.reader(f))[1:]]
+    if fmt == "dht_table":
+        with open(ROOT / "SIT225_W2" / "dht11_data.csv", newline="", encoding="utf-8") as f:
+            return [f"OK         | {r[3]}         | {r[4]}".encode() for r in list(csv.reader(f))[1:]]
+    raise ValueError(fmt)
+
+def make_stream(fmt, n_lines):
+    lines = recorded_lines(fmt)
+    reps = n_lines // len(lines) + 1
+    return b"\n".join((lines * reps)[:n_lines]) + b"\n"
+
+def make_binary_stream(n_frames):
+    """The gyro recording again, as the sketch sends it with BINARY_FRAMES 1."""
+    lines = recorded_lines("gyro")
+    frames = []
+    for i in range(n_frames):
+        gx, gy, gz = map(float, lines[i % len(lines)].split(b",")[1:])
+        frames.append(encode_frame(i, i * 20, gx, gy, gz))
+    return b"".join(frames)
+
+def legacy_parse(port, n_values, sep=","):
+    """What the loggers used to do for every line."""
+    n = 0
+    while True:
+        raw = port.readline()
+        if not raw:
+            return n
+        line = raw.decode(errors="ignore").strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split(sep)
+        try:
+            vals = [float(p) if p.strip() else float("nan") for p in parts[-n_values:]]
+        except ValueError:
+            continue
+        n += len(vals) // n_values
+
+def fast_parse(port, fmt):
+    reader = ChunkedLineReader(port)
+    parser = make_parser(fmt)
+    while port.in_waiting:
+        parser.parse(reader.read_lines())
+    return parser.stats["parsed"], parser
+
+def binary_parse(port):
+    reader = BinaryFrameReader(port)
+    n = 0
+    while port.in_waiting:
+        n += len(reader.read_frames())
+    return n, reader
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay recorded serial streams through both parsers")
+    ap.add_argument("--lines", type=int, default=200_000, help="Lines per format")
+    ap.add_argument("--uart-buffer", type=int, default=4096, help="Bytes visible per in_waiting")
+    args = ap.parse_args()
+
+    cases = [("gyro", 3, ","), ("deskcoach", 3, ","), ("dht_table", 2, "|")]
+    print(f"{'format':<10} {'legacy lines/s':>15} {'chunked lines/s':>16} {'speedup':>8}")
+    for fmt, n_values, sep in cases:
+        data = make_stream(fmt, args.lines)
+
+        t0 = time.perf_counter()
+        n_old = legacy_parse(BytesPort(data, args.uart_buffer), n_values, sep)
+        old_rate = n_old / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        n_new, parser = fast_parse(BytesPort(data, args.uart_buffer), fmt)
+        new_rate = n_new / (time.perf_counter() - t0)
+
+        print(f"{fmt:<10} {old_rate:>15,.0f} {new_rate:>16,.0f} {new_rate / old_rate:>7.1f}x")
+        print(f"           {parser.summary()}")
+
+    data = make_binary_stream(args.lines)
+    t0 = time.perf_counter()
+    n_bin, reader = binary_parse(BytesPort(data, args.uart_buffer))
+    bin_rate = n_bin / (time.perf_counter() - t0)
+    ascii_bytes = len(make_stream("gyro", args.lines)) / args.lines
+    print(f"{'gyro bin':<10} {'':>15} {bin_rate:>16,.0f}   ({FRAME_SIZE} vs {ascii_bytes:.1f} bytes/sample)")
+    print(f"           {reader.summary()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+End-to-end ingest benchmark for the serial loggers, driven by replayed recordings.
+
+Each target logger runs unmodified as a subprocess. Its --port is a
+replay.ReplayDevice pty playing a recorded session at --speed. The harness
+watches the logger's output (CSV rows on disk, or samples arriving at the
+mock Firebase for W5) and matches row i with the time line i was written to
+the pty. It reports:
+
+  throughput   rows landed / s, and rows unseen (sent but still not visible
+               after --drain: buffered in the logger, or dropped)
+  latency      p50 / p95 / p99 from line sent to row visible on disk (or in
+               Firebase), so batching, buffering and group commit all count
+
+The W8 dashboard is measured in-process: W8_REPLAY feeds its producer thread,
+and a row has landed once it is in the ring buffer.
+
+    python shared/bench_loggers.py --speed 10 --seconds 15
+    python shared/bench_loggers.py --targets w6 w9 --speed max --seconds 10
+    python shared/bench_loggers.py --targets w6 --source synth.parquet --speed max
+"""
+import argparse
+import importlib
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.replay import Recording, ReplayDevice, ReplayPort, parse_speed
+
+W8_DIR = ROOT / "W8" / "clean_submission" / "documentation"
+
+# name -> (wire format, default recording, command builder(port, out, seconds), output file, header rows)
+TARGETS = {
+    "w5": ("gyro", "W5/gyro_data_final.csv",
+           lambda port, out, s, db: [sys.executable, "W5/firebase_gyro_pipeline.py", "listen", "--port", port,
+                                     "--db-url", db, "--path", "bench", "--spool", ""]),
+    "w6": ("xyz_ms", "W5/gyro_data_final.csv",
+           lambda port, out, s, db: [sys.executable, "W6/serial_logger.py", "--port", port, "--outfile", out,
+                                     "--minutes", str((s + 30) / 60)]),
+    "w7": ("dht", "W7/sensor_data.csv",
+           lambda port, out, s, db: [sys.executable, "W7/esp32_dht11_logger.py", "--port", port, "--out", out]),
+    "w9": ("deskcoach", "W9/deskcoach_session.csv",
+           lambda port, out, s, db: [sys.executable, "W9/serial_logger_lite.py", "--port", port, "--out", out]),
+    "w8": ("xyz_ms", "W5/gyro_data_final.csv", None),
+}
+STARTUP_S = {"w6": 2.0}   # W6's logger sleeps 2 s after opening the port
+
+def wait_for_open(proc, path, timeout=15.0):
+    """Wait until `proc` has opened the pty. pyserial flushes input on open, so earlier lines would be lost."""
+    fd_dir = Path(f"/proc/{proc.pid}/fd")
+    if not fd_dir.exists():
+        time.sleep(3.0)
+        return
+    deadline = time.time() + timeout
+    while time.time() < deadline and proc.poll() is None:
+        try:
+            if any(os.readlink(fd) == path for fd in fd_dir.iterdir()):
+                time.sleep(0.2)   # let it finish configuring the port
+                return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise SystemExit(f"logger exited or never opened {path}")
+
+class CsvRowCounter:
+    """Counts rows in a growing CSV by reading only the bytes appended since the last call."""
+
+    def __init__(self, path, header_rows=1):
+        self.path = Path(path)
+        self.header_rows = header_rows
+        self.pos = 0
+        self.newlines = 0
+
+    def __call__(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.pos)
+                data = f.read()
+        except OSError:
+            return 0
+        self.pos += len(data)
+        self.newlines += data.count(b"\n")
+        return max(0, self.newlines - self.header_rows)
+
+def watch(progress, stop, interval_s=0.005):
+    """Poll progress() until `stop`; returns (times, counts) with time.time() stamps."""
+    times, counts = [], []
+    while not stop.is_set():
+        n = progress()
+        if not counts or n != counts[-1]:
+            times.append(time.time())
+            counts.append(n)
+        time.sleep(interval_s)
+    return np.array(times), np.array(counts)
+
+def summarise(name, src, times, counts, wall):
+    landed = int(counts[-1]) if len(counts) else 0
+    sent = src.sent
+    idx = np.arange(min(landed, sent))
+    # First poll at which the row count exceeded i = when row i became visible
+    seen = times[np.searchsorted(counts, idx, side="right")] if len(idx) else np.zeros(0)
+    lat = seen - src.sent_at(idx)
+    lat = lat[np.isfinite(lat)]
+    pct = np.percentile(lat * 1000, [50, 95, 99]) if len(lat) else [float("nan")] * 3
+    return dict(name=name, sent=sent, landed=landed, unseen=max(0, sent - landed), rate=landed / wall,
+                p50=pct[0], p95=pct[1], p99=pct[2])
+
+def run_subprocess_target(name, rec, speed, seconds, drain_s, tmp):
+    fmt, _, build, = TARGETS[name][:3]
+    out = Path(tmp) / f"{name}.csv"
+    db = srv = None
+    if name == "w5":
+        sys.path.insert(0, str(ROOT / "W5"))
+        from mock_firebase import count_children, start_server
+        srv, db = start_server()
+        progress = lambda: count_children("bench")
+    else:
+        progress = CsvRowCounter(out)
+    dev = ReplayDevice(rec, fmt, speed, loop=True)
+    proc = subprocess.Popen(build(dev.path, str(out), seconds, db), cwd=str(ROOT),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        wait_for_open(proc, dev.path)
+        time.sleep(STARTUP_S.get(name, 0.0))
+        stop = threading.Event()
+        result = {}
+        watcher = threading.Thread(target=lambda: result.update(zip(("t", "n"), watch(progress, stop))))
+        watcher.start()
+        t0 = time.time()
+        dev.start()
+        time.sleep(seconds)
+        dev.stop()
+        wall = time.time() - t0
+        deadline = time.time() + drain_s
+        while time.time() < deadline and progress() < dev.sent:
+            time.sleep(0.05)
+        stop.set()
+        watcher.join()
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            _, err = proc.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            _, err = proc.communicate()
+        dev.close()
+        if srv is not None:
+            srv.shutdown()
+    if proc.returncode not in (0, -signal.SIGINT, 1, None) and err:
+        print(f"[{name}] logger stderr:\n{err.decode(errors='ignore')[-800:]}")
+    return summarise(name, dev, result["t"], result["n"], wall)
+
+def run_w8(rec_path, speed, seconds, drain_s, tmp):
+    os.environ.update(W8_SIM="1", W8_REPLAY=str(rec_path), W8_REPLAY_SPEED=str(speed or "max"))
+    sys.path.insert(0, str(W8_DIR))
+    app = importlib.import_module("app")
+    app.archiver.data_dir = app.archiver.png_dir = tmp   # keep archived windows out of the repo
+    # Restart the producer on a fresh replay so that row counts and send times line up exactly
+    app._producer_stop.set()
+    app._producer.join(2)
+    src = app.replay = ReplayPort(app.replay.rec, speed=speed, loop=True)
+    base = app.buffer_a.head
+    stop, producer_stop = threading.Event(), threading.Event()
+    result = {}
+    watcher = threading.Thread(target=lambda: result.update(
+        zip(("t", "n"), watch(lambda: app.buffer_a.head - base, stop))))
+    watcher.start()
+    producer = threading.Thread(target=app.producer_loop, args=(producer_stop,), daemon=True)
+    t0 = time.time()
+    producer.start()
+    time.sleep(seconds)
+    wall = time.time() - t0
+    producer_stop.set()
+    producer.join(2)
+    time.sleep(0.1)
+    stop.set()
+    watcher.join()
+    app.archiver.flush(drain_s)
+    return summarise("w8", src, result["t"], result["n"], wall)
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end logger throughput/latency with replayed recordings")
+    ap.add_argument("--targets", nargs="+", default=["w5", "w6", "w7", "w9", "w8"], choices=sorted(TARGETS))
+    ap.add_argument("--speed", default="10", help="Replay speed: 1, 10, ... or max")
+    ap.add_argument("--seconds", type=float, default=10.0, help="Replay duration per target")
+    ap.add_argument("--drain", type=float, default=5.0, help="Max wait for the logger to catch up")
+    ap.add_argument("--source", help="Recording to use for every target instead of each one's default")
+    args = ap.parse_args()
+
+    speed = parse_speed(args.speed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.targets:
+            fmt, default_src, _ = TARGETS[name]
+            path = Path(args.source) if args.source else ROOT / default_src
+            print(f"[bench] {name}: replaying {path.name} as {fmt} at {args.speed} for {args.seconds:g}s ...")
+            if name == "w8":
+                results.append(run_w8(path, speed, args.seconds, args.drain, tmp))
+            else:
+                rec = Recording.load(path, fmt)
+                results.append(run_subprocess_target(name, rec, speed, args.seconds, args.drain, tmp))
+
+    print(f"\n{'target':<7} {'sent':>9} {'landed':>9} {'unseen':>7} {'rows/s':>10} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"{r['name']:<7} {r['sent']:>9} {r['landed']:>9} {r['unseen']:>7} {r['rate']:>10,.0f} "
+              f"{r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: CSV vs Parquet session storage (load time and disk use).
+
+Generates a synthetic gyro session (ISO timestamps + x/y/z), writes it as CSV
+the way the loggers do, migrates it, then times:
+  - CSV load with timestamp parsing (what W6/W9/W5 used to do)
+  - full Parquet load
+  - Parquet load of one column over a 1-minute window (projection + pushdown)
+
+    python shared/bench_session_store.py --rows 2000000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.session_store import dataset_size, load_frame, migrate
+
+def make_session(n, rate_hz=100.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = pd.Timestamp("2025-09-28T08:00:00") + pd.to_timedelta(np.arange(n) / rate_hz, unit="s")
+    return pd.DataFrame({
+        "time": t.strftime("%Y-%m-%dT%H:%M:%S.%f"),
+        "x": np.round(rng.normal(0, 50, n), 6),
+        "y": np.round(rng.normal(0, 50, n), 6),
+        "z": np.round(rng.normal(0, 20, n), 6),
+    })
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare CSV and Parquet session loads")
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--rate", type=float, default=100.0, help="Sample rate of the synthetic session (Hz)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "gyro_data.csv"
+        make_session(args.rows, args.rate).to_csv(csv_path, index=False)
+        t_mig, (pq_path, _) = timed(lambda: migrate(csv_path, Path(tmp) / "gyro_data.parquet"), repeat=1)
+
+        def csv_load():
+            df = pd.read_csv(csv_path)
+            df["time"] = pd.to_datetime(df["time"], format="ISO8601")
+            return df
+
+        mid = pd.Timestamp("2025-09-28T08:00:00") + pd.Timedelta(seconds=args.rows / args.rate / 2)
+        t_csv, a = timed(csv_load)
+        t_pq, b = timed(lambda: load_frame(pq_path))
+        t_win, w = timed(lambda: load_frame(pq_path, columns=["x"], start=mid, end=mid + pd.Timedelta(minutes=1)))
+        assert len(a) == len(b) == args.rows
+
+        csv_mb, pq_mb = csv_path.stat().st_size / 1e6, dataset_size(pq_path) / 1e6
+        print(f"{args.rows:,} rows @ {args.rate:g} Hz (migration took {t_mig:.2f}s)")
+        print(f"{'':<34} {'time (s)':>9} {'speed-up':>9}")
+        print(f"{'CSV + parse timestamps':<34} {t_csv:>9.3f} {1.0:>8.1f}x")
+        print(f"{'Parquet, all columns':<34} {t_pq:>9.3f} {t_csv / t_pq:>8.1f}x")
+        print(f"{'Parquet, x over 1 min':<34} {t_win:>9.3f} {t_csv / t_win:>8.1f}x   ({len(w)} rows)")
+        print(f"disk: CSV {csv_mb:.1f} MB, Parquet {pq_mb:.1f} MB ({csv_mb / pq_mb:.1f}x smaller)")
+
+if __name__ == "__main__":
+    main()
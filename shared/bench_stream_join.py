@@ -0,0 +1,139 @@
+"""
+Benchmark: streaming merge_asof join (stream_join.py) vs loading everything.
+
+Writes N synthetic sensor exports in W3's format (`time,value`, ISO timestamps
+with a Z suffix). Each sensor has its own sample period and clock jitter, so
+timestamps almost never coincide. Files are written in chunks up to --gb in
+total. Each mode runs in its own process, so peak RSS is measured cleanly:
+
+  stream     stream_join.py CLI: chunked read, asof join, Parquet/CSV appends
+  in-memory  load_frame every file, exact-timestamp inner merge (what W3 did)
+             and pd.merge_asof, then save_frame (skip with --no-baseline)
+
+It reports wall time, rows/s, peak RSS and matched rows.
+
+    python shared/bench_stream_join.py --gb 2 --streams 3
+    python shared/bench_stream_join.py --gb 0.2 --keep /tmp/join_bench   # keep the inputs
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.session_store import load_frame, save_frame
+from shared.stream_join import parse_stream, peak_rss_mb
+
+BYTES_PER_ROW = 50   # "2025-01-01T00:00:00.123456789Z,21.53000068664551\n"
+
+def make_stream(path, rows, period_s, seed, chunk=2_000_000):
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-01-01T00:00:00", "ns")
+    t_prev = 0.0
+    with open(path, "wb") as f:
+        f.write(b"time,value\n")
+        for i in range(0, rows, chunk):
+            n = min(chunk, rows - i)
+            # Positive jittered steps: sorted, irregular, drifting against the other sensors
+            t = t_prev + np.cumsum(period_s * rng.uniform(0.8, 1.2, n))
+            t_prev = float(t[-1])
+            ts = np.char.add(np.datetime_as_string(start + (t * 1e9).astype("timedelta64[ns]"), unit="ns"), "Z")
+            values = 20 + 5 * np.sin(t / 86400 * 2 * np.pi) + rng.normal(0, 0.3, n)
+            table = pa.table({"time": ts, "value": values})
+            pcsv.write_csv(table, f, pcsv.WriteOptions(include_header=False, quoting_style="none"))
+
+def baseline(streams, tolerance, out):
+    """Everything in memory; prints a JSON result line (runs in a child process)."""
+    t0 = time.perf_counter()
+    frames = []
+    for name, path in streams:
+        df = load_frame(path)
+        df["time"] = df["time"].dt.tz_convert(None).dt.as_unit("ns")
+        frames.append(df.rename(columns={"time": "timestamp", "value": name}))
+    exact = frames[0]
+    for f in frames[1:]:
+        exact = pd.merge(exact, f, on="timestamp", how="inner")
+    joined = frames[0]
+    for f in frames[1:]:
+        joined = pd.merge_asof(joined, f, on="timestamp", tolerance=pd.Timedelta(tolerance), direction="nearest")
+    save_frame(joined, out, time_col="timestamp")
+    print(json.dumps({"secs": time.perf_counter() - t0, "rows": len(joined), "exact": len(exact),
+                      "matched": int(joined.notna().all(axis=1).sum()), "rss": peak_rss_mb()}))
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the streaming time-aligned join")
+    ap.add_argument("--gb", type=float, default=2.0, help="Total size of the synthetic CSV inputs")
+    ap.add_argument("--streams", type=int, default=3, help="Number of sensor streams (first is the reference)")
+    ap.add_argument("--tolerance", default="2s")
+    ap.add_argument("--chunk", type=int, default=1_000_000)
+    ap.add_argument("--out-format", default="parquet", choices=["parquet", "csv"])
+    ap.add_argument("--no-baseline", action="store_true", help="Skip the in-memory join (it may not fit in RAM)")
+    ap.add_argument("--keep", help="Write inputs here and keep them (reused if present)")
+    ap.add_argument("--_baseline", nargs="+", help=argparse.SUPPRESS)
+    ap.add_argument("--_out", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args._baseline:
+        return baseline([parse_stream(s) for s in args._baseline], args.tolerance, args._out)
+
+    work = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="join_bench_"))
+    work.mkdir(parents=True, exist_ok=True)
+    try:
+        rows = int(args.gb * 1e9 / BYTES_PER_ROW / args.streams)
+        specs = []
+        for k in range(args.streams):
+            path = work / f"sensor{k}.csv"
+            if not path.exists():
+                t0 = time.perf_counter()
+                make_stream(path, rows, period_s=2.0 + 0.03 * k, seed=k)
+                print(f"[bench] wrote {path.name}: {rows:,} rows, {path.stat().st_size / 1e9:.2f} GB "
+                      f"in {time.perf_counter() - t0:.1f}s")
+            specs.append(f"sensor{k}={path}")
+        total_gb = sum((work / f"sensor{k}.csv").stat().st_size for k in range(args.streams)) / 1e9
+
+        out = work / f"joined.{args.out_format}"
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, str(ROOT / "shared" / "stream_join.py"), *specs, "--out", str(out),
+                               "--tolerance", args.tolerance, "--chunk", str(args.chunk)],
+                              capture_output=True, text=True, check=True)
+        secs = time.perf_counter() - t0
+        rss = float(proc.stdout.rsplit("peak RSS", 1)[1].split()[0])
+        joined = load_frame(out)
+        results = [("stream", secs, len(joined), int(joined.notna().all(axis=1).sum()), rss)]
+        if out.is_dir():
+            shutil.rmtree(out)
+        else:
+            out.unlink()
+
+        if not args.no_baseline:
+            base_out = work / "joined_in_memory.parquet"
+            proc = subprocess.run([sys.executable, __file__, "--tolerance", args.tolerance,
+                                   "--_baseline", *specs, "--_out", str(base_out)],
+                                  capture_output=True, text=True)
+            shutil.rmtree(base_out, ignore_errors=True)
+            if proc.returncode == 0:
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(("in-memory", r["secs"], r["rows"], r["matched"], r["rss"]))
+                print(f"[bench] exact-timestamp inner join keeps {r['exact']:,} of {r['rows']:,} reference rows")
+            else:
+                print(f"[bench] in-memory join failed (out of memory?): {proc.stderr.strip()[-300:]}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    print(f"\n{args.streams} streams, {total_gb:.2f} GB CSV, tolerance {args.tolerance}, chunk {args.chunk:,}")
+    print(f"{'mode':<10} {'secs':>8} {'rows':>12} {'M rows/s':>9} {'all matched':>12} {'peak RSS':>10}")
+    for mode, secs, n, matched, rss in results:
+        print(f"{mode:<10} {secs:>8.1f} {n:>12,} {n / secs / 1e6:>9.2f} {matched:>12,} {rss:>8.0f}MB")
+
+if __name__ == "__main__":
+    main()
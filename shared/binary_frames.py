@@ -0,0 +1,153 @@
+"""
+Binary framed protocol for the gyro/accelerometer serial link.
+
+ASCII lines like ",-0.305176,-0.366211,-0.183105\\n" spend more than half of
+every frame on formatting, and Python then spends most of its time turning
+that text back into floats. In binary mode the board sends fixed-size
+little-endian frames instead:
+
+    offset  size  field
+    0       2     sync      0xA55A (bytes 5A A5 on the wire)
+    2       2     seq       uint16, +1 per frame, wraps at 65536
+    4       4     t_ms      uint32, millis() on the board
+    8       12    x, y, z   float32 x 3
+    20      2     crc       CRC-16/CCITT-FALSE over bytes 2..19
+
+`BinaryFrameReader` keeps incoming bytes in a preallocated buffer, decodes
+every complete frame as one structured NumPy view (no copy), checks CRCs,
+resyncs on garbage and counts sequence gaps. The sketch side lives in
+W5/nano33_gyro_logger.ino (`#define BINARY_FRAMES 1`).
+"""
+import binascii
+import struct
+
+import numpy as np
+
+SYNC = 0xA55A
+SYNC_BYTES = struct.pack("<H", SYNC)
+FRAME = struct.Struct("<HHIfffH")
+FRAME_SIZE = FRAME.size   # 22 bytes vs ~30 for the ASCII line
+FRAME_DTYPE = np.dtype([
+    ("sync", "<u2"), ("seq", "<u2"), ("t_ms", "<u4"),
+    ("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("crc", "<u2"),
+])
+assert FRAME_DTYPE.itemsize == FRAME_SIZE
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), same as the sketch."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+def encode_frame(seq, t_ms, x, y, z):
+    """Build one frame. Used by replays/tests; the board does the same in C."""
+    body = struct.pack("<HIfff", seq & 0xFFFF, t_ms & 0xFFFFFFFF, x, y, z)
+    return SYNC_BYTES + body + struct.pack("<H", crc16(body))
+
+class BinaryFrameReader:
+    """Decodes frames from a serial port (anything with read/in_waiting).
+
+    Bytes land in a fixed, preallocated buffer that is never resized. When
+    the write position reaches the end, the unread tail is moved to the front.
+    `read_frames()` returns a structured array with FRAME_DTYPE fields that
+    is a view into that buffer, so it is only valid until the next call.
+    """
+
+    def __init__(self, port, capacity=1 << 18):
+        self.port = port
+        self.buf = np.zeros(capacity, dtype=np.uint8)
+        self.start = 0            # first unconsumed byte
+        self.end = 0              # one past the last received byte
+        self.last_seq = None
+        self.stats = {"frames": 0, "crc_errors": 0, "resync_bytes": 0,
+                      "seq_gaps": 0, "lost_frames": 0}
+
+    def _fill(self):
+        room = len(self.buf) // 2
+        n = self.port.in_waiting
+        data = self.port.read(min(n, room) if n else 1)
+        if data and not n and self.port.in_waiting:
+            data += self.port.read(min(self.port.in_waiting, room - 1))
+        if not data:
+            return 0
+        if self.end + len(data) > len(self.buf):
+            tail = self.end - self.start
+            self.buf[:tail] = self.buf[self.start:self.end]
+            self.start, self.end = 0, tail
+            if tail + len(data) > len(self.buf):
+                # Nothing decodable in half a buffer: drop it
+                self.stats["resync_bytes"] += tail
+                self.end = 0
+        self.buf[self.end:self.end + len(data)] = np.frombuffer(data, dtype=np.uint8)
+        self.end += len(data)
+        return len(data)
+
+    def _resync(self):
+        """Move `start` to the next sync word. Returns False if none is buffered."""
+        window = self.buf[self.start:self.end]
+        hits = np.flatnonzero((window[:-1] == SYNC_BYTES[0]) & (window[1:] == SYNC_BYTES[1]))
+        if not len(hits):
+            # Keep a trailing byte in case it is the first half of a sync word
+            keep = max(self.start, self.end - 1)
+            self.stats["resync_bytes"] += keep - self.start
+            self.start = keep
+            return False
+        self.stats["resync_bytes"] += int(hits[0])
+        self.start += int(hits[0])
+        return True
+
+    def read_frames(self):
+        self._fill()
+        good = []
+        while self._resync():
+            avail = (self.end - self.start) // FRAME_SIZE
+            if avail == 0:
+                break
+            frames = self.buf[self.start:self.start + avail * FRAME_SIZE].view(FRAME_DTYPE)
+            # Frames stay aligned until the first bad sync word
+            bad = np.flatnonzero(frames["sync"] != SYNC)
+            n = int(bad[0]) if len(bad) else avail
+            if n == 0:
+                self.start += 1
+                continue
+            ok = self._check_crc(self.start, n)
+            if not ok.all():
+                # A bad CRC may mean we locked onto a sync pattern inside the data;
+                # keep the frames before it and rescan from just past that sync word
+                first_bad = int(np.argmin(ok))
+                self.stats["crc_errors"] += 1
+                good.append(frames[:first_bad])
+                self.start += first_bad * FRAME_SIZE + len(SYNC_BYTES)
+                continue
+            good.append(frames[:n])
+            self.start += n * FRAME_SIZE
+        if not good:
+            return np.empty(0, dtype=FRAME_DTYPE)
+        out = good[0] if len(good) == 1 else np.concatenate(good)
+        self._track_seq(out["seq"])
+        self.stats["frames"] += len(out)
+        return out
+
+    def _check_crc(self, offset, n):
+        crc = self.buf[offset:offset + n * FRAME_SIZE].view(FRAME_DTYPE)["crc"]
+        mv = memoryview(self.buf)
+        ok = np.fromiter(
+            (binascii.crc_hqx(mv[b + 2:b + FRAME_SIZE - 2], 0xFFFF) == c
+             for b, c in zip(range(offset, offset + n * FRAME_SIZE, FRAME_SIZE), crc.tolist())),
+            dtype=bool, count=n)
+        return ok
+
+    def _track_seq(self, seq):
+        if not len(seq):
+            return
+        seq = seq.astype(np.int64)
+        prev = np.concatenate(([self.last_seq if self.last_seq is not None else seq[0] - 1], seq[:-1]))
+        step = (seq - prev) % 65536
+        gaps = step != 1
+        self.stats["seq_gaps"] += int(gaps.sum())
+        self.stats["lost_frames"] += int((step[gaps] - 1).clip(min=0).sum())
+        self.last_seq = int(seq[-1])
+
+    def summary(self):
+        s = self.stats
+        return (f"[binary] frames={s['frames']} crc_errors={s['crc_errors']} "
+                f"seq_gaps={s['seq_gaps']} lost_frames={s['lost_frames']} "
+                f"resync_bytes={s['resync_bytes']}")
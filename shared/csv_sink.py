@@ -0,0 +1,181 @@
+"""
+Buffered, group-commit CSV writer for the serial loggers.
+
+The loggers used to call `f.flush()` after every row: one write syscall per
+sample, and on SD-card edge boxes one flash page rewrite per sample too.
+`GroupCommitCsvWriter` keeps rows in memory and commits them in one write
+when either `flush_rows` rows are pending or the oldest pending row is
+`flush_ms` old (a small timer thread enforces the time limit even when the
+board goes quiet). With `fsync=True` each commit is also forced to stable
+storage. Either way, what is on disk is at most one batch behind.
+
+Optional rotation closes the current file after `rotate_bytes` bytes or
+`rotate_s` seconds. Segments are written as `<name>.part` and renamed to
+their final name with os.replace, so readers never see a half-written file.
+
+    with GroupCommitCsvWriter("out.csv", ["time", "x"], flush_rows=500, flush_ms=1000) as w:
+        w.writerow([ts, x])
+"""
+import csv
+import io
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+class GroupCommitCsvWriter:
+    def __init__(self, path, header=None, flush_rows=256, flush_ms=1000, fsync=False,
+                 rotate_bytes=0, rotate_s=0, append=False):
+        self.path = Path(path)
+        self.header = list(header) if header else None
+        self.flush_rows = max(1, flush_rows)
+        self.flush_s = flush_ms / 1000.0 if flush_ms else 0.0
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.rotate_s = rotate_s
+        self.append = append
+        self.rotating = bool(rotate_bytes or rotate_s)
+
+        self._buf = io.StringIO()
+        self._csv = csv.writer(self._buf)
+        self._pending = 0
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+        self._f = None
+        self._segment = None
+        self._seg_started = 0.0
+        self._seg_bytes = 0
+        self._seg_index = 0
+        self._seg_rows = 0
+        self.stats = {"rows": 0, "commits": 0, "fsyncs": 0, "bytes": 0, "segments": 0}
+        self._open_segment()
+
+        self._stop = threading.Event()
+        self._timer = None
+        if self.flush_s:
+            self._timer = threading.Thread(target=self._tick, name="csv-group-commit", daemon=True)
+            self._timer.start()
+
+    # ---- files ----
+
+    def _segment_name(self):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._seg_index += 1
+        return self.path.with_name(f"{self.path.stem}_{stamp}_{self._seg_index:04d}{self.path.suffix}")
+
+    def _open_segment(self):
+        if self.rotating:
+            self._segment = self._segment_name()
+            target = self._segment.with_name(self._segment.name + ".part")
+            mode = "w"
+        else:
+            target = self.path
+            mode = "a" if self.append else "w"
+        self._f = open(target, mode, newline="", encoding="utf-8")
+        self._seg_started = time.monotonic()
+        self._seg_rows = 0
+        self._seg_bytes = self._f.tell() if mode == "a" else 0
+        self.stats["segments"] += 1
+        if self.header and self._seg_bytes == 0:
+            self._csv.writerow(self.header)
+            self._commit_locked(count_rows=False)
+
+    def _close_segment(self):
+        self._f.close()
+        if self.rotating:
+            part = self._segment.with_name(self._segment.name + ".part")
+            os.replace(part, self._segment)
+
+    # ---- writing ----
+
+    def writerow(self, row):
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._csv.writerow(row)
+            self._pending += 1
+            self._maybe_commit_locked()
+
+    def writerows(self, rows):
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._csv.writerows(rows)
+            self._pending += len(rows)
+            self._maybe_commit_locked()
+
+    def _maybe_commit_locked(self):
+        if self._pending >= self.flush_rows or \
+                (self.flush_s and time.monotonic() - self._oldest >= self.flush_s):
+            self._commit_locked()
+
+    def _commit_locked(self, count_rows=True):
+        data = self._buf.getvalue()
+        if not data:
+            return
+        self._f.write(data)
+        self._f.flush()
+        if self.fsync:
+            os.fsync(self._f.fileno())
+            self.stats["fsyncs"] += 1
+        self._buf.seek(0)
+        self._buf.truncate()
+        n = len(data.encode("utf-8")) if not data.isascii() else len(data)
+        self._seg_bytes += n
+        self.stats["bytes"] += n
+        self.stats["commits"] += 1
+        if count_rows:
+            self.stats["rows"] += self._pending
+            self._seg_rows += self._pending
+            self._pending = 0
+            if self.rotating and ((self.rotate_bytes and self._seg_bytes >= self.rotate_bytes) or
+                                  (self.rotate_s and time.monotonic() - self._seg_started >= self.rotate_s)):
+                self._close_segment()
+                self._open_segment()
+
+    def commit(self):
+        """Write out everything pending now."""
+        with self._lock:
+            self._commit_locked()
+
+    def _tick(self):
+        while not self._stop.wait(min(self.flush_s, 0.25) or 0.25):
+            with self._lock:
+                if self._pending and time.monotonic() - self._oldest >= self.flush_s:
+                    self._commit_locked()
+                elif self.rotating and self.rotate_s and not self._pending and \
+                        time.monotonic() - self._seg_started >= self.rotate_s and self._seg_rows:
+                    self._close_segment()
+                    self._open_segment()
+
+    def close(self):
+        self._stop.set()
+        if self._timer:
+            self._timer.join(1.0)
+        with self._lock:
+            self._commit_locked()
+            self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def add_sink_args(ap):
+    """Add the group-commit/rotation options to a logger's argparse parser."""
+    g = ap.add_argument_group("CSV commit policy")
+    g.add_argument("--flush-rows", type=int, default=256, help="Commit after this many rows (default: 256)")
+    g.add_argument("--flush-ms", type=int, default=1000, help="...or when the oldest pending row is this old (default: 1000)")
+    g.add_argument("--fsync", action="store_true", help="fsync every commit (durable, more flash wear)")
+    g.add_argument("--rotate-mb", type=float, default=0, help="Start a new file after N MB (0 = never)")
+    g.add_argument("--rotate-min", type=float, default=0, help="Start a new file after N minutes (0 = never)")
+
+def sink_from_args(path, header, args, append=False):
+    return GroupCommitCsvWriter(
+        path, header, flush_rows=args.flush_rows, flush_ms=args.flush_ms, fsync=args.fsync,
+        rotate_bytes=int(args.rotate_mb * 1e6), rotate_s=args.rotate_min * 60, append=append)
@@ -0,0 +1,121 @@
+"""
+Pseudo-terminal fake serial devices for testing loggers without hardware.
+
+Each FakeSerialDevice opens a pty pair and writes board-style output to the
+master side from a background thread. The slave path (e.g. /dev/pts/7) can be
+opened with `serial.Serial(path)` exactly like a real board. POSIX only.
+
+    python shared/fake_serial.py --fmt gyro --rate 500 --count 4
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import threading
+import time
+import tty
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.binary_frames import encode_frame
+
+def synthetic_lines(fmt, seed=0):
+    """Endless generator of one board's output lines (bytes, no newline)."""
+    rng = random.Random(seed)
+    i = 0
+    while True:
+        t = i * 0.02
+        if fmt == "gyro":
+            yield b",%.6f,%.6f,%.6f" % (math.sin(t) * 10 + rng.gauss(0, 1), rng.gauss(-0.3, 0.05), rng.gauss(-0.18, 0.05))
+        elif fmt == "xyz_ms":
+            yield b"%d,%.6f,%.6f,%.6f" % (i * 20, math.sin(t) * 50, math.cos(t) * 50, math.sin(2 * t) * 20)
+        elif fmt == "dht":
+            yield b"%.1f,%.1f" % (21 + math.sin(t / 100), 55 + rng.gauss(0, 0.5))
+        elif fmt == "deskcoach":
+            yield b"0,,,%.1f" % (8 + math.sin(t / 5) * 6 + rng.gauss(0, 0.3))
+        elif fmt == "dht_table":
+            yield b"OK         | %.1f         | %.1f" % (55 + rng.gauss(0, 0.5), 17 + math.sin(t / 100))
+        elif fmt == "binary":
+            yield encode_frame(i, i * 20, math.sin(t) * 10, rng.gauss(-0.3, 0.05), rng.gauss(-0.18, 0.05))
+        else:
+            raise ValueError(f"unknown format {fmt!r}")
+        i += 1
+
+class FakeSerialDevice:
+    """A pty that emits `source` at `rate` items/s (0 = as fast as possible)."""
+
+    def __init__(self, source, rate=100.0, binary=False, limit=0):
+        self.source = iter(source)
+        self.rate = rate
+        self.binary = binary
+        self.limit = limit
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self.sent = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        period = 1.0 / self.rate if self.rate else 0.0
+        batch = max(1, int(self.rate / 200)) if self.rate else 256   # ~5 ms of data per write
+        t_next = time.perf_counter()
+        sep = b"" if self.binary else b"\n"
+        try:
+            while not self._stop.is_set():
+                chunk = []
+                for _ in range(batch):
+                    try:
+                        chunk.append(next(self.source))
+                    except StopIteration:
+                        self._stop.set()
+                        break
+                if chunk:
+                    os.write(self.master, sep.join(chunk) + sep)
+                    self.sent += len(chunk)
+                if self.limit and self.sent >= self.limit:
+                    break
+                if period:
+                    t_next += period * len(chunk)
+                    delay = t_next - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        except OSError:
+            pass   # closed under us
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(1.0)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+def main():
+    ap = argparse.ArgumentParser(description="Create fake serial boards on pseudo-terminals")
+    ap.add_argument("--fmt", default="gyro", help="gyro, xyz_ms, dht, deskcoach, dht_table or binary")
+    ap.add_argument("--rate", type=float, default=100.0, help="Samples per second per device (0 = max)")
+    ap.add_argument("--count", type=int, default=1, help="Number of devices")
+    args = ap.parse_args()
+
+    devs = [FakeSerialDevice(synthetic_lines(args.fmt, seed=i), args.rate, binary=args.fmt == "binary").start()
+            for i in range(args.count)]
+    for d in devs:
+        print(d.path)
+    print(f"[fake] {args.count} x {args.fmt} @ {args.rate:g} Hz (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    for d in devs:
+        d.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Fast static PNG plots: min/max decimation, Agg, reused figures, optional worker processes.
+
+The weekly plot scripts passed every raw sample to matplotlib at 150-300 dpi.
+A 1000-pixel-wide line can't show more than two values per pixel column
+(its lowest and highest), but matplotlib still transformed, clipped and
+stroked every point. So rendering time grew with the session length.
+
+`Plotter.line()` first cuts a series down to the pixel width of the axes it
+is drawn into. The x range is split into one bin per pixel column. Each bin
+keeps the first sample at its minimum and the first at its maximum, in time
+order, plus the series' first and last samples. The rendered line looks the
+same, spikes included, but is drawn from at most ~2 x width points. Markers
+are dropped on a decimated series, because min/max picks would look like
+samples. `--max-points N` sets the budget per series explicitly; 0 draws
+everything.
+
+Everything renders with the Agg backend on Figure objects (no pyplot state).
+Figures are kept per size and cleared between outputs instead of being
+rebuilt. `Plotter.submit()` sends a plot function to a process pool
+(`--plot-workers`); each worker has its own Plotter. `report()` prints points
+in/drawn, and draw and save time, per file.
+
+    plotter = Plotter(dpi=300, max_points=args.max_points, workers=args.plot_workers)
+    plotter.submit(plot_temperature, "week3_temp.png", ts, temp)   # def plot_temperature(plotter, path, ts, temp)
+    plotter.close()
+    plotter.report()
+
+    python shared/fastplot.py --points 2000000   # raw vs decimated render time
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import matplotlib
+
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+def add_plot_args(parser, dpi=None):
+    """The options every plotting script shares."""
+    parser.add_argument("--max-points", type=int, default=None,
+                        help="Max points drawn per series (default: 2 per pixel column; 0 = all)")
+    parser.add_argument("--plot-workers", type=int, default=1, help="Render plots in this many processes")
+    parser.add_argument("--dpi", type=int, default=dpi, help="PNG resolution" + (f" (default {dpi})" if dpi else ""))
+    return parser
+
+def _numeric(x):
+    x = np.asarray(x)
+    if x.dtype.kind == "M":
+        return x.view(np.int64).astype(np.float64)
+    if x.dtype == object:   # tz-aware timestamps from pandas
+        return np.array([v.value for v in x], dtype=np.float64)
+    return x.astype(np.float64)
+
+def minmax_indices(x, y, bins):
+    """Indices of the samples to keep: first min and first max per x bin, plus both ends (x sorted)."""
+    n = len(y)
+    if bins <= 0 or n <= 2 * bins:
+        return np.arange(n)
+    xf = _numeric(x)
+    span = xf[-1] - xf[0]
+    b = ((xf - xf[0]) * (bins / span)).astype(np.int64) if span > 0 else np.arange(n) * bins // n
+    np.clip(b, 0, bins - 1, out=b)
+    seg_start = np.flatnonzero(np.concatenate(([True], b[1:] != b[:-1])))
+    seg = np.cumsum(np.concatenate(([0], (b[1:] != b[:-1]).view(np.int8))))
+    yf = np.asarray(y, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        lo = np.fmin.reduceat(yf, seg_start)
+        hi = np.fmax.reduceat(yf, seg_start)
+    keep = []
+    for ext in (lo, hi):
+        cand = np.flatnonzero(yf == ext[seg])
+        if len(cand):
+            first = np.concatenate(([True], seg[cand][1:] != seg[cand][:-1]))
+            keep.append(cand[first])
+    # All-NaN bins keep their first sample, so gaps still break the line
+    nan_bins = np.flatnonzero(np.isnan(lo))
+    keep += [seg_start[nan_bins], [0, n - 1]]
+    return np.unique(np.concatenate(keep).astype(np.int64))
+
+def decimate(x, y, bins):
+    idx = minmax_indices(x, y, bins)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+class MinMaxReducer:
+    """decimate() for a series that arrives in time-sorted chunks.
+
+    The x range [x0, x1] must be known up front, so bins match decimate()'s on
+    the whole series. Keeps the first min and first max of each bin and the
+    series' ends; memory is O(bins) however long the series is. Up to 2 x bins
+    samples are also kept raw, since decimate() returns short series whole.
+    """
+
+    def __init__(self, x0, x1, bins):
+        self.x0 = _numeric([x0])[0]
+        self.span = _numeric([x1])[0] - self.x0
+        self.bins = max(1, int(bins))
+        self.lo = np.full(self.bins, np.inf)
+        self.hi = np.full(self.bins, -np.inf)
+        self.lo_x = self.hi_x = self.nan_x = None
+        self.seen = np.zeros(self.bins, dtype=bool)
+        self.n = 0
+        self.ends = []
+        self.raw = []
+
+    def add(self, x, y):
+        x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+        if not len(y):
+            return
+        if self.lo_x is None:
+            self.lo_x, self.hi_x, self.nan_x = (np.zeros(self.bins, dtype=x.dtype) for _ in range(3))
+        if not self.ends:
+            self.ends.append((x[:1], y[:1]))
+        self.ends[1:] = [(x[-1:], y[-1:])]
+        self.n += len(y)
+        self.raw = self.raw + [(x, y)] if self.n <= 2 * self.bins else None
+        xf = _numeric(x)
+        b = ((xf - self.x0) * (self.bins / self.span)).astype(np.int64) if self.span > 0 else np.zeros(len(y), np.int64)
+        np.clip(b, 0, self.bins - 1, out=b)
+        change = np.concatenate(([True], b[1:] != b[:-1]))
+        starts = np.flatnonzero(change)
+        seg = np.cumsum(change) - 1
+        ids = b[starts]
+        with np.errstate(invalid="ignore"):
+            lo = np.fmin.reduceat(y, starts)
+            hi = np.fmax.reduceat(y, starts)
+        new = ~self.seen[ids]
+        self.nan_x[ids[new]] = x[starts[new]]   # first sample of the bin, kept if it never gets a value
+        self.seen[ids] = True
+        for ext, best, best_x, better in ((lo, self.lo, self.lo_x, np.less), (hi, self.hi, self.hi_x, np.greater)):
+            cand = np.flatnonzero(y == ext[seg])
+            if not len(cand):
+                continue
+            first = cand[np.concatenate(([True], seg[cand][1:] != seg[cand][:-1]))]
+            s_ids = ids[seg[first]]
+            # Strictly better only: an equal value in an earlier chunk came first
+            take = better(y[first], best[s_ids])
+            best[s_ids[take]] = y[first[take]]
+            best_x[s_ids[take]] = x[first[take]]
+
+    def result(self):
+        """(x, y) of the kept samples in x order, like decimate() on the whole series."""
+        if self.lo_x is None:
+            return np.empty(0), np.empty(0)
+        if self.raw is not None:
+            return np.concatenate([r[0] for r in self.raw]), np.concatenate([r[1] for r in self.raw])
+        valid = np.isfinite(self.lo)
+        empty = self.seen & ~valid
+        xs = [self.lo_x[valid], self.hi_x[valid], self.nan_x[empty]] + [e[0] for e in self.ends]
+        ys = [self.lo[valid], self.hi[valid], np.full(empty.sum(), np.nan)] + [e[1] for e in self.ends]
+        x, y = np.concatenate(xs), np.concatenate(ys)
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+        keep = np.concatenate(([True], x[1:] != x[:-1]))
+        return x[keep], y[keep]
+
+class Plotter:
+    def __init__(self, dpi=150, max_points=None, workers=1, verbose=True):
+        self.dpi = dpi
+        self.max_points = max_points
+        self.workers = workers
+        self.verbose = verbose
+        self.rows = []              # (path, points in, points drawn, draw s, save s)
+        self._figures = {}
+        self._pool = None
+        self._futures = []
+        self._current = None
+
+    # ---- drawing ----
+    def bins_for(self, ax):
+        """Bins for one series in `ax`: one per output pixel column, or max_points / 2."""
+        if self.max_points is not None:
+            return self.max_points // 2
+        return int(np.ceil(ax.get_position().width * ax.figure.get_figwidth() * self.dpi))
+
+    def line(self, ax, x, y, points=None, **kw):
+        """ax.plot(x, y, **kw) after min/max decimation to the axes' pixel width.
+
+        `points` is the raw sample count when x/y were already decimate()d (e.g. before
+        submit()), so report() and the marker rule still see the original series.
+        """
+        x, y = np.asarray(x), np.asarray(y)
+        n = len(y) if points is None else points
+        x, y = decimate(x, y, self.bins_for(ax))
+        if len(y) < n:
+            kw.pop("marker", None)
+            kw.pop("markersize", None)
+        if self._current is not None:
+            self._current[0] += n
+            self._current[1] += len(y)
+        return ax.plot(x, y, **kw)
+
+    @contextmanager
+    def figure(self, path, figsize=(12, 6), nrows=1, ncols=1, **subplots_kw):
+        """Yield (fig, axes) on a reused figure; save to `path` with bbox_inches="tight" on exit."""
+        key = (tuple(figsize), nrows, ncols, tuple(sorted(subplots_kw.items())))
+        fig = self._figures.get(key)
+        if fig is None:
+            fig = Figure(figsize=figsize, dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            self._figures[key] = fig
+        else:
+            fig.clear()
+        axes = fig.subplots(nrows, ncols, **subplots_kw)
+        self._current = [0, 0]
+        t0 = time.perf_counter()
+        yield fig, axes
+        t1 = time.perf_counter()
+        fig.savefig(path, dpi=self.dpi, bbox_inches="tight")
+        t2 = time.perf_counter()
+        self.rows.append((str(path), self._current[0], self._current[1], t1 - t0, t2 - t1))
+        self._current = None
+        if self.verbose:
+            print(f"[plot] Saved {path}")
+
+    # ---- parallel rendering ----
+    def submit(self, fn, path, *args):
+        """Run fn(plotter, path, *args) here, or in a worker process if workers > 1.
+
+        fn must be a module-level function. Arguments are pickled, so pass
+        decimate()d arrays for very long series, and their raw length as line(points=...).
+        """
+        if self.workers <= 1:
+            fn(self, path, *args)
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        self._futures.append(self._pool.submit(_run_job, self.dpi, self.max_points, fn, path, args))
+
+    def close(self):
+        """Wait for submitted plots and collect their timings."""
+        if self._pool is not None:
+            for f in self._futures:
+                self.rows += f.result()
+            self._pool.shutdown()
+            self._pool, self._futures = None, []
+
+    def report(self, wall_s=None):
+        if not self.rows:
+            return
+        print(f"[plot] {'file':<40} {'points':>10} {'drawn':>8} {'draw ms':>8} {'save ms':>8}")
+        for path, n, drawn, draw_s, save_s in self.rows:
+            print(f"[plot] {os.path.basename(path):<40} {n:>10,} {drawn:>8,} {1000 * draw_s:>8.1f} {1000 * save_s:>8.1f}")
+        total = sum(r[3] + r[4] for r in self.rows)
+        extra = f", {wall_s:.2f}s wall" if wall_s is not None else ""
+        print(f"[plot] {len(self.rows)} files: {total:.2f}s rendering on {self.workers} worker(s){extra}")
+
+def _run_job(dpi, max_points, fn, path, args):
+    plotter = Plotter(dpi, max_points)
+    fn(plotter, path, *args)
+    return plotter.rows
+
+def main():
+    ap = argparse.ArgumentParser(description="Raw vs min/max-decimated line rendering time")
+    ap.add_argument("--points", type=int, default=2_000_000)
+    ap.add_argument("--dpi", type=int, default=150)
+    ap.add_argument("--out", default="/tmp")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    x = np.datetime64("2025-01-01T00:00:00", "ms") + np.arange(args.points).astype("timedelta64[ms]") * 10
+    y = np.cumsum(rng.normal(0, 1, args.points))
+    y[rng.integers(0, args.points, 20)] += 500   # spikes must survive decimation
+    for label, max_points in (("raw", 0), ("decimated", None)):
+        plotter = Plotter(args.dpi, max_points)
+        with plotter.figure(os.path.join(args.out, f"fastplot_{label}.png")) as (fig, ax):
+            plotter.line(ax, x, y, linewidth=1)
+        plotter.report()
+
+if __name__ == "__main__":
+    main()
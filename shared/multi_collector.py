@@ -0,0 +1,339 @@
+"""
+One asyncio process that collects from many serial boards at once.
+
+Replaces running one W6/W7/W9 logger process per board. Every port gets its
+own reader task, parser, bounded queue and reconnect loop; every sample is
+tagged with the port's device id and fed to a shared set of sinks.
+
+    python shared/multi_collector.py \\
+        --port /dev/ttyACM0,gyro,nano1 --port /dev/ttyUSB0,dht,esp32 \\
+        --csv-dir sessions --parquet-dir sessions_pq
+
+A `--port` spec is `DEVICE[,FORMAT[,DEVICE_ID[,BAUD[,PERIOD_MS]]]]`. FORMAT is one
+of the shared.serial_ingest FORMATS or `binary` (shared.binary_frames).
+
+Every row gets its own time (serial_ingest.RowClock): the newest row of a read
+gets the read time, earlier ones are spaced by the board's ms counter
+(`xyz_ms`, `binary`) or by PERIOD_MS (default: the sketch's rate for the format).
+
+Backpressure: each port has a queue of parsed batches. With `--on-full block`
+(default) a slow sink stops that port's reader, so the OS/driver buffer and
+the board's flow control absorb the burst. With `--on-full drop` the oldest
+queued batch is discarded and counted instead.
+"""
+import argparse
+import asyncio
+import csv
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import serial
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.binary_frames import BinaryFrameReader
+from shared.serial_ingest import ChunkedLineReader, RowClock, iso_utc, make_parser
+
+COLUMNS = {
+    "gyro": ["gx", "gy", "gz"],
+    "xyz_ms": ["ms", "x", "y", "z"],
+    "dht": ["temperature_C", "humidity_pct"],
+    "deskcoach": ["temp_c", "hum_pct", "pitch_deg"],
+    "dht_table": ["humidity_pct", "temperature_C"],
+    "binary": ["t_ms", "x", "y", "z"],
+}
+# Formats whose first column is the board's millis(), used to space rows within a read
+DEVICE_MS = {"xyz_ms", "binary"}
+# Nominal sample period (ms) of the sketch behind each format, for the others
+PERIOD_MS = {"gyro": 20.0, "dht": 2000.0, "deskcoach": 1000.0, "dht_table": 2000.0, "xyz_ms": 10.0, "binary": 10.0}
+
+class PortSpec:
+    def __init__(self, spec):
+        parts = spec.split(",")
+        self.device = parts[0]
+        self.fmt = parts[1] if len(parts) > 1 and parts[1] else "gyro"
+        self.device_id = parts[2] if len(parts) > 2 and parts[2] else Path(self.device).name
+        self.baud = int(parts[3]) if len(parts) > 3 and parts[3] else 115200
+        if self.fmt not in COLUMNS:
+            raise ValueError(f"unknown format {self.fmt!r} in --port {spec}")
+        self.period_ms = float(parts[4]) if len(parts) > 4 and parts[4] else PERIOD_MS[self.fmt]
+
+class Batch:
+    """Rows parsed from one read of one port; `ts` holds one datetime64[us] (UTC) per row."""
+    __slots__ = ("device_id", "fmt", "ts", "rows")
+
+    def __init__(self, device_id, fmt, ts, rows):
+        self.device_id = device_id
+        self.fmt = fmt
+        self.ts = ts
+        self.rows = rows
+
+class PortReader:
+    """Read, parse and enqueue one port forever, reconnecting with backoff."""
+
+    def __init__(self, spec, queue_size=256, on_full="block", max_backoff=30.0):
+        self.spec = spec
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.on_full = on_full
+        self.max_backoff = max_backoff
+        self.stats = {"rows": 0, "batches": 0, "dropped_batches": 0, "reconnects": 0, "errors": 0}
+        self.parser = None
+        self.connected = False
+        self.clock = RowClock(spec.period_ms)
+
+    def _open(self):
+        ser = serial.Serial(self.spec.device, self.spec.baud, timeout=0)
+        if self.spec.fmt == "binary":
+            self.parser = BinaryFrameReader(ser)
+            return ser, self.parser.read_frames
+        reader = ChunkedLineReader(ser)
+        self.parser = make_parser(self.spec.fmt)
+        return ser, lambda: self.parser.parse(reader.read_lines())
+
+    async def _wait_readable(self, ser):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        fd = ser.fileno()
+        loop.add_reader(fd, lambda: fut.done() or fut.set_result(None))
+        try:
+            await fut
+        finally:
+            loop.remove_reader(fd)
+
+    async def _put(self, batch):
+        if self.on_full == "drop":
+            while self.queue.full():
+                self.queue.get_nowait()
+                self.stats["dropped_batches"] += 1
+            self.queue.put_nowait(batch)
+        else:
+            await self.queue.put(batch)
+
+    async def run(self):
+        delay = 0.5
+        while True:
+            try:
+                ser, read_rows = self._open()
+            except (serial.SerialException, OSError) as e:
+                print(f"[{self.spec.device_id}] open failed: {e}; retry in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            self.connected = True
+            delay = 0.5
+            print(f"[{self.spec.device_id}] connected {self.spec.device} ({self.spec.fmt})")
+            try:
+                while True:
+                    if not ser.in_waiting:
+                        await self._wait_readable(ser)
+                    rows = read_rows()
+                    if self.spec.fmt == "binary":
+                        rows = np.column_stack([rows[c] for c in COLUMNS["binary"]])
+                    if not len(rows):
+                        continue
+                    ts = self.clock.stamp(len(rows), rows[:, 0] if self.spec.fmt in DEVICE_MS else None)
+                    # Parsers hand back views into their buffers; copy before queueing
+                    await self._put(Batch(self.spec.device_id, self.spec.fmt, ts, rows.copy()))
+                    self.stats["rows"] += len(rows)
+                    self.stats["batches"] += 1
+            except (serial.SerialException, OSError) as e:
+                self.stats["errors"] += 1
+                self.stats["reconnects"] += 1
+                print(f"[{self.spec.device_id}] lost connection: {e}; reconnecting")
+            finally:
+                self.connected = False
+                try:
+                    ser.close()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay)
+
+# ---------- Sinks ----------
+
+class CsvSink:
+    """One CSV per device: time, device_id, <format columns>."""
+
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.files = {}
+
+    def write(self, batch):
+        entry = self.files.get(batch.device_id)
+        if entry is None:
+            f = open(self.out_dir / f"{batch.device_id}.csv", "w", newline="")
+            w = csv.writer(f)
+            w.writerow(["time", "device_id"] + COLUMNS[batch.fmt])
+            entry = self.files[batch.device_id] = (f, w)
+        f, w = entry
+        w.writerows([ts, batch.device_id] + r for ts, r in zip(iso_utc(batch.ts, "us"), batch.rows.tolist()))
+
+    def flush(self):
+        for f, _ in self.files.values():
+            f.flush()
+
+    def close(self):
+        for f, _ in self.files.values():
+            f.close()
+
+class ParquetSink:
+    """One Parquet file per device, written in row groups of `rows_per_group`."""
+
+    def __init__(self, out_dir, rows_per_group=50_000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pa, pq
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.rows_per_group = rows_per_group
+        self.pending = {}
+        self.writers = {}
+
+    def write(self, batch):
+        p = self.pending.setdefault(batch.device_id, (batch.fmt, [], []))
+        p[1].append(batch.ts)
+        p[2].append(batch.rows)
+        if sum(len(r) for r in p[2]) >= self.rows_per_group:
+            self._write_group(batch.device_id)
+
+    def _write_group(self, device_id):
+        fmt, times, rows = self.pending.pop(device_id, (None, [], []))
+        if not rows:
+            return
+        values = np.concatenate(rows)
+        cols = {"time": self.pa.array(np.concatenate(times), type=self.pa.timestamp("us", tz="UTC"))}
+        for i, name in enumerate(COLUMNS[fmt]):
+            cols[name] = self.pa.array(values[:, i].astype(np.float32))
+        table = self.pa.table(cols)
+        w = self.writers.get(device_id)
+        if w is None:
+            w = self.writers[device_id] = self.pq.ParquetWriter(
+                str(self.out_dir / f"{device_id}.parquet"), table.schema, compression="zstd")
+        w.write_table(table)
+
+    def flush(self):
+        pass   # row groups are only written when full, or on close
+
+    def close(self):
+        for device_id in list(self.pending):
+            self._write_group(device_id)
+        for w in self.writers.values():
+            w.close()
+
+class FirebaseSink:
+    """Pushes gyro-style batches through the W5 background uploader."""
+
+    def __init__(self, db_url, path, auth=None):
+        sys.path.insert(0, str(ROOT / "W5"))
+        from firebase_uploader import BatchUploader
+        self.path = path.strip("/")
+        self.db_url, self.auth = db_url, auth
+        self.uploaders = {}
+        self.BatchUploader = BatchUploader
+
+    def write(self, batch):
+        up = self.uploaders.get(batch.device_id)
+        if up is None:
+            up = self.uploaders[batch.device_id] = self.BatchUploader(
+                self.db_url, f"{self.path}/{batch.device_id}", auth=self.auth).start()
+        cols = COLUMNS[batch.fmt]
+        for ts, r in zip(iso_utc(batch.ts, "us"), batch.rows.tolist()):
+            sample = dict(zip(cols, r))
+            sample["ts"] = ts
+            up.submit(sample)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        for up in self.uploaders.values():
+            up.close()
+
+# ---------- Collector ----------
+
+class Collector:
+    def __init__(self, specs, sinks, queue_size=256, on_full="block", flush_s=1.0):
+        self.readers = [PortReader(s, queue_size, on_full) for s in specs]
+        self.sinks = sinks
+        self.flush_s = flush_s
+
+    async def _drain(self, reader):
+        while True:
+            batch = await reader.queue.get()
+            for sink in self.sinks:
+                sink.write(batch)
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_s)
+            for sink in self.sinks:
+                sink.flush()
+
+    def totals(self):
+        return sum(r.stats["rows"] for r in self.readers)
+
+    async def run(self, seconds=0.0, report_s=5.0):
+        tasks = [asyncio.create_task(r.run()) for r in self.readers]
+        tasks += [asyncio.create_task(self._drain(r)) for r in self.readers]
+        tasks.append(asyncio.create_task(self._flusher()))
+        t0 = time.perf_counter()
+        last_rows, last_t = 0, t0
+        try:
+            while not seconds or time.perf_counter() - t0 < seconds:
+                await asyncio.sleep(min(report_s, seconds) if seconds else report_s)
+                now, rows = time.perf_counter(), self.totals()
+                print(f"[collector] {rows} rows, {(rows - last_rows) / (now - last_t):.0f} rows/s, "
+                      f"queues={[r.queue.qsize() for r in self.readers]}")
+                last_rows, last_t = rows, now
+        finally:
+            # Let queued batches reach the sinks before shutting down
+            for r in self.readers:
+                while not r.queue.empty():
+                    batch = r.queue.get_nowait()
+                    for sink in self.sinks:
+                        sink.write(batch)
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for sink in self.sinks:
+                sink.close()
+        return time.perf_counter() - t0
+
+def build_sinks(args):
+    sinks = []
+    if args.csv_dir:
+        sinks.append(CsvSink(args.csv_dir))
+    if args.parquet_dir:
+        sinks.append(ParquetSink(args.parquet_dir))
+    if args.db_url:
+        sinks.append(FirebaseSink(args.db_url, args.db_path, args.auth))
+    return sinks
+
+def main():
+    ap = argparse.ArgumentParser(description="Collect from many serial boards in one asyncio process")
+    ap.add_argument("--port", action="append", required=True,
+                    help="DEVICE[,FORMAT[,DEVICE_ID[,BAUD[,PERIOD_MS]]]]; repeat for each board")
+    ap.add_argument("--csv-dir", default="sessions", help="One CSV per device ('' to disable)")
+    ap.add_argument("--parquet-dir", default="", help="One Parquet file per device")
+    ap.add_argument("--db-url", default="", help="Also push to Firebase (W5 uploader)")
+    ap.add_argument("--db-path", default="sessions")
+    ap.add_argument("--auth", default=None)
+    ap.add_argument("--queue-size", type=int, default=256, help="Parsed batches buffered per port")
+    ap.add_argument("--on-full", choices=["block", "drop"], default="block")
+    ap.add_argument("--seconds", type=float, default=0.0, help="Stop after N seconds (0 = run until Ctrl+C)")
+    args = ap.parse_args()
+
+    specs = [PortSpec(s) for s in args.port]
+    collector = Collector(specs, build_sinks(args), args.queue_size, args.on_full)
+    try:
+        asyncio.run(collector.run(args.seconds))
+    except KeyboardInterrupt:
+        pass
+    for r in collector.readers:
+        summary = r.parser.summary() if r.parser else "never connected"
+        print(f"[{r.spec.device_id}] {r.stats} {summary}")
+
+if __name__ == "__main__":
+    main()
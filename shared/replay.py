@@ -0,0 +1,308 @@
+"""
+Replay recorded sessions (or simulator output) as a board, at N x real time.
+
+Every logger in the repo reads a serial port. Until now the only way to run
+one was with the board plugged in, so nobody noticed when one got slower. A
+`Recording` is any session file `session_store.load_frame` can read: a CSV
+such as W5/gyro_data_final.csv or W9/deskcoach_session.csv, a Parquet
+dataset, or `W8/.../activity_sim.py --out` output. It is re-encoded in the
+wire format a logger expects (see serial_ingest.FORMATS) and paced by its
+own timestamps divided by `speed`. speed 1 is real time, 10 is ten times
+faster, and 0 is as fast as the reader keeps up.
+
+Two ways to feed it to a logger:
+
+  ReplayDevice   a pty; pass its path as --port to any logger script
+  ReplayPort     in-process pyserial stand-in (in_waiting / read / readline)
+                 for ChunkedLineReader, or `due_rows()` for sample-level sources
+                 such as the W8 dashboard (W8_REPLAY=<file>)
+
+Both log when each line was released (`sent_at(i)`), which is what
+bench_loggers.py uses for end-to-end latency.
+
+    python shared/replay.py W5/gyro_data_final.csv --fmt gyro --speed 10
+    python W5/firebase_gyro_pipeline.py listen --port /dev/pts/7 ...
+"""
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+import tty
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.session_store import guess_time_col, load_frame
+
+# Value columns each wire format is built from, in order of preference
+FORMAT_COLUMNS = {
+    "gyro": [("gx", "gy", "gz"), ("x", "y", "z")],
+    "xyz_ms": [("x", "y", "z"), ("gx", "gy", "gz")],
+    "dht": [("temperature_C", "humidity_pct"), ("temp_c", "hum_pct")],
+    "deskcoach": [("temp_c", "hum_pct", "pitch_deg")],
+    "dht_table": [("Humidity (%)", "Temperature (°C)")],
+}
+
+def _num(v, fmt=b"%.6f"):
+    return b"" if math.isnan(v) else fmt % v
+
+def encode_line(fmt, t, vals):
+    """One line of board output (no newline) for sample time `t` (s) and values."""
+    if fmt == "gyro":
+        return b"," + b",".join(_num(v) for v in vals)
+    if fmt == "xyz_ms":
+        return b"%d," % round(t * 1000) + b",".join(_num(v) for v in vals)
+    if fmt == "dht":
+        return b",".join(_num(v, b"%.2f") for v in vals)
+    if fmt == "deskcoach":
+        return b"0," + b",".join(_num(v, b"%.1f") for v in vals)
+    if fmt == "dht_table":
+        return b"OK         | %.1f         | %.1f" % tuple(vals)
+    raise ValueError(f"unknown format {fmt!r}")
+
+class Recording:
+    """Sample times (s from the first sample) plus value columns of one session."""
+
+    def __init__(self, t, values, columns, labels=None, name="recording"):
+        self.t = np.asarray(t, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.columns = tuple(columns)
+        self.labels = labels
+        self.name = name
+        # One loop lasts the recording plus one median sample gap
+        gaps = np.diff(self.t)
+        self.period = float(self.t[-1] + (np.median(gaps) if len(gaps) else 1.0)) if len(self.t) else 0.0
+
+    def __len__(self):
+        return len(self.t)
+
+    @classmethod
+    def load(cls, path, fmt=None, rate_hz=20.0, max_gap_s=5.0):
+        """Read a session file. Without a time column, samples are spaced at rate_hz.
+
+        Pauses longer than max_gap_s (the logger was stopped and restarted) are
+        shortened to the median sample gap, so replays don't sit idle.
+        """
+        df = load_frame(path)
+        time_col = guess_time_col(df.columns)
+        candidates = FORMAT_COLUMNS[fmt] if fmt else [c for cs in FORMAT_COLUMNS.values() for c in cs]
+        cols = next((c for c in candidates if all(x in df.columns for x in c)), None)
+        if cols is None:
+            raise SystemExit(f"{path}: none of {candidates} found in columns {list(df.columns)}")
+        if time_col:
+            ts = df[time_col]
+            if getattr(ts.dt, "tz", None) is not None:
+                ts = ts.dt.tz_convert(None)
+            t = (ts - ts.iloc[0]).dt.total_seconds().to_numpy()
+            gaps = np.diff(t)
+            if max_gap_s and len(gaps) and (gaps > max_gap_s).any():
+                gaps[gaps > max_gap_s] = np.median(gaps)
+                t = np.concatenate([[0.0], np.cumsum(gaps)])
+        else:
+            t = np.arange(len(df)) / rate_hz
+        labels = df["label"].astype(str).to_numpy() if "label" in df.columns else None
+        values = df[list(cols)].apply(lambda s: s.astype("float64")).to_numpy()
+        return cls(t, values, cols, labels, Path(path).name)
+
+    def time_of(self, i):
+        """Scheduled time of line i (i may run past the end when looping)."""
+        loops, j = divmod(i, len(self))
+        return loops * self.period + self.t[j]
+
+    def due_count(self, elapsed_recording_s):
+        """How many lines are due `elapsed_recording_s` into the (looped) recording."""
+        loops = int(elapsed_recording_s // self.period)
+        rem = elapsed_recording_s - loops * self.period
+        return loops * len(self) + int(np.searchsorted(self.t, rem, side="right"))
+
+    def lines(self, fmt, start, stop):
+        n = len(self)
+        return [encode_line(fmt, self.time_of(i), self.values[i % n]) for i in range(start, stop)]
+
+class _Pacer:
+    """Release schedule shared by the pty and in-process sources."""
+
+    def __init__(self, recording, speed=1.0, loop=False, limit=0, batch_max=4096):
+        self.rec = recording
+        self.speed = speed
+        self.total = limit or (None if loop else len(recording))
+        self.batch_max = batch_max
+        self.sent = 0
+        self._marks_n = []   # cumulative lines released ...
+        self._marks_t = []   # ... and the wall-clock time (time.time()) they were released
+        self.t0 = None
+
+    def start(self):
+        self.t0 = time.monotonic()
+
+    @property
+    def finished(self):
+        return self.total is not None and self.sent >= self.total
+
+    def due(self):
+        """Index range [start, stop) of lines that should be released now."""
+        if self.speed:
+            stop = self.rec.due_count((time.monotonic() - self.t0) * self.speed)
+            stop = min(stop, self.sent + self.batch_max)
+        else:
+            stop = self.sent + self.batch_max
+        if self.total is not None:
+            stop = min(stop, self.total)
+        return self.sent, max(stop, self.sent)
+
+    def mark(self, stop):
+        self.sent = stop
+        self._marks_n.append(stop)
+        self._marks_t.append(time.time())
+
+    def wait_s(self):
+        """Seconds until the next line is due (0 at max speed)."""
+        if not self.speed:
+            return 0.0
+        nxt = self.rec.time_of(self.sent) / self.speed
+        return max(0.0, nxt - (time.monotonic() - self.t0))
+
+    def sent_at(self, idx):
+        """time.time() at which line(s) `idx` were released (NaN if not yet)."""
+        idx = np.asarray(idx)
+        k = min(len(self._marks_n), len(self._marks_t))   # the sender may be appending right now
+        n, t = np.asarray(self._marks_n[:k]), np.asarray(self._marks_t[:k])
+        out = np.full(idx.shape, np.nan)
+        pos = np.searchsorted(n, idx, side="right")
+        ok = pos < k
+        out[ok] = t[pos[ok]]
+        return out
+
+class ReplayDevice(_Pacer):
+    """A pty that plays `recording` in `fmt`; open `.path` like a serial port. POSIX only."""
+
+    def __init__(self, recording, fmt, speed=1.0, loop=False, limit=0):
+        super().__init__(recording, speed, loop, limit)
+        self.fmt = fmt
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replay", daemon=True)
+
+    def start(self):
+        super().start()
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            while not self._stop.is_set() and not self.finished:
+                start, stop = self.due()
+                if stop > start:
+                    data = b"\n".join(self.rec.lines(self.fmt, start, stop)) + b"\n"
+                    self.mark(stop)   # before the write: time spent blocked on a full pty counts as latency
+                    os.write(self.master, data)
+                else:
+                    self._stop.wait(min(self.wait_s(), 0.05))
+        except OSError:
+            pass   # closed under us
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(1.0)
+
+    def close(self):
+        self.stop()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+class ReplayPort(_Pacer):
+    """In-process pyserial stand-in that releases the recording on schedule."""
+
+    def __init__(self, recording, fmt=None, speed=1.0, loop=False, limit=0, timeout=1.0):
+        super().__init__(recording, speed, loop, limit)
+        self.fmt = fmt
+        self.timeout = timeout
+        self.buf = bytearray()
+        self.start()
+
+    def _pump(self):
+        start, stop = self.due()
+        if stop > start:
+            self.buf += b"\n".join(self.rec.lines(self.fmt, start, stop)) + b"\n"
+            self.mark(stop)
+
+    @property
+    def in_waiting(self):
+        self._pump()
+        return len(self.buf)
+
+    def read(self, n=1):
+        deadline = time.monotonic() + (self.timeout or 0)
+        while not self.buf and not self.finished:
+            self._pump()
+            left = deadline - time.monotonic()
+            if self.buf or left <= 0:
+                break
+            time.sleep(min(self.wait_s(), left, 0.05))
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+    def readline(self):
+        line = bytearray()
+        while not line.endswith(b"\n"):
+            c = self.read(1)
+            if not c:
+                break
+            line += c
+        return bytes(line)
+
+    def close(self):
+        pass
+
+    def due_rows(self):
+        """Sample-level source: (indices, values, labels) released since the last call."""
+        start, stop = self.due()
+        if stop <= start:
+            return np.zeros(0, dtype=np.int64), self.rec.values[:0], None
+        self.mark(stop)
+        idx = np.arange(start, stop) % len(self.rec)
+        labels = self.rec.labels[idx] if self.rec.labels is not None else None
+        return np.arange(start, stop), self.rec.values[idx], labels
+
+def parse_speed(text):
+    """'1', '10x', 'max' -> float (0 = max)."""
+    text = str(text).lower()
+    if text in ("max", "0", "inf"):
+        return 0.0
+    return float(text[:-1] if text.endswith("x") else text)
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a recorded session as a fake serial board")
+    ap.add_argument("recording", help="CSV / Parquet session (e.g. W5/gyro_data_final.csv)")
+    ap.add_argument("--fmt", required=True, choices=sorted(FORMAT_COLUMNS), help="Wire format the logger expects")
+    ap.add_argument("--speed", default="1", help="Playback speed: 1, 10, ... or max")
+    ap.add_argument("--loop", action="store_true", help="Start again at the end")
+    ap.add_argument("--rate", type=float, default=20.0, help="Sample rate for files without a time column")
+    ap.add_argument("--max-gap", type=float, default=5.0, help="Shorten pauses longer than this (s); 0 keeps them")
+    args = ap.parse_args()
+
+    rec = Recording.load(args.recording, args.fmt, args.rate, args.max_gap)
+    dev = ReplayDevice(rec, args.fmt, parse_speed(args.speed), loop=args.loop).start()
+    print(dev.path)
+    print(f"[replay] {rec.name}: {len(rec)} samples over {rec.period:.1f}s as {args.fmt} at {args.speed}"
+          f"{' (looping)' if args.loop else ''}; Ctrl+C to stop")
+    try:
+        while not dev.finished:
+            time.sleep(1)
+        print(f"[replay] done, {dev.sent} lines sent")
+        time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    dev.close()
+
+if __name__ == "__main__":
+    main()
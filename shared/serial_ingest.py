@@ -0,0 +1,242 @@
+"""
+Fast serial line ingestion shared by the weekly loggers.
+
+Instead of `ser.readline().decode().strip().split(",")` plus a try/float per
+field for every line, `ChunkedLineReader` pulls whatever the port has buffered
+in one `read(in_waiting)` call and splits complete frames out of a bytearray.
+`LineParser` then converts a whole batch of lines at once: the numeric fields
+are cast from bytes to float64 by NumPy straight into a preallocated buffer,
+and a slow per-line path is only used when a batch contains a bad line.
+
+Each parser keeps counters (lines, parsed, malformed, comments, skipped) so a
+logger can report how clean its link is.
+
+    reader = ChunkedLineReader(ser)
+    parser = make_parser("gyro")
+    while True:
+        rows = parser.parse(reader.read_lines())   # (n, 3) float64 view
+
+A read can hold many lines, so one now() per read would put them all on the
+same instant. `RowClock` gives each row of a read its own receive time.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+
+class ChunkedLineReader:
+    """Reads a serial port in large chunks and returns complete lines as bytes."""
+
+    def __init__(self, port, max_pending=1 << 16):
+        self.port = port
+        self.max_pending = max_pending
+        self.buf = bytearray()
+        self.bytes_read = 0
+        self.overflows = 0
+
+    def read_lines(self):
+        """Return the complete lines received so far (may be empty).
+
+        Blocks for at most the port timeout when nothing is buffered yet.
+        """
+        n = self.port.in_waiting
+        data = self.port.read(n if n else 1)
+        if data and not n:
+            # Woke up on the first byte; grab the rest of what has arrived
+            more = self.port.in_waiting
+            if more:
+                data += self.port.read(more)
+        if not data:
+            return []
+        self.bytes_read += len(data)
+        self.buf += data
+        end = self.buf.rfind(b"\n")
+        if end < 0:
+            if len(self.buf) > self.max_pending:
+                # No newline in a long stretch: garbage or wrong baud rate
+                self.buf.clear()
+                self.overflows += 1
+            return []
+        chunk = bytes(self.buf[:end])
+        del self.buf[:end + 1]
+        if b"\r" in chunk:
+            chunk = chunk.replace(b"\r", b"")
+        return [ln for ln in chunk.split(b"\n") if ln.strip()]
+
+class LineParser:
+    """Bulk parser for delimited lines whose last `n_values` fields are numbers.
+
+    `field_counts` lists the accepted number of fields per line; lines with any
+    other count are malformed. Lines starting with `comment` are counted and
+    kept in `self.comments` for the caller to print. Lines that don't start
+    with `require_prefix` (when given) or that start with one of
+    `skip_prefixes` are silently skipped, e.g. header rows.
+    """
+
+    def __init__(self, name, n_values, field_counts, sep=b",", comment=b"#",
+                 require_prefix=None, skip_prefixes=(), allow_empty=False,
+                 keep_first=False, capacity=4096):
+        self.name = name
+        self.n_values = n_values
+        self.field_counts = tuple(field_counts)
+        self.sep = sep
+        self.comment = comment
+        self.require_prefix = require_prefix
+        self.skip_prefixes = tuple(skip_prefixes)
+        self.allow_empty = allow_empty
+        self.keep_first = keep_first      # also return the (text) first field of each row
+        self._buf = np.empty((capacity, n_values), dtype=np.float64)
+        self.first_fields = []
+        self.comments = []
+        self.stats = {"lines": 0, "parsed": 0, "malformed": 0, "comments": 0, "skipped": 0}
+
+    def _grow(self, n):
+        cap = len(self._buf)
+        while cap < n:
+            cap *= 2
+        self._buf = np.empty((cap, self.n_values), dtype=np.float64)
+
+    def _filter(self, lines):
+        comments, keep = [], []
+        for ln in lines:
+            ln = ln.strip()
+            if self.comment and ln.startswith(self.comment):
+                comments.append(ln)
+            elif (self.require_prefix and not ln.startswith(self.require_prefix)) or \
+                    (self.skip_prefixes and ln.startswith(self.skip_prefixes)):
+                self.stats["skipped"] += 1
+            else:
+                keep.append(ln)
+        self.stats["comments"] += len(comments)
+        self.comments = comments
+        return keep
+
+    def parse(self, lines):
+        """Parse a batch of raw lines. Returns a (n, n_values) float64 view.
+
+        The view aliases an internal buffer and is only valid until the next
+        call; copy it if you need to keep it. With `keep_first=True` the first
+        field of every parsed row is in `self.first_fields` (bytes, or None
+        for rows that came in the shorter layout without that field).
+        """
+        self.stats["lines"] += len(lines)
+        self.first_fields = []
+        lines = self._filter(lines)
+        if not lines:
+            return self._buf[:0]
+
+        # Group by field count; anything with an unexpected count is malformed
+        groups = {c: [] for c in self.field_counts}
+        bad = 0
+        for ln in lines:
+            g = groups.get(ln.count(self.sep) + 1)
+            if g is None:
+                bad += 1
+            else:
+                g.append(ln)
+        used = [(c, g) for c, g in groups.items() if g]
+
+        n = len(lines) - bad
+        if n > len(self._buf):
+            self._grow(n)
+        out = self._buf[:n]
+        firsts = []
+        try:
+            if len(used) != 1:
+                # Mixed layouts in one batch (rare): keep row order by going line by line
+                raise ValueError
+            count, group = used[0]
+            # One join + split for the whole batch, then a vectorised bytes->float cast
+            table = np.array(self.sep.join(group).split(self.sep), dtype="S").reshape(n, count)
+            values = table[:, count - self.n_values:]
+            if self.allow_empty:
+                values = np.where(np.char.strip(values) == b"", b"nan", values)
+            out[:] = values
+            if self.keep_first:
+                firsts = table[:, 0].tolist() if count == max(self.field_counts) else [None] * n
+        except ValueError:
+            n, firsts, slow_bad = self._parse_slow(lines)
+            bad += slow_bad
+            out = self._buf[:n]
+        self.stats["malformed"] += bad
+        self.stats["parsed"] += n
+        self.first_fields = firsts
+        return out
+
+    def _parse_slow(self, lines):
+        """Per-line fallback. Returns (n_parsed, first_fields, n_bad) for valid-count lines."""
+        n, bad, firsts = 0, 0, []
+        nan = float("nan")
+        for ln in lines:
+            parts = ln.split(self.sep)
+            if len(parts) not in self.field_counts:
+                continue   # already counted as malformed
+            try:
+                vals = [float(p) if (p.strip() or not self.allow_empty) else nan
+                        for p in parts[-self.n_values:]]
+            except ValueError:
+                bad += 1
+                continue
+            self._buf[n] = vals
+            if self.keep_first:
+                firsts.append(parts[0] if len(parts) == max(self.field_counts) else None)
+            n += 1
+        return n, firsts, bad
+
+    def summary(self):
+        s = self.stats
+        return (f"[{self.name}] lines={s['lines']} parsed={s['parsed']} malformed={s['malformed']} "
+                f"comments={s['comments']} skipped={s['skipped']}")
+
+# Line formats used by the boards in this repo
+FORMATS = {
+    # W5 Nano 33 IoT gyro: ",gx,gy,gz" (sometimes "ts,gx,gy,gz" or just "gx,gy,gz")
+    "gyro": dict(n_values=3, field_counts=(4, 3)),
+    # W6 gyro: "ms_since_start,x,y,z"
+    "xyz_ms": dict(n_values=4, field_counts=(4,), skip_prefixes=(b"time",)),
+    # W7 ESP32 DHT11: "timestamp,temperature_C,humidity_pct" or "temperature_C,humidity_pct"
+    "dht": dict(n_values=2, field_counts=(3, 2), skip_prefixes=(b"timestamp",), keep_first=True),
+    # W9 desk coach: "ts,temp_c,hum_pct,pitch_deg" (temp/hum may be blank)
+    "deskcoach": dict(n_values=3, field_counts=(4,), allow_empty=True, skip_prefixes=(b"timestamp",)),
+    # SIT225_W2 DHT11 table rows: "OK         | 56.0         | 17.0"
+    "dht_table": dict(n_values=2, field_counts=(3,), sep=b"|", require_prefix=b"OK"),
+}
+
+def make_parser(fmt, **overrides):
+    """Build a LineParser for one of the named FORMATS."""
+    opts = dict(FORMATS[fmt])
+    opts.update(overrides)
+    return LineParser(fmt, **opts)
+
+class RowClock:
+    """Per-row UTC times for the rows of one read.
+
+    The newest row gets the read time. Earlier rows are spaced back by the
+    board's own millisecond counter when the format carries one (`device_ms`),
+    otherwise one nominal sample period apart. They never go back past the
+    previous read, so times keep increasing when a backlog arrives at once.
+    """
+
+    def __init__(self, period_ms):
+        self.period_ms = float(period_ms)
+        self.last = None
+
+    def stamp(self, n, device_ms=None, now=None):
+        """datetime64[us] array (UTC, naive) of length n, oldest first."""
+        if now is None:
+            now = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us")
+        if device_ms is not None:
+            ms = np.asarray(device_ms, dtype=np.float64)
+            back = np.maximum(0.0, ms[-1] - ms)   # a counter reset mid-read counts as 0
+        else:
+            back = (n - 1 - np.arange(n)) * self.period_ms
+        if self.last is not None and n and back.max() > 0:
+            gap = (now - self.last) / np.timedelta64(1, "ms")
+            if back.max() > gap:
+                # Compress to fit after the previous read (as W9's logger does); rows stay distinct
+                back = back * (gap * (n - 1) / n / back.max())
+        self.last = now
+        return now - (back * 1000).astype("timedelta64[us]")
+
+def iso_utc(times, unit="ms"):
+    """ISO strings with a +00:00 suffix, like datetime.now(timezone.utc).isoformat()."""
+    return np.char.add(np.datetime_as_string(times, unit=unit), "+00:00").tolist()
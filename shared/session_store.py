@@ -0,0 +1,278 @@
+"""
+Columnar session storage: compressed, time-partitioned Parquet for recorded sessions.
+
+Every week used to round-trip through CSV and re-parse ISO timestamp strings on
+each load. A session is now stored as a Parquet dataset directory:
+
+    deskcoach_session.parquet/
+        date=2025-09-28/part-1727554800000000000.parquet
+        date=2025-09-29/part-...
+
+Columns are typed (timestamp[ns] for the time column, float32 for readings,
+dictionary-encoded strings for labels), compressed with zstd, and written in
+row groups with min/max statistics. `load_frame` reads back only the columns
+you ask for and pushes a [start, end) time range down to the partition and
+row-group level, so a one-minute slice of a day-long session reads a few
+row groups instead of the whole file.
+
+`load_frame` / `save_frame` also accept plain CSV paths. A `foo.csv` with a
+`foo.parquet` next to it is read from the Parquet copy, so existing scripts
+keep their CSV names and pick up migrated data automatically:
+
+    python shared/session_store.py migrate W9/deskcoach_session.csv W3/*.csv
+    python shared/session_store.py info W9/deskcoach_session.parquet
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Column names the repo's loggers use for the sample time, in preference order
+TIME_COLUMNS = ["time", "ts", "timestamp", "timestamp_iso", "Timestamp"]
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Parquet storage needs pyarrow: pip install pyarrow")
+    return pa, ds, pq
+
+def guess_time_col(columns):
+    for c in TIME_COLUMNS:
+        if c in columns:
+            return c
+    return None
+
+def parse_times(s):
+    """Parse a time column: ISO 8601 strings, or SIT225_W2's compact %Y%m%d%H%M%S."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    if pd.api.types.is_integer_dtype(s) or s.astype(str).str.fullmatch(r"\d{14}").all():
+        return pd.to_datetime(s.astype(str), format="%Y%m%d%H%M%S", errors="coerce")
+    return pd.to_datetime(s, format="ISO8601", errors="coerce")
+
+def to_storage_frame(df, time_col=None, float32=True):
+    """Typed copy of `df` ready for Parquet: parsed time, float32 readings, categorical labels."""
+    df = df.copy()
+    time_col = time_col or guess_time_col(df.columns)
+    if time_col:
+        df[time_col] = parse_times(df[time_col])
+        df = df.dropna(subset=[time_col]).sort_values(time_col, kind="stable")
+    for c in df.columns:
+        if c == time_col:
+            continue
+        s = df[c]
+        if s.dtype == object:
+            num = pd.to_numeric(s, errors="coerce")
+            # Blank cells (W9's temp/hum) are fine; real text stays text
+            if num.notna().sum() == s.replace("", np.nan).notna().sum():
+                s = num
+        if pd.api.types.is_float_dtype(s) and float32:
+            s = s.astype("float32")
+        elif s.dtype == object:
+            s = s.astype("category")
+        df[c] = s
+    return df.reset_index(drop=True), time_col
+
+def _table(df, time_col, unit="ns"):
+    pa, _, _ = _arrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if time_col:
+        i = table.schema.get_field_index(time_col)
+        tz = getattr(table.schema.field(i).type, "tz", None)
+        table = table.set_column(i, time_col, table.column(i).cast(pa.timestamp(unit, tz=tz), safe=False))
+    return table
+
+def _existing_unit(root, time_col):
+    """Time unit of the parts already in `root`, or None."""
+    _, _, pq = _arrow()
+    part = next(root.rglob("*.parquet"), None) if root.exists() else None
+    if part is None or not time_col:
+        return None
+    schema = pq.read_schema(part)
+    i = schema.get_field_index(time_col)
+    return getattr(schema.field(i).type, "unit", None) if i >= 0 else None
+
+def write_session(df, root, time_col=None, float32=True, row_group_rows=64_000, append=True, time_unit=None):
+    """Write `df` as a date-partitioned Parquet dataset under `root`. Returns rows written.
+
+    With append=True new part files are added next to existing ones, so a
+    logger can call this once per batch; otherwise `root` is replaced.
+    The time column is stored as timestamp[time_unit]: "ns" by default, so
+    nanosecond exports (W3's) keep every digit. Appends use the unit already in
+    the dataset; parts with mixed units can't be scanned together.
+    """
+    _, _, pq = _arrow()
+    root = Path(root)
+    df, time_col = to_storage_frame(df, time_col, float32)
+    if not append and root.exists():
+        for p in sorted(root.rglob("*"), reverse=True):
+            p.unlink() if p.is_file() else p.rmdir()
+    time_unit = _existing_unit(root, time_col) or time_unit or "ns"
+    root.mkdir(parents=True, exist_ok=True)
+    if not len(df):
+        return 0
+    if time_col:
+        # Group on the floored day and format only the keys: strftime per row dominated large writes
+        groups = ((day.strftime("%Y-%m-%d"), part)
+                  for day, part in df.groupby(df[time_col].dt.floor("D").rename(None), sort=True))
+    else:
+        groups = [("unknown", df)]
+    stamp = time.time_ns()
+    for day, part in groups:
+        out = root / f"date={day}"
+        out.mkdir(exist_ok=True)
+        tmp = out / f"part-{stamp}.parquet.tmp"
+        pq.write_table(_table(part, time_col, time_unit), tmp, compression="zstd",
+                       row_group_size=row_group_rows, write_statistics=True)
+        tmp.replace(out / f"part-{stamp}.parquet")
+    return len(df)
+
+def resolve(path):
+    """Prefer a migrated `<name>.parquet` next to a CSV path."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        pq_path = path.with_suffix(".parquet")
+        if pq_path.exists() and (not path.exists() or pq_path.stat().st_mtime >= path.stat().st_mtime):
+            return pq_path
+    return path
+
+def _bound(value, field_type):
+    pa, _, _ = _arrow()
+    ts = pd.Timestamp(value)
+    tz = getattr(field_type, "tz", None)
+    if tz and ts.tzinfo is None:
+        ts = ts.tz_localize(tz)
+    elif not tz and ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return pa.scalar(ts, type=field_type)
+
+def load_frame(path, columns=None, start=None, end=None, time_col=None):
+    """Load a session as a DataFrame with a parsed time column.
+
+    `path` may be a Parquet dataset directory, a single .parquet file, or a
+    CSV (transparently redirected to its Parquet copy if one exists).
+    `columns` limits what is read; `start`/`end` select time_col in [start, end).
+    """
+    path = resolve(path)
+    if path.suffix.lower() == ".csv" and path.is_file():
+        df = pd.read_csv(path)
+        time_col = time_col or guess_time_col(df.columns)
+        if time_col:
+            df[time_col] = parse_times(df[time_col])
+            if start is not None:
+                df = df[df[time_col] >= pd.Timestamp(start)]
+            if end is not None:
+                df = df[df[time_col] < pd.Timestamp(end)]
+        if columns is not None:
+            df = df[[c for c in df.columns if c in columns or c == time_col]]
+        return df.reset_index(drop=True)
+
+    pa, ds, _ = _arrow()
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive") if path.is_dir() else None
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    names = [n for n in dataset.schema.names if n != "date"]
+    time_col = time_col or guess_time_col(names)
+    cols = names if columns is None else [c for c in names if c in columns or c == time_col]
+    flt = None
+    if time_col and (start is not None or end is not None):
+        ftype = dataset.schema.field(time_col).type
+        if start is not None:
+            flt = ds.field(time_col) >= _bound(start, ftype)
+            if partitioning:
+                flt &= ds.field("date") >= pd.Timestamp(start).strftime("%Y-%m-%d")
+        if end is not None:
+            e = ds.field(time_col) < _bound(end, ftype)
+            if partitioning:
+                e &= ds.field("date") <= pd.Timestamp(end).strftime("%Y-%m-%d")
+            flt = e if flt is None else flt & e
+    df = dataset.to_table(columns=cols, filter=flt).to_pandas()
+    if time_col:
+        df = df.sort_values(time_col, kind="stable").reset_index(drop=True)
+    return df
+
+def iter_frames(path, columns=None, batch_rows=1_000_000, time_col=None):
+    """Yield a session as DataFrames of at most `batch_rows` rows, in stored order.
+
+    Same inputs as load_frame, for sessions too big to load at once.
+    """
+    path = resolve(path)
+    if path.suffix.lower() == ".csv" and path.is_file():
+        for df in pd.read_csv(path, chunksize=batch_rows):
+            time_col = time_col or guess_time_col(df.columns)
+            if time_col:
+                df[time_col] = parse_times(df[time_col])
+            if columns is not None:
+                df = df[[c for c in df.columns if c in columns or c == time_col]]
+            yield df
+        return
+    pa, ds, _ = _arrow()
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive") if path.is_dir() else None
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    names = [n for n in dataset.schema.names if n != "date"]
+    time_col = time_col or guess_time_col(names)
+    cols = names if columns is None else [c for c in names if c in columns or c == time_col]
+    for batch in dataset.to_batches(columns=cols, batch_size=batch_rows):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def save_frame(df, path, time_col=None):
+    """Save `df` as Parquet (for .parquet paths or directories) or CSV (for .csv paths)."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        df.to_csv(path, index=False)
+        return len(df)
+    return write_session(df, path, time_col, append=False)
+
+def migrate(csv_path, out=None, time_col=None, row_group_rows=64_000):
+    csv_path = Path(csv_path)
+    out = Path(out) if out else csv_path.with_suffix(".parquet")
+    df = pd.read_csv(csv_path)
+    rows = write_session(df, out, time_col, row_group_rows=row_group_rows, append=False)
+    return out, rows
+
+def dataset_size(path):
+    path = Path(path)
+    return sum(p.stat().st_size for p in path.rglob("*.parquet")) if path.is_dir() else path.stat().st_size
+
+def cmd_migrate(args):
+    for src in args.csv:
+        t0 = time.perf_counter()
+        out = Path(args.out_dir) / Path(src).with_suffix(".parquet").name if args.out_dir else None
+        out, rows = migrate(src, out, args.time_col, args.row_group_rows)
+        before, after = Path(src).stat().st_size, dataset_size(out)
+        print(f"[migrate] {src} -> {out}: {rows} rows, {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB "
+              f"({before / max(after, 1):.1f}x) in {time.perf_counter() - t0:.2f}s")
+
+def cmd_info(args):
+    _, ds, _ = _arrow()
+    for src in args.path:
+        path = Path(src)
+        files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+        dataset = ds.dataset(files, format="parquet")
+        print(f"{src}: {dataset.count_rows()} rows in {len(files)} file(s), {dataset_size(path) / 1e6:.2f} MB")
+        for field in dataset.schema:
+            print(f"  {field.name}: {field.type}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Parquet session storage")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("migrate", help="Convert session CSVs to Parquet datasets (<name>.parquet next to each CSV)")
+    p.add_argument("csv", nargs="+")
+    p.add_argument("--out-dir", default=None, help="Write datasets here instead of next to the CSVs")
+    p.add_argument("--time-col", default=None, help=f"Time column (default: first of {', '.join(TIME_COLUMNS)})")
+    p.add_argument("--row-group-rows", type=int, default=64_000)
+    p.set_defaults(func=cmd_migrate)
+    p = sub.add_parser("info", help="Show rows, files, size and schema of a Parquet session")
+    p.add_argument("path", nargs="+")
+    p.set_defaults(func=cmd_info)
+    args = ap.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
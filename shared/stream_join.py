@@ -0,0 +1,188 @@
+"""
+Out-of-core, time-aligned join of N sensor streams (merge_asof, chunk by chunk).
+
+W3's analysis loaded both exports fully and inner-joined them on exact
+timestamps. Any reading that didn't share an instant with the other sensor
+was silently dropped, which for independently clocked sensors is almost all
+of them. `asof_join` instead walks the streams in time order, one chunk at a
+time:
+
+- the first stream is the reference. Every one of its rows is kept, and for
+  each other stream it gets the nearest reading within `tolerance` (or NaN).
+  `direction` works as in pd.merge_asof: nearest, backward or forward
+- each other stream keeps a buffer: the rows of the current reference chunk's
+  time span plus `tolerance` on either side. Chunks are read until the buffer
+  reaches past that span, and rows that can no longer match are trimmed. Memory
+  is a few chunks per stream, whatever the file sizes
+- inputs are CSV (Arrow's streaming CSV reader) or Parquet files/datasets (Arrow record
+  batches). Each must be sorted by time; out-of-order chunks raise ValueError
+- output is written as each chunk is joined: a date-partitioned Parquet dataset
+  (session_store.write_session), or CSV appends
+
+    python shared/stream_join.py temperature_c=W3/week3_temperature.csv humidity=W3/week3_humidity.csv \\
+        --tolerance 5s --out W3/week3_dht_data.parquet
+"""
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.session_store import _arrow, guess_time_col, parse_times, resolve, write_session
+
+def _normalise(df, time_col, name):
+    """Parsed, UTC-naive ns time column named "timestamp"; value columns prefixed with the stream name."""
+    ts = parse_times(df[time_col])
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_convert(None)
+    values = df.drop(columns=[time_col])
+    if list(values.columns) == ["value"]:
+        values.columns = [name]
+    else:
+        values.columns = [f"{name}_{c}" for c in values.columns]
+    out = values.apply(pd.to_numeric, errors="coerce")
+    out.insert(0, "timestamp", ts.dt.as_unit("ns"))
+    return out.dropna(subset=["timestamp"])
+
+def iter_chunks(path, name, chunk_rows=1_000_000, time_col=None):
+    """Yield time-sorted DataFrame chunks ("timestamp" + value columns) of one stream."""
+    path = resolve(path)
+    pa, ds, _ = _arrow()
+    if path.suffix.lower() == ".csv" and path.is_file():
+        import pyarrow.csv as pcsv
+        head = pd.read_csv(path, nrows=5, dtype=str)
+        time_col = time_col or guess_time_col(head.columns)
+        # Arrow's streaming reader parses ISO timestamps natively, several times faster than read_csv chunks.
+        # Other formats (SIT225_W2's %Y%m%d%H%M%S) come through as strings for parse_times.
+        iso = time_col is not None and head[time_col].str.contains("-").all()
+        # Small blocks: Arrow reads ahead in proportion to block_size, so big blocks cost hundreds of MB.
+        # Blocks are gathered into chunk_rows-sized tables before handing them to pandas.
+        opts = dict(read_options=pcsv.ReadOptions(block_size=1 << 20),
+                    convert_options=pcsv.ConvertOptions(
+                        column_types=None if iso or time_col is None else {time_col: pa.string()}))
+
+        def csv_chunks():
+            with open(path, "rb") as f:
+                batches, n = [], 0
+                for b in pcsv.open_csv(f, **opts):
+                    batches.append(b)
+                    n += b.num_rows
+                    if n >= chunk_rows:
+                        yield _normalise(pa.Table.from_batches(batches).to_pandas(), time_col, name)
+                        batches, n = [], 0
+                if n:
+                    yield _normalise(pa.Table.from_batches(batches).to_pandas(), time_col, name)
+        chunks = csv_chunks()
+    else:
+        partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive") if path.is_dir() else None
+        dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+        cols = [n for n in dataset.schema.names if n != "date"]
+        time_col = time_col or guess_time_col(cols)
+        batches = dataset.to_batches(columns=cols, batch_size=chunk_rows)
+        chunks = (_normalise(b.to_pandas(), time_col, name) for b in batches if b.num_rows)
+    if time_col is None:
+        raise ValueError(f"{path}: no time column")
+    last = None
+    for df in chunks:
+        if not len(df):
+            continue
+        t = df["timestamp"].to_numpy()
+        if (last is not None and t[0] < last) or (np.diff(t) < np.timedelta64(0)).any():
+            raise ValueError(f"{path}: not sorted by time (needed for a streaming join)")
+        last = t[-1]
+        yield df
+
+class _Buffered:
+    """One non-reference stream: a sliding window of rows around the reference chunk."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buf = None
+        self.done = False
+
+    def cover(self, until):
+        """Read chunks until the buffer holds a row after `until` (or the stream ends)."""
+        while not self.done and (self.buf is None or self.buf["timestamp"].iat[-1] <= until):
+            nxt = next(self.chunks, None)
+            if nxt is None:
+                self.done = True
+            else:
+                self.buf = nxt if self.buf is None else pd.concat([self.buf, nxt], ignore_index=True)
+
+    def trim(self, before):
+        """Drop rows strictly before `before`, keeping the last one of them (a backward match may need it)."""
+        if self.buf is None:
+            return
+        i = int(np.searchsorted(self.buf["timestamp"].to_numpy(), before.to_datetime64(), "left"))
+        if i > 1:
+            self.buf = self.buf.iloc[i - 1:].reset_index(drop=True)
+
+def asof_join(streams, tolerance="5s", direction="nearest", chunk_rows=1_000_000):
+    """Yield joined chunks. `streams` is a list of (name, path); the first is the reference."""
+    tol = pd.Timedelta(tolerance)
+    (ref_name, ref_path), others = streams[0], streams[1:]
+    buffers = [_Buffered(iter_chunks(p, n, chunk_rows)) for n, p in others]
+    for left in iter_chunks(ref_path, ref_name, chunk_rows):
+        lo, hi = left["timestamp"].iat[0], left["timestamp"].iat[-1]
+        out = left
+        for b in buffers:
+            b.cover(hi + tol)
+            b.trim(lo - tol)
+            right = b.buf if b.buf is not None else pd.DataFrame({"timestamp": pd.Series(dtype="datetime64[ns]")})
+            out = pd.merge_asof(out, right, on="timestamp", tolerance=tol, direction=direction)
+        yield out
+
+def write_chunks(chunks, out, float32=True):
+    """Write joined chunks to a Parquet dataset or CSV as they arrive. Returns rows written."""
+    out = Path(out)
+    rows = 0
+    for i, df in enumerate(chunks):
+        if out.suffix.lower() == ".csv":
+            df.to_csv(out, mode="w" if i == 0 else "a", header=(i == 0), index=False,
+                      date_format="%Y-%m-%dT%H:%M:%S.%f")
+        else:
+            write_session(df, out, time_col="timestamp", float32=float32, append=(i > 0))
+        rows += len(df)
+        print(f"[join] {rows:,} rows", end="\r", flush=True)
+    print()
+    return rows
+
+def parse_stream(spec):
+    """'name=path' or just 'path' (named after the file)."""
+    name, sep, path = spec.partition("=")
+    if not sep:
+        path, name = spec, Path(spec).stem
+    return name, path
+
+def peak_rss_mb():
+    """This process's peak RSS. VmHWM, unlike ru_maxrss, isn't inherited from the parent across exec."""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(l.split()[1]) for l in f if l.startswith("VmHWM:")) / 1024
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+def main():
+    ap = argparse.ArgumentParser(description="Streaming merge_asof join of time-sorted sensor exports")
+    ap.add_argument("streams", nargs="+", help="[name=]path for each stream; the first is the reference")
+    ap.add_argument("--out", required=True, help="Output .parquet dataset or .csv")
+    ap.add_argument("--tolerance", default="5s", help="Max time difference for a match (pandas Timedelta)")
+    ap.add_argument("--direction", default="nearest", choices=["nearest", "backward", "forward"])
+    ap.add_argument("--chunk", type=int, default=1_000_000, help="Rows per chunk read from each stream")
+    args = ap.parse_args()
+    if len(args.streams) < 2:
+        ap.error("need at least two streams")
+
+    streams = [parse_stream(s) for s in args.streams]
+    t0 = time.perf_counter()
+    rows = write_chunks(asof_join(streams, args.tolerance, args.direction, args.chunk), args.out)
+    secs = time.perf_counter() - t0
+    print(f"[join] {rows:,} rows ({', '.join(n for n, _ in streams)}) -> {args.out} in {secs:.2f}s "
+          f"({rows / secs / 1e6:.2f} M rows/s), peak RSS {peak_rss_mb():.0f} MB")
+
+if __name__ == "__main__":
+    main()